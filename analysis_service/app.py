@@ -5,23 +5,29 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from starlette.middleware.base import BaseHTTPMiddleware
 from core.config import settings
-from routers.analyze import router as analyze_router
+from routers.analyze import router as analyze_router, detector
+from routers.admin import router as admin_router
+from core.preloader import ModelPreloader
+from core.resource import resource_sampler
+from core import metrics
 from core.exceptions import AnalysisException
 from core.models import StandardResponse
 from shared.utils.logger import setup_logger
 import time
 import uuid
+import asyncio
 import logging
 import uvicorn
-import psutil
-import GPUtil
 
 # 设置日志
 logger = setup_logger(__name__)
 
+# 模型预加载器
+model_preloader = ModelPreloader(detector)
+
 # 关闭 uvicorn 和 fastapi 的访问日志
 if not settings.DEBUG:
     logging.getLogger("uvicorn.access").setLevel(logging.ERROR)
@@ -106,6 +112,10 @@ app.include_router(
     analyze_router,
     prefix="/api/v1/analyze"
 )
+app.include_router(
+    admin_router,
+    prefix="/api/v1/admin"
+)
 
 # 全局异常处理
 @app.exception_handler(AnalysisException)
@@ -149,19 +159,13 @@ async def global_exception_handler(request: Request, exc: Exception):
 @app.get("/health")
 async def health_check():
     """健康检查接口"""
-    # 获取CPU使用率
-    cpu_percent = psutil.cpu_percent(interval=1)
+    # 读取后台资源采样快照，不阻塞请求
+    resources = resource_sampler.get_snapshot()
+    gpu_percent = resources.get("gpu_percent")
+    gpu_usage = f"{gpu_percent:.1f}%" if gpu_percent is not None else "N/A"
     
-    # 获取内存使用情况
-    memory = psutil.virtual_memory()
-    memory_percent = memory.percent
-    
-    # 获取GPU使用情况
-    try:
-        gpus = GPUtil.getGPUs()
-        gpu_usage = f"{gpus[0].load * 100:.1f}%" if gpus else "N/A"
-    except:
-        gpu_usage = "N/A"
+    # 模型就绪状态，供调度方避开冷节点
+    model_status = model_preloader.get_status()
     
     return StandardResponse(
         requestId=str(uuid.uuid4()),
@@ -173,12 +177,28 @@ async def health_check():
             "status": "healthy",
             "name": "analysis",
             "version": settings.VERSION,
-            "cpu": f"{cpu_percent:.1f}%",
+            "cpu": f"{resources['cpu_percent']:.1f}%",
             "gpu": gpu_usage,
-            "memory": f"{memory_percent:.1f}%"
+            "memory": f"{resources['memory_percent']:.1f}%",
+            "resources": resources,
+            "models_ready": model_status["ready"],
+            "models": model_status["models"],
+            "model_fetch": detector.model_fetcher.get_metrics(),
+            "stream_hub": detector.stream_hub.get_status(),
+            "worker_pool": detector.worker_pool.get_status() if detector.worker_pool is not None else None,
+            "result_cache": detector.result_cache.get_metrics(),
+            "qos": detector.qos.get_status()
         }
     )
 
+# 流水线指标
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Prometheus 指标接口"""
+    if not settings.METRICS.enabled:
+        return PlainTextResponse("metrics disabled\n", status_code=404)
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
 def show_service_banner(service_name: str):
     """显示服务启动标识"""
     banner = f"""
@@ -203,9 +223,40 @@ async def startup_event():
         logger.info(f"版本: {settings.VERSION}")
         logger.info(f"注册的路由: {[route.path for route in app.routes]}")
     
+    # 后台资源采样，推理队列深度以进行中的流和排队图片数计
+    resource_sampler.register_gauge("active_streams", lambda: len(detector.qos.streams))
+    resource_sampler.register_gauge("pending_images", lambda: detector.pending_images)
+    resource_sampler.start()
+    
+    # 多进程推理工作池
+    detector.start_worker_pool()
+    
+    # 导出时读取的仪表
+    metrics.registry.register_gauge(
+        "analysis_resource_percent", "Node resource usage from the background sampler",
+        lambda: {
+            (name,): value for name, value in resource_sampler.get_snapshot().items()
+            if name.endswith("_percent") and value is not None
+        },
+        ("resource",)
+    )
+    metrics.registry.register_gauge("analysis_active_streams", "Running stream analysis tasks", lambda: len(detector.qos.streams))
+    metrics.registry.register_gauge("analysis_pending_images", "Images queued in the image pipeline", lambda: detector.pending_images)
+    metrics.registry.register_gauge(
+        "analysis_qos_level", "QoS degradation level per stream",
+        lambda: {(task_id,): stream.level for task_id, stream in detector.qos.streams.items()},
+        ("task_id",)
+    )
+    
+    # 后台预加载并预热模型，不阻塞服务启动
+    if settings.PRELOAD.enabled:
+        asyncio.create_task(model_preloader.run())
+    
 @app.on_event("shutdown")
 async def shutdown_event():
     """关闭事件"""
+    await resource_sampler.stop()
+    await detector.close()
     if settings.DEBUG:
         logger.info("分析服务关闭...")
 
@@ -0,0 +1,9 @@
+"""
+检测器流水线离线基准测试
+使用合成帧/视频和本地构建的小型YOLO权重，在纯CPU、无网络环境下测量
+detect、_process_frame、_encode_result_image、跟踪器与ROI过滤等环节的吞吐与延迟
+"""
+from benchmarks.runner import BenchmarkRunner, CASES, compare
+from benchmarks.synthetic import SyntheticScene, write_video, build_tiny_model
+
+__all__ = ['BenchmarkRunner', 'CASES', 'compare', 'SyntheticScene', 'write_video', 'build_tiny_model']
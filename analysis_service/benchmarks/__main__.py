@@ -0,0 +1,84 @@
+"""
+基准测试命令行入口
+
+在 analysis_service 目录下执行：
+    python -m benchmarks --resolutions 1280x720,1920x1080 --frames 200 --output result.json
+    python -m benchmarks --baseline baseline.json --fail-on-regression
+
+仅使用CPU、合成输入和本地构建的小型权重，不需要网络、Redis或摄像头
+"""
+import os
+import sys
+import json
+import asyncio
+import argparse
+
+# 以 analysis_service 为导入根目录
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.runner import BenchmarkRunner, CASES, compare
+
+def parse_resolutions(value: str):
+    resolutions = []
+    for item in value.split(","):
+        width, height = item.lower().split("x")
+        resolutions.append((int(width), int(height)))
+    return resolutions
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="分析服务检测流水线基准测试")
+    parser.add_argument("--resolutions", default="1280x720", help="帧尺寸，逗号分隔，例如 1280x720,1920x1080")
+    parser.add_argument("--frames", type=int, default=100, help="每项测量的帧数")
+    parser.add_argument("--warmup", type=int, default=5, help="预热帧数")
+    parser.add_argument("--objects", type=int, default=8, help="合成场景目标数")
+    parser.add_argument("--imgsz", type=int, default=640, help="推理尺寸")
+    parser.add_argument("--cases", default=",".join(CASES), help=f"测试项，逗号分隔，可选: {','.join(CASES)}")
+    parser.add_argument("--model", default=None, help="权重路径，默认在工作目录构建小型随机权重")
+    parser.add_argument("--work-dir", default=None, help="权重和合成视频的存放目录")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--device", default="cpu", help="推理设备，默认cpu")
+    parser.add_argument("--output", default=None, help="结果JSON输出路径，默认输出到标准输出")
+    parser.add_argument("--baseline", default=None, help="基线结果JSON，提供时输出对比结果")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="判定退化的变化比例")
+    parser.add_argument("--fail-on-regression", action="store_true", help="存在退化时以非零状态退出")
+    args = parser.parse_args(argv)
+
+    cases = [case.strip() for case in args.cases.split(",") if case.strip()]
+    unknown = set(cases) - set(CASES)
+    if unknown:
+        parser.error(f"未知测试项: {', '.join(sorted(unknown))}")
+
+    # 检测器按 ANALYSIS.device 选择设备，基准测试默认固定为CPU以便结果可比
+    from core.config import settings
+    settings.ANALYSIS.device = args.device
+
+    runner = BenchmarkRunner(
+        resolutions=parse_resolutions(args.resolutions),
+        frames=args.frames,
+        warmup=args.warmup,
+        objects=args.objects,
+        imgsz=args.imgsz,
+        cases=cases,
+        model_path=args.model,
+        work_dir=args.work_dir,
+        seed=args.seed
+    )
+    report = asyncio.run(runner.run())
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            report["comparison"] = compare(report, json.load(f), args.tolerance)
+        if args.fail_on_regression and report["comparison"]["regressions"]:
+            exit_code = 1
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+    return exit_code
+
+if __name__ == "__main__":
+    sys.exit(main())
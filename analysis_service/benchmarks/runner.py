@@ -0,0 +1,243 @@
+"""
+基准测试执行
+在合成输入上逐项测量检测器流水线各环节的吞吐、延迟分位数与内存峰值，
+并与保存的基线结果对比
+"""
+import os
+import sys
+import time
+import platform
+import tempfile
+from typing import Any, Callable, Dict, List, Optional
+import cv2
+import numpy as np
+from benchmarks.synthetic import SyntheticScene, write_video, build_tiny_model
+
+try:
+    import resource as _resource
+except ImportError:  # Windows
+    _resource = None
+
+CASES = ["detect", "process_frame", "encode_result_image", "tracker", "roi_filter", "video_decode"]
+
+# 基准测试使用的ROI（归一化坐标）
+ROI_CONFIGS = {
+    "rect": {"roi_type": 1, "roi": {"x1": 0.1, "y1": 0.1, "x2": 0.9, "y2": 0.9}},
+    "polygon": {"roi_type": 2, "roi": {"points": [[0.1, 0.1], [0.9, 0.2], [0.8, 0.9], [0.2, 0.8]]}},
+    "line": {"roi_type": 3, "roi": {"points": [[0.0, 0.5], [1.0, 0.5]]}}
+}
+
+def peak_rss_mb() -> Optional[float]:
+    """进程内存峰值（MB）"""
+    if _resource is None:
+        return None
+    peak = _resource.getrusage(_resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为KB，macOS 为字节
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+def summarize(latencies: List[float], wall_seconds: float) -> Dict[str, Any]:
+    """汇总延迟（秒）为 fps 与毫秒分位数"""
+    values = np.asarray(latencies, dtype=np.float64) * 1000
+    return {
+        "iterations": len(latencies),
+        "fps": round(len(latencies) / wall_seconds, 2) if wall_seconds > 0 else None,
+        "mean_ms": round(float(values.mean()), 3),
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+        "p99_ms": round(float(np.percentile(values, 99)), 3),
+        "max_ms": round(float(values.max()), 3),
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+async def load_detector(model_path: str, model_code: str = "benchmark-tiny"):
+    """创建检测器并直接加载本地权重，不经过模型服务；权重不存在时在本地构建小型随机权重"""
+    from core.detector import YOLODetector
+
+    build_tiny_model(model_path)
+    detector = YOLODetector()
+    detector._models[model_code] = detector.backends.load(model_code, model_path)
+    await detector.load_model(model_code)
+    return detector
+
+class BenchmarkRunner:
+    """检测器流水线基准测试
+
+    Args:
+        resolutions: 帧尺寸列表 [(w, h), ...]
+        frames: 每项测量的帧数
+        warmup: 预热帧数（不计入统计）
+        objects: 合成场景目标数
+        imgsz: 推理尺寸
+        cases: 要执行的测试项
+        model_path: 权重路径，默认在工作目录构建小型随机权重
+        work_dir: 临时文件目录
+        seed: 随机种子
+    """
+
+    def __init__(
+        self,
+        resolutions: List[tuple],
+        frames: int = 100,
+        warmup: int = 5,
+        objects: int = 8,
+        imgsz: int = 640,
+        cases: Optional[List[str]] = None,
+        model_path: Optional[str] = None,
+        work_dir: Optional[str] = None,
+        seed: int = 0
+    ):
+        self.resolutions = resolutions
+        self.frames = frames
+        self.warmup = warmup
+        self.objects = objects
+        self.imgsz = imgsz
+        self.cases = cases or list(CASES)
+        self.work_dir = work_dir or os.path.join(tempfile.gettempdir(), "analysis_benchmark")
+        self.model_path = model_path or os.path.join(self.work_dir, "tiny_yolo.pt")
+        self.seed = seed
+        self.detector = None
+        self.model = None
+        self.model_code = "benchmark-tiny"
+
+    async def _setup_detector(self):
+        if self.detector is None:
+            self.detector = await load_detector(self.model_path, self.model_code)
+            self.model = self.detector.model
+
+    async def _measure(self, samples: List[Any], func: Callable, is_async: bool) -> Dict[str, Any]:
+        for sample in samples[:self.warmup]:
+            result = func(sample)
+            if is_async:
+                await result
+
+        latencies = []
+        wall_start = time.perf_counter()
+        for sample in samples[self.warmup:]:
+            start = time.perf_counter()
+            result = func(sample)
+            if is_async:
+                await result
+            latencies.append(time.perf_counter() - start)
+        return summarize(latencies, time.perf_counter() - wall_start)
+
+    async def _run_resolution(self, width: int, height: int) -> Dict[str, Any]:
+        scene = SyntheticScene(width, height, self.objects, self.seed)
+        samples = list(scene.frames(self.frames + self.warmup))
+        config = {"imgsz": self.imgsz, "confidence": 0.25, "iou": 0.45}
+        results: Dict[str, Any] = {}
+
+        if "detect" in self.cases:
+            await self._setup_detector()
+            results["detect"] = await self._measure(
+                samples, lambda s: self.detector.detect(s[0], config), True
+            )
+
+        if "process_frame" in self.cases:
+            await self._setup_detector()
+            preprocessor = self.detector._create_preprocessor(self.model_code, config)
+            results["process_frame"] = await self._measure(
+                samples, lambda s: self.detector._process_frame(s[0], self.model, config, preprocessor), True
+            )
+
+        if "encode_result_image" in self.cases:
+            await self._setup_detector()
+            results["encode_result_image"] = await self._measure(
+                samples, lambda s: self.detector._encode_result_image(s[0], s[1], return_image=True), True
+            )
+
+        if "tracker" in self.cases:
+            from core.tracker import create_tracker
+            tracker = create_tracker("sort")
+            results["tracker"] = await self._measure(samples, lambda s: tracker.update(s[1]), False)
+
+        if "roi_filter" in self.cases:
+            from core.detector import YOLODetector
+            for name, roi_config in ROI_CONFIGS.items():
+                results[f"roi_filter_{name}"] = await self._measure(
+                    samples,
+                    lambda s, c=roi_config: YOLODetector._filter_detections_by_roi(s[1], c, width, height),
+                    False
+                )
+
+        if "video_decode" in self.cases:
+            os.makedirs(self.work_dir, exist_ok=True)
+            video_path = os.path.join(self.work_dir, f"synthetic_{width}x{height}_{self.seed}.avi")
+            if not os.path.exists(video_path):
+                write_video(video_path, SyntheticScene(width, height, self.objects, self.seed), self.frames + self.warmup)
+            cap = cv2.VideoCapture(video_path)
+            try:
+                results["video_decode"] = await self._measure(
+                    list(range(self.frames + self.warmup)), lambda _: cap.read(), False
+                )
+            finally:
+                cap.release()
+
+        return results
+
+    async def run(self) -> Dict[str, Any]:
+        """执行全部测试项
+
+        Returns:
+            Dict[str, Any]: 环境信息、参数，以及 results[分辨率][测试项] 的统计结果
+        """
+        results = {}
+        for width, height in self.resolutions:
+            results[f"{width}x{height}"] = await self._run_resolution(width, height)
+
+        environment = {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "cpu_count": os.cpu_count(),
+            "opencv": cv2.__version__,
+            "numpy": np.__version__
+        }
+        if self.detector is not None:
+            import torch
+            environment.update({"torch": torch.__version__, "device": str(self.detector.device)})
+            await self.detector.close()
+
+        return {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "environment": environment,
+            "parameters": {
+                "resolutions": [f"{w}x{h}" for w, h in self.resolutions],
+                "frames": self.frames,
+                "warmup": self.warmup,
+                "objects": self.objects,
+                "imgsz": self.imgsz,
+                "cases": self.cases,
+                "seed": self.seed
+            },
+            "results": results,
+            "peak_rss_mb": peak_rss_mb()
+        }
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.1) -> Dict[str, Any]:
+    """与基线对比
+
+    fps 下降或 p95 延迟上升超过 tolerance（比例）的测试项记为退化
+
+    Returns:
+        Dict[str, Any]: items（每项的变化比例）与 regressions（退化项列表）
+    """
+    items, regressions = {}, []
+    for resolution, cases in current.get("results", {}).items():
+        for case, stats in cases.items():
+            base = baseline.get("results", {}).get(resolution, {}).get(case)
+            if not base:
+                continue
+            key = f"{resolution}/{case}"
+            fps_change = (stats["fps"] - base["fps"]) / base["fps"] if base.get("fps") and stats.get("fps") else None
+            p95_change = (stats["p95_ms"] - base["p95_ms"]) / base["p95_ms"] if base.get("p95_ms") else None
+            items[key] = {
+                "fps": stats.get("fps"),
+                "baseline_fps": base.get("fps"),
+                "fps_change": round(fps_change, 4) if fps_change is not None else None,
+                "p95_ms": stats.get("p95_ms"),
+                "baseline_p95_ms": base.get("p95_ms"),
+                "p95_change": round(p95_change, 4) if p95_change is not None else None
+            }
+            if (fps_change is not None and fps_change < -tolerance) or (p95_change is not None and p95_change > tolerance):
+                regressions.append(key)
+    return {"tolerance": tolerance, "items": items, "regressions": regressions}
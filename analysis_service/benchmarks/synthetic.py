@@ -0,0 +1,107 @@
+"""
+合成输入
+生成带运动矩形目标的视频帧与对应真值检测结果，以及本地构建的小型YOLO权重，
+基准测试全程不依赖摄像头和网络
+"""
+import os
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import cv2
+import numpy as np
+
+CLASS_NAMES = ["person", "car", "helmet"]
+
+class SyntheticScene:
+    """运动矩形场景
+
+    背景为固定噪声纹理，目标为匀速运动并在边界反弹的彩色矩形；
+    相同参数与种子生成的帧序列完全一致
+    """
+
+    def __init__(self, width: int = 1280, height: int = 720, num_objects: int = 8, seed: int = 0):
+        self.width = width
+        self.height = height
+        self.rng = np.random.default_rng(seed)
+        self.background = self.rng.integers(40, 90, size=(height, width, 3), dtype=np.uint8)
+
+        min_side = max(8, min(width, height) // 16)
+        max_side = max(min_side + 1, min(width, height) // 4)
+        self.objects = []
+        for index in range(num_objects):
+            w, h = self.rng.integers(min_side, max_side, size=2)
+            self.objects.append({
+                "class_id": index % len(CLASS_NAMES),
+                "size": np.array([w, h], dtype=np.float64),
+                "pos": self.rng.uniform([0, 0], [width - w, height - h]),
+                "vel": self.rng.uniform(-0.01, 0.01, size=2) * np.array([width, height]),
+                "color": tuple(int(c) for c in self.rng.integers(120, 255, size=3))
+            })
+
+    def _step(self):
+        limit = np.array([self.width, self.height], dtype=np.float64)
+        for obj in self.objects:
+            obj["pos"] += obj["vel"]
+            for axis in range(2):
+                if obj["pos"][axis] < 0 or obj["pos"][axis] + obj["size"][axis] > limit[axis]:
+                    obj["vel"][axis] = -obj["vel"][axis]
+                    obj["pos"][axis] = min(max(obj["pos"][axis], 0), limit[axis] - obj["size"][axis])
+
+    def render(self) -> Tuple[np.ndarray, List[Dict[str, Any]]]:
+        """绘制当前帧，返回 (BGR帧, 真值检测结果)"""
+        frame = self.background.copy()
+        detections = []
+        for obj in self.objects:
+            x1, y1 = obj["pos"]
+            x2, y2 = obj["pos"] + obj["size"]
+            cv2.rectangle(frame, (int(x1), int(y1)), (int(x2), int(y2)), obj["color"], -1)
+            detections.append({
+                "bbox": {"x1": float(x1), "y1": float(y1), "x2": float(x2), "y2": float(y2)},
+                "confidence": 0.9,
+                "class_id": obj["class_id"],
+                "class_name": CLASS_NAMES[obj["class_id"]],
+                "area": float((x2 - x1) * (y2 - y1)),
+                "parent_idx": None,
+                "children": []
+            })
+        return frame, detections
+
+    def frames(self, count: int) -> Iterator[Tuple[np.ndarray, List[Dict[str, Any]]]]:
+        """逐帧生成 count 帧"""
+        for _ in range(count):
+            yield self.render()
+            self._step()
+
+def write_video(path: str, scene: SyntheticScene, count: int, fps: int = 25) -> str:
+    """将场景写为视频文件（MJPG编码的AVI，OpenCV无需额外编码器即可读写）"""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, (scene.width, scene.height))
+    if not writer.isOpened():
+        raise RuntimeError(f"无法创建视频文件: {path}")
+    try:
+        for frame, _ in scene.frames(count):
+            writer.write(frame)
+    finally:
+        writer.release()
+    return path
+
+def build_tiny_model(path: str, model_cfg: str = "yolov8n.yaml", num_classes: Optional[int] = None) -> str:
+    """在本地按模型配置构建随机初始化的YOLO权重并保存，不下载任何预训练权重
+
+    Args:
+        path: 权重保存路径（.pt）
+        model_cfg: ultralytics 内置模型结构配置
+        num_classes: 类别数，默认为合成场景的类别数
+
+    Returns:
+        str: 权重路径
+    """
+    if os.path.exists(path):
+        return path
+
+    import torch
+    from ultralytics.nn.tasks import DetectionModel
+
+    model = DetectionModel(model_cfg, nc=num_classes or len(CLASS_NAMES), verbose=False)
+    model.names = {index: name for index, name in enumerate(CLASS_NAMES)}
+    model.args = {"imgsz": 640, "task": "detect"}
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    torch.save({"model": model, "train_args": {"task": "detect"}, "epoch": -1}, path)
+    return path
@@ -2,7 +2,7 @@
 分析服务配置
 """
 from pydantic_settings import BaseSettings
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from pydantic import BaseModel
 import os
 import yaml
@@ -75,6 +75,12 @@ class AnalysisServiceConfig(BaseSettings):
         url: str = "http://localhost:8003"
         api_prefix: str = "/api/v1"
     
+    # 模型下载配置
+    class ModelFetchConfig(BaseModel):
+        chunk_size: int = 1048576  # 流式下载分块大小（字节）
+        timeout: int = 600  # 单次下载超时时间（秒）
+        revalidate_interval: float = 300.0  # 本地缓存向模型服务重新验证的间隔（秒），-1 表示不重新验证
+    
     # 分析配置
     class AnalysisConfig(BaseModel):
         confidence: float = 0.1
@@ -86,6 +92,186 @@ class AnalysisServiceConfig(BaseSettings):
         random_interval: List[int] = [0, 0]
         push_interval: int = 1
     
+    # 推理后端配置
+    class InferenceConfig(BaseModel):
+        backend: str = "torch"  # 推理后端: torch, onnx, openvino
+        model_backends: Dict[str, str] = {}  # 模型级后端覆盖，例如 {"model-gcc": "torch"}
+        imgsz: int = 640  # 导出模型的输入尺寸
+        self_test: bool = True  # 加载导出模型时与PyTorch结果做一致性自检
+        self_test_conf: float = 0.05  # 自检使用的置信度阈值
+        self_test_iou: float = 0.8  # 自检判定检测框一致的IoU阈值
+        self_test_min_agreement: float = 0.9  # 参考模型有检测框时，自检通过所需的最低一致率
+        self_test_box_tolerance: float = 0.01  # 原始输出框坐标最大偏差（相对输入尺寸）
+        self_test_score_tolerance: float = 0.02  # 原始输出类别分数最大偏差
+    
+    # 模型预加载配置
+    class PreloadConfig(BaseModel):
+        enabled: bool = True  # 启动时是否预加载模型
+        model_codes: List[str] = []  # 需要预加载的模型代码
+        from_redis: bool = True  # 同时预加载Redis中待恢复任务使用的模型
+        warmup_runs: int = 2  # 每个模型的预热推理次数
+        imgsz: Optional[int] = None  # 预热输入尺寸，默认使用INFERENCE.imgsz
+        concurrency: int = 1  # 并发预加载的模型数
+    
+    # 运动门控配置
+    class MotionGateConfig(BaseModel):
+        enabled: bool = False  # 是否启用运动门控
+        method: str = "diff"  # 运动评估方式: diff-帧差, mog2-背景建模
+        downscale_width: int = 160  # 降采样宽度（像素）
+        pixel_threshold: int = 25  # 像素灰度差阈值
+        motion_ratio: float = 0.002  # 变化像素占比阈值
+        max_skip_duration: float = 30.0  # 最长跳过时长（秒）
+        blur_size: int = 5  # 高斯模糊核大小
+        use_roi: bool = True  # 是否只统计ROI内的运动
+    
+    # 视频采样配置
+    class VideoSamplingConfig(BaseModel):
+        policy: str = "fixed"  # 采样策略: fixed, target_fps, scene_change, densify
+        frame_interval: int = 3  # fixed策略: 每N帧分析一次
+        target_fps: float = 5.0  # target_fps策略: 目标分析帧率
+        probe_fps: float = 5.0  # scene_change策略: 探测帧率
+        scene_threshold: float = 0.3  # scene_change策略: 直方图距离阈值(0-1)
+        min_interval: float = 0.2  # scene_change策略: 最短分析间隔（秒）
+        max_interval: float = 5.0  # scene_change策略: 最长分析间隔（秒）
+        sparse_fps: float = 1.0  # densify策略: 无目标时的分析帧率
+        dense_fps: float = 10.0  # densify策略: 有目标时的分析帧率
+        hold_seconds: float = 2.0  # densify策略: 目标消失后保持密集采样的时长（秒）
+    
+    # 图片分析流水线配置
+    class ImagePipelineConfig(BaseModel):
+        max_connections: int = 32  # HTTP连接池大小
+        download_concurrency: int = 8  # 同时下载的图片数
+        download_timeout: int = 30  # 单张图片下载超时（秒）
+        decode_workers: int = 4  # 解码线程数
+        batch_size: int = 8  # 单次推理的图片数
+        reduced_decode: bool = True  # 推理尺寸较小时按1/2、1/4、1/8分辨率解码JPEG
+    
+    # 报警事件去重配置
+    class EventsConfig(BaseModel):
+        callback_mode: str = "all"  # 回调模式: all-按推送/报警间隔回调, change-仅在目标变化时回调
+        match_iou: float = 0.3  # 无跟踪ID时同类别目标的位置匹配IoU阈值
+        leave_timeout: float = 5.0  # 目标连续消失超过该时长（秒）判定离开
+        realarm: bool = True  # 目标持续存在超过报警间隔后是否再次报警
+        heartbeat_interval: float = 60.0  # change模式下画面无变化时的心跳间隔（秒）
+    
+    # 服务质量(QoS)控制配置
+    class QoSConfig(BaseModel):
+        enabled: bool = True
+        evaluate_interval: float = 5.0  # 评估周期（秒）
+        cpu_high: float = 90.0  # CPU使用率超过该值视为过载（%）
+        cpu_low: float = 60.0  # CPU使用率低于该值视为空闲（%）
+        latency_high_ms: float = 500.0  # 流平均推理耗时超过该值视为过载
+        latency_low_ms: float = 200.0  # 所有流平均推理耗时低于该值才允许恢复
+        lag_high_ratio: float = 0.5  # 分析滞后超过分析间隔的该比例视为过载
+        restore_after: int = 3  # 连续空闲多少个评估周期后恢复一级
+        max_level: int = 4  # 最大降级等级
+        interval_factor: float = 1.5  # 每降一级分析间隔乘以该系数
+        max_interval: float = 10.0  # 降级后的最大分析间隔（秒）
+        imgsz_steps: List[int] = [512, 416, 320]  # 逐级降低的推理尺寸
+        min_imgsz: int = 320  # 最小推理尺寸
+        default_priority: int = 0  # 流默认优先级，数值越大越晚降级
+        history_size: int = 20  # 任务记录中保留的调整次数
+    
+    # 资源采样配置
+    class ResourceSamplerConfig(BaseModel):
+        interval: float = 2.0  # 采样周期（秒）
+        history_size: int = 150  # 滚动历史保留的采样数
+    
+    # 流水线指标配置
+    class MetricsConfig(BaseModel):
+        enabled: bool = True  # 是否提供 /metrics 接口
+        per_task: bool = True  # 是否按任务区分序列，关闭后只按模型统计
+        buckets: List[float] = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0]  # 耗时直方图分桶（秒）
+    
+    # 帧新鲜度配置
+    class FreshnessConfig(BaseModel):
+        max_age: float = 0.0  # 最大帧龄（秒），超过后不再推送普通结果（报警照常），0表示不限制
+        window_size: int = 500  # 参与分位数统计的最近帧数
+    
+    # 运维接口配置
+    class AdminConfig(BaseModel):
+        token: str = ""  # 运维令牌（请求头 X-Admin-Token），为空时运维接口禁用
+        max_profile_seconds: float = 60.0  # 单次采样剖析最长时长（秒）
+        sample_interval: float = 0.005  # 默认采样间隔（秒）
+        tracemalloc_frames: int = 10  # tracemalloc 记录的栈深度
+    
+    # 录制回放配置
+    class ReplayConfig(BaseModel):
+        enabled: bool = True  # 是否允许流分析任务使用 replay:// 地址
+        root_dir: str = "data/recordings"  # 录制根目录，回放只能读取该目录下的录制
+        segment_frames: int = 1000  # 每个分段文件的帧数
+        jpeg_quality: int = 90  # 录制JPEG质量
+    
+    # 取流中心配置
+    class StreamHubConfig(BaseModel):
+        reopen_delay: float = 2.0  # 断流后重连前等待时间(秒)
+        read_timeout: float = 5.0  # 任务等待下一帧的超时时间(秒)
+    
+    # 多模型分析配置
+    class MultiModelConfig(BaseModel):
+        max_models: int = 4  # 单个流分析任务最多同时运行的模型数
+        cascade_imgsz: int = 320  # 级联二级模型默认推理尺寸
+        cascade_padding: float = 0.1  # 级联裁剪时检测框外扩比例
+        cascade_min_size: int = 16  # 检测框短边小于该值(像素)时不做级联
+        cascade_max_crops: int = 16  # 每帧最多级联的检测框数
+    
+    # 多进程推理工作池配置
+    class WorkerPoolConfig(BaseModel):
+        enabled: bool = False  # 是否启用多进程推理（流分析推理由工作进程执行）
+        workers: int = 0  # 工作进程数，0为CPU核数的一半
+        torch_threads: int = 1  # 每个工作进程的Torch线程数
+        slots: int = 0  # 共享内存帧槽位数，0为工作进程数的4倍
+        max_frame_width: int = 1920  # 槽位可容纳的最大帧宽，更大的帧在主进程推理
+        max_frame_height: int = 1080  # 槽位可容纳的最大帧高
+        request_timeout: float = 10.0  # 单次推理超时(秒)
+    
+    # FFmpeg管道解码配置
+    class FFmpegConfig(BaseModel):
+        enabled: bool = False  # 是否默认使用ffmpeg解码（任务可用 decoder 覆盖），ffmpeg不可用时回退OpenCV
+        ffmpeg_path: str = "ffmpeg"  # ffmpeg可执行文件
+        ffprobe_path: str = "ffprobe"  # ffprobe可执行文件
+        probe_timeout: float = 10.0  # 读取流信息超时(秒)
+        fps_margin: float = 2.0  # 解码帧率为分析帧率的倍数
+        keyframe_max_fps: float = 1.0  # 分析帧率不高于该值时只解码关键帧
+        scale_margin: float = 1.5  # 解码长边为推理尺寸的倍数（只缩小不放大）
+        scale_flags: str = "area"  # scale滤镜插值算法
+    
+    # 关键帧快照模式配置
+    class SnapshotConfig(BaseModel):
+        enabled: bool = False  # 使用 ffmpeg 解码且分析间隔不低于 min_interval 的流是否自动使用快照模式
+        min_interval: float = 10.0  # 自动启用快照模式的最小分析间隔(秒)
+        warm_keep: str = "auto"  # 连接保温策略: auto-按实测开销决定, always-保持会话, never-每次分析后断开
+        latency_ratio: float = 0.5  # 重连耗时超过分析间隔的该比例时保持会话
+        idle_cpu_estimate: float = 0.05  # 会话空转CPU占用率初始估计(核)，实测后滑动更新
+        max_failures: int = 5  # 连续取帧失败次数达到该值时结束任务
+        executor_workers: int = 4  # 快照建连、取帧和断开使用的线程数
+    
+    # 预处理配置
+    class PreprocessConfig(BaseModel):
+        enabled: bool = True  # 是否使用letterbox预处理（保持长宽比，直接以张量输入模型）
+        rect: bool = True  # 是否只填充到stride整数倍（矩形输入，计算量更小）
+        stride: int = 32  # 模型步长
+    
+    # 切片推理配置
+    class TilingConfig(BaseModel):
+        enabled: bool = False
+        tile_size: int = 640  # 切片边长（像素），即切片推理分辨率
+        overlap: float = 0.2  # 相邻切片重叠比例
+        full_image_pass: bool = True  # 是否追加整图缩放推理以检出大目标
+        merge_metric: str = "ios"  # 跨切片合并度量: ios, iou
+        merge_threshold: float = 0.6  # 跨切片合并阈值
+        max_tiles: int = 64  # 单张图片最多切片数，超过时拒绝请求
+    
+    # 图片检测结果缓存配置
+    class ResultCacheConfig(BaseModel):
+        enabled: bool = True
+        memory_max_entries: int = 1024  # 内存LRU最大条目数
+        memory_ttl: int = 600  # 内存缓存有效期（秒）
+        redis_enabled: bool = True  # 是否启用Redis二级缓存
+        redis_ttl: int = 3600  # Redis缓存有效期（秒）
+        max_entry_bytes: int = 262144  # 单条结果序列化后的最大字节数，超过不缓存
+        url_validator_max_entries: int = 4096  # 记录ETag/Last-Modified的URL数上限
+    
     # 存储配置
     class StorageConfig(BaseModel):
         base_dir: str = "data"
@@ -116,7 +302,28 @@ class AnalysisServiceConfig(BaseSettings):
     # 配置实例
     SERVICE: ServiceConfig = ServiceConfig()
     MODEL_SERVICE: ModelServiceConfig = ModelServiceConfig()
+    MODEL_FETCH: ModelFetchConfig = ModelFetchConfig()
     ANALYSIS: AnalysisConfig = AnalysisConfig()
+    INFERENCE: InferenceConfig = InferenceConfig()
+    PRELOAD: PreloadConfig = PreloadConfig()
+    MOTION_GATE: MotionGateConfig = MotionGateConfig()
+    VIDEO_SAMPLING: VideoSamplingConfig = VideoSamplingConfig()
+    IMAGE_PIPELINE: ImagePipelineConfig = ImagePipelineConfig()
+    EVENTS: EventsConfig = EventsConfig()
+    QOS: QoSConfig = QoSConfig()
+    RESOURCE_SAMPLER: ResourceSamplerConfig = ResourceSamplerConfig()
+    METRICS: MetricsConfig = MetricsConfig()
+    FRESHNESS: FreshnessConfig = FreshnessConfig()
+    ADMIN: AdminConfig = AdminConfig()
+    REPLAY: ReplayConfig = ReplayConfig()
+    STREAM_HUB: StreamHubConfig = StreamHubConfig()
+    MULTI_MODEL: MultiModelConfig = MultiModelConfig()
+    WORKER_POOL: WorkerPoolConfig = WorkerPoolConfig()
+    FFMPEG: FFmpegConfig = FFmpegConfig()
+    SNAPSHOT: SnapshotConfig = SnapshotConfig()
+    PREPROCESS: PreprocessConfig = PreprocessConfig()
+    TILING: TilingConfig = TilingConfig()
+    RESULT_CACHE: ResultCacheConfig = ResultCacheConfig()
     STORAGE: StorageConfig = StorageConfig()
     OUTPUT: OutputConfig = OutputConfig()
     DISCOVERY: DiscoveryConfig = DiscoveryConfig()
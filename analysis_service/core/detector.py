@@ -10,7 +10,7 @@ import numpy as np
 import aiohttp
 import torch
 from ultralytics import YOLO
-from typing import List, Dict, Any, Optional, Union, Tuple
+from typing import Awaitable, Callable, List, Dict, Any, Optional, Union, Tuple
 from shared.utils.logger import setup_logger
 from core.config import settings
 import time
@@ -22,6 +22,25 @@ from loguru import logger
 import httpx
 import colorsys
 from core.tracker import create_tracker, BaseTracker
+from core.motion_gate import create_motion_gate
+from core.sampling import create_sampling_policy, SampleAction
+from core.inference_backend import InferenceBackendManager
+from core.model_fetcher import ModelFetcher
+from core.result_cache import DetectionResultCache
+from core.tiling import create_tiling_options, generate_tiles, merge_detections
+from core.image_decode import decode_image
+from core.preprocess import LetterboxPreprocessor
+from core.qos import QoSController
+from core.scheduler import StreamScheduler
+from core.events import create_event_deduplicator, EventType
+from core import metrics
+from core.freshness import FreshnessTracker
+from core.replay import ReplayCapture, is_replay_url
+from core.stream_hub import StreamHub
+from core.ffmpeg_capture import create_decoder_options, open_capture
+from core.snapshot import SnapshotSource, snapshot_mode_enabled
+from core.worker_pool import InferenceWorkerPool
+from core.multi_model import resolve_model_codes, create_cascade_options, tag_detections, cascade_crops
 from core.redis_manager import RedisManager
 from core.task_queue import TaskQueue, TaskStatus
 from core.exceptions import (
@@ -31,6 +50,7 @@ from core.exceptions import (
     ResourceNotFoundException
 )
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 
 logger = setup_logger(__name__)
 
@@ -153,6 +173,18 @@ class YOLODetector:
         self.tracker: Optional[BaseTracker] = None
         self.device = torch.device("cuda" if torch.cuda.is_available() and settings.ANALYSIS.device != "cpu" else "cpu")
         
+        # 推理后端与已加载模型缓存
+        self.backends = InferenceBackendManager(self.device)
+        self._models: Dict[str, Any] = {}
+        self._model_locks: Dict[str, asyncio.Lock] = {}
+        
+        # 图片流水线: 共享HTTP连接池与解码线程池
+        self._http_session: Optional[aiohttp.ClientSession] = None
+        self._decode_executor = ThreadPoolExecutor(
+            max_workers=settings.IMAGE_PIPELINE.decode_workers,
+            thread_name_prefix="ImageDecode"
+        )
+        
         # Redis相关
         self.redis = RedisManager()
         self.task_queue = TaskQueue()
@@ -160,6 +192,27 @@ class YOLODetector:
         # 模型服务配置
         self.model_service_url = settings.MODEL_SERVICE.url
         self.api_prefix = settings.MODEL_SERVICE.api_prefix
+        self.model_fetcher = ModelFetcher(self.model_service_url, self.api_prefix)
+        
+        # 节点级QoS控制器
+        self.qos = QoSController()
+        
+        # 节点级取流中心：同一流地址只建立一个连接，供多个任务共享
+        self.stream_hub = StreamHub(self._open_capture)
+        
+        # 多进程推理工作池（WORKER_POOL.enabled 时由服务启动时创建）
+        self.worker_pool: Optional[InferenceWorkerPool] = None
+        self._model_paths: Dict[str, str] = {}
+        self._model_versions: Dict[str, Optional[str]] = {}
+        
+        # 正在处理（排队下载、解码、推理）的图片数，供资源采样器统计推理队列深度
+        self.pending_images = 0
+        
+        # 图片分析共用的letterbox预处理器
+        self._image_preprocessors: Dict[Tuple, LetterboxPreprocessor] = {}
+        
+        # 图片检测结果缓存
+        self.result_cache = DetectionResultCache(self.redis)
         
         # 默认配置
         self.default_confidence = settings.ANALYSIS.confidence
@@ -192,68 +245,96 @@ class YOLODetector:
             Exception: 当模型下载或保存失败时抛出异常
         """
         try:
-            # 检查本地缓存
-            cache_dir = os.path.join("data", "models", model_code)
-            model_path = os.path.join(cache_dir, "best.pt")
-            
-            if os.path.exists(model_path):
-                logger.info(f"找到本地缓存模型: {model_path}")
-                return model_path
-            
-            # 本地不存在,从模型服务下载
-            logger.info(f"本地未找到模型 {model_code},准备从模型服务下载...")
-            
-            # 构建API URL
-            api_url = f"{self.model_service_url}{self.api_prefix}/models/download?code={model_code}"
-            logger.info(f"开始从模型服务下载: {api_url}")
-            
-            # 创建缓存目录
-            os.makedirs(cache_dir, exist_ok=True)
-            
-            try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(api_url) as response:
-                        if response.status == 200:
-                            # 保存模型文件
-                            with open(model_path, "wb") as f:
-                                f.write(await response.read())
-                            logger.info(f"模型下载成功并保存到: {model_path}")
-                            return model_path
-                        else:
-                            error_msg = await response.text()
-                            raise Exception(f"模型下载失败: HTTP {response.status} - {error_msg}")
-                            
-            except aiohttp.ClientError as e:
-                raise Exception(f"请求模型服务失败: {str(e)}")
+            # 流式下载、校验并原子替换，同一模型的并发请求只下载一次
+            return await self.model_fetcher.fetch(model_code)
             
         except Exception as e:
             logger.error(f"获取模型路径时出错: {str(e)}")
             raise Exception(f"获取模型失败: {str(e)}")
 
-    async def load_model(self, model_code: str):
-        """加载模型"""
-        try:
+    async def get_model(self, model_code: str, on_loaded: Optional[Callable[[Any], Awaitable[None]]] = None):
+        """获取已加载的模型，未加载时按配置的推理后端加载并缓存
+        
+        已加载的模型到了重新验证时间时向模型服务确认版本，模型已更新则重新加载
+        
+        Args:
+            model_code: 模型代码
+            on_loaded: 新加载的模型发布到模型缓存之前执行的回调（例如预热），模型已加载时不调用
+            
+        Returns:
+            模型对象，调用方式与ultralytics YOLO一致
+        """
+        model = self._models.get(model_code)
+        if model is not None and not self.model_fetcher.revalidation_due(model_code):
+            return model
+        
+        lock = self._model_locks.setdefault(model_code, asyncio.Lock())
+        async with lock:
+            model = self._models.get(model_code)
+            if model is not None and not self.model_fetcher.revalidation_due(model_code):
+                return model
+            
             # 获取模型路径
             model_path = await self.get_model_path(model_code)
+            version = self.model_fetcher.get_version(model_code)
+            if model is not None and version == self._model_versions.get(model_code):
+                return model
+            self._model_paths[model_code] = model_path
             logger.info(f"Loading model from: {model_path}")
             
-            # 加载模型
-            self.model = YOLO(model_path)
-            self.model.to(self.device)
+            # 导出和加载为CPU密集操作，放到线程池执行
+            loop = asyncio.get_running_loop()
+            model = await loop.run_in_executor(None, self.backends.load, model_code, model_path)
             
             # 设置模型参数
-            self.model.conf = self.default_confidence
-            self.model.iou = self.default_iou
-            self.model.max_det = self.default_max_det
+            model.conf = self.default_confidence
+            model.iou = self.default_iou
+            model.max_det = self.default_max_det
+            
+            if on_loaded is not None:
+                await on_loaded(model)
             
-            logger.info(f"Model loaded successfully from {model_path}")
+            self._models[model_code] = model
+            self._model_versions[model_code] = version
+            logger.info(f"Model loaded successfully from {model_path}, backend: {self.backends.status.get(model_code, {}).get('backend')}")
+            return model
+
+    async def load_model(self, model_code: str):
+        """加载模型"""
+        try:
+            self.model = await self.get_model(model_code)
+            self.current_model_code = model_code
             
         except Exception as e:
             logger.error(f"Failed to load model: {str(e)}")
             raise
 
-    async def _download_image(self, url: str) -> Optional[np.ndarray]:
-        """下载图片并转换为 numpy 数组
+    def start_worker_pool(self):
+        """启动多进程推理工作池，流分析推理改由工作进程执行"""
+        if self.worker_pool is None and settings.WORKER_POOL.enabled:
+            self.worker_pool = InferenceWorkerPool(device=str(self.device))
+            self.worker_pool.start()
+
+    async def _get_http_session(self) -> aiohttp.ClientSession:
+        """获取共享的HTTP会话（连接池复用）"""
+        if self._http_session is None or self._http_session.closed:
+            connector = aiohttp.TCPConnector(limit=settings.IMAGE_PIPELINE.max_connections)
+            timeout = aiohttp.ClientTimeout(total=settings.IMAGE_PIPELINE.download_timeout)
+            self._http_session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self._http_session
+
+    async def close(self):
+        """释放检测器持有的连接池和线程池"""
+        if self._http_session is not None and not self._http_session.closed:
+            await self._http_session.close()
+        self._decode_executor.shutdown(wait=False)
+        self.stream_hub.close()
+        if self.worker_pool is not None:
+            await self.worker_pool.stop()
+        await self.qos.stop()
+
+    async def _fetch_image_bytes(self, url: str) -> Optional[bytes]:
+        """获取图片的原始字节
         
         支持以下格式：
         - HTTP/HTTPS URL
@@ -266,48 +347,22 @@ class YOLODetector:
                 try:
                     # 提取实际的 base64 数据
                     base64_data = url.split(',')[1]
-                    image_data = base64.b64decode(base64_data)
-                    nparr = np.frombuffer(image_data, np.uint8)
-                    img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-                    if img is None:
-                        logger.error(f"Failed to decode base64 image data")
-                        return None
-                    return img
+                    return base64.b64decode(base64_data)
                 except Exception as e:
                     logger.error(f"Error processing base64 image: {str(e)}")
                     return None
 
             # 处理 HTTP/HTTPS URL
             elif url.startswith(('http://', 'https://')):
-                try:
-                    async with aiohttp.ClientSession() as session:
-                        async with session.get(url) as response:
-                            if response.status == 200:
-                                image_data = await response.read()
-                                nparr = np.frombuffer(image_data, np.uint8)
-                                img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-                                if img is None:
-                                    logger.error(f"Failed to decode image from URL: {url}")
-                                    return None
-                                return img
-                            else:
-                                logger.error(f"Failed to download image from URL: {url}, status: {response.status}")
-                                return None
-                except Exception as e:
-                    logger.error(f"Error downloading image from URL {url}: {str(e)}")
-                    return None
+                _, data, _ = await self._fetch_http_image(url)
+                return data
 
             # 处理 Blob URL
             elif url.startswith('blob:'):
-                try:
-                    # 从请求中获取 blob 数据
-                    # 注意：这里需要前端将 blob 数据转换为 base64 或直接上传文件
-                    # 因为后端无法直接访问浏览器的 blob URL
-                    logger.error(f"Blob URL is not supported directly. Please convert to base64 or upload file: {url}")
-                    return None
-                except Exception as e:
-                    logger.error(f"Error processing blob URL {url}: {str(e)}")
-                    return None
+                # 注意：这里需要前端将 blob 数据转换为 base64 或直接上传文件
+                # 因为后端无法直接访问浏览器的 blob URL
+                logger.error(f"Blob URL is not supported directly. Please convert to base64 or upload file: {url}")
+                return None
 
             else:
                 logger.error(f"Unsupported image URL format: {url}")
@@ -317,6 +372,67 @@ class YOLODetector:
             logger.error(f"Unexpected error processing image {url}: {str(e)}")
             return None
 
+    async def _fetch_http_image(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None
+    ) -> Tuple[int, Optional[bytes], Dict[str, str]]:
+        """通过共享连接池下载HTTP图片
+        
+        Args:
+            url: 图片URL
+            headers: 附加请求头（如条件请求的 If-None-Match）
+            
+        Returns:
+            Tuple[int, Optional[bytes], Dict[str, str]]: 状态码（请求异常时为0）、
+                图片字节（仅200时有值）和响应头
+        """
+        try:
+            session = await self._get_http_session()
+            async with session.get(url, headers=headers) as response:
+                if response.status == 200:
+                    return response.status, await response.read(), dict(response.headers)
+                if response.status != 304:
+                    logger.error(f"Failed to download image from URL: {url}, status: {response.status}")
+                return response.status, None, dict(response.headers)
+        except Exception as e:
+            logger.error(f"Error downloading image from URL {url}: {str(e)}")
+            return 0, None, {}
+
+    @staticmethod
+    def _decode_image_bytes(image_data: bytes) -> Optional[np.ndarray]:
+        """解码图片字节为BGR数组（CPU密集，应在线程池中调用）"""
+        return decode_image(image_data)[0]
+
+    @staticmethod
+    def _scale_detections(detections: List[Dict[str, Any]], factor: float):
+        """将降分辨率解码图片上的检测坐标还原到原图像素坐标（原地修改）"""
+        seen = set()
+        stack = list(detections)
+        while stack:
+            det = stack.pop()
+            # 嵌套检测中同一子目标可能挂在多个父目标下，只缩放一次
+            if id(det) in seen:
+                continue
+            seen.add(id(det))
+            for key in ('x1', 'y1', 'x2', 'y2'):
+                det['bbox'][key] *= factor
+            if 'area' in det:
+                det['area'] *= factor * factor
+            stack.extend(det.get('children') or [])
+
+    async def _download_image(self, url: str) -> Optional[np.ndarray]:
+        """下载图片并转换为 numpy 数组"""
+        image_data = await self._fetch_image_bytes(url)
+        if image_data is None:
+            return None
+        
+        loop = asyncio.get_running_loop()
+        img = await loop.run_in_executor(self._decode_executor, self._decode_image_bytes, image_data)
+        if img is None:
+            logger.error(f"Failed to decode image: {url[:100]}")
+        return img
+
     def _get_color_by_id(self, track_id: int) -> Tuple[int, int, int]:
         """根据跟踪ID生成固定的颜色
         
@@ -530,7 +646,235 @@ class YOLODetector:
             logger.error(f"处理结果图片失败: {str(e)}", exc_info=True)
             return None
 
-    async def detect(self, image, config: Optional[Dict] = None) -> List[Dict[str, Any]]:
+    def _resolve_detection_params(self, config: Dict) -> Tuple[float, float, Optional[List[int]]]:
+        """解析置信度、IoU和类别参数"""
+        conf = config.get('confidence', self.default_confidence)
+        iou = config.get('iou', self.default_iou)
+        
+        # 确保置信度和IoU阈值有效
+        if conf is None:
+            conf = self.default_confidence
+        if iou is None:
+            iou = self.default_iou
+        return conf, iou, config.get('classes', None)
+
+    def _crop_roi(self, image: np.ndarray, config: Dict) -> Tuple[np.ndarray, Dict[str, float]]:
+        """按矩形ROI裁剪图片，返回裁剪结果及坐标还原参数"""
+        roi = config.get('roi', None)
+        transform = {"offset_x": 0.0, "offset_y": 0.0, "scale_x": 1.0, "scale_y": 1.0, "pad_x": 0.0, "pad_y": 0.0}
+        
+        # 处理ROI（仅矩形坐标参与裁剪）
+        if roi and all(k in roi for k in ('x1', 'y1', 'x2', 'y2')):
+            h, w = image.shape[:2]
+            x1 = int(roi['x1'] * w)
+            y1 = int(roi['y1'] * h)
+            x2 = int(roi['x2'] * w)
+            y2 = int(roi['y2'] * h)
+            image = image[y1:y2, x1:x2]
+            transform["offset_x"] = float(x1)
+            transform["offset_y"] = float(y1)
+        
+        return image, transform
+
+    @staticmethod
+    def _filter_detections_by_roi(
+        detections: List[Dict[str, Any]],
+        config: Dict,
+        width: int,
+        height: int
+    ) -> List[Dict[str, Any]]:
+        """按ROI过滤检测结果（以检测框中心判定）
+        
+        Args:
+            detections: 检测结果（原图像素坐标 x1/y1/x2/y2）
+            config: 检测配置，roi_type 1-矩形 2-多边形 3-线段，roi 坐标为0-1归一化值
+            width: 原图宽度
+            height: 原图高度
+        """
+        roi_type = config.get("roi_type", 0)
+        roi = config.get("roi")
+        if not roi or not roi_type or not detections:
+            return detections
+        
+        def center(det):
+            bbox = det["bbox"]
+            return (bbox["x1"] + bbox["x2"]) / 2, (bbox["y1"] + bbox["y2"]) / 2
+        
+        # 矩形ROI：中心点在矩形内
+        if roi_type == 1 and all(k in roi for k in ("x1", "y1", "x2", "y2")):
+            x1_px, y1_px = roi["x1"] * width, roi["y1"] * height
+            x2_px, y2_px = roi["x2"] * width, roi["y2"] * height
+            return [det for det in detections if x1_px <= center(det)[0] <= x2_px and y1_px <= center(det)[1] <= y2_px]
+        
+        # 多边形ROI：中心点在多边形内或边界上
+        if roi_type == 2 and "points" in roi:
+            points_array = np.array(
+                [(int(p[0] * width), int(p[1] * height)) for p in roi["points"]], np.int32
+            ).reshape((-1, 1, 2))
+            return [
+                det for det in detections
+                if cv2.pointPolygonTest(points_array, tuple(float(v) for v in center(det)), False) >= 0
+            ]
+        
+        # 线段ROI：中心点到线段的距离小于检测框平均边长的一半，视为与线段相交
+        if roi_type == 3 and "points" in roi and len(roi["points"]) == 2:
+            (sx, sy), (ex, ey) = [(p[0] * width, p[1] * height) for p in roi["points"]]
+            line_vec = np.array([ex - sx, ey - sy])
+            line_length = float(np.linalg.norm(line_vec))
+            filtered = []
+            for det in detections:
+                cx, cy = center(det)
+                point_vec = np.array([cx - sx, cy - sy])
+                projection = float(np.dot(point_vec, line_vec)) / line_length if line_length else 0.0
+                if projection <= 0:
+                    distance = float(np.linalg.norm(point_vec))
+                elif projection >= line_length:
+                    distance = float(np.hypot(cx - ex, cy - ey))
+                else:
+                    distance = abs(float(line_vec[0] * point_vec[1] - line_vec[1] * point_vec[0])) / line_length
+                bbox = det["bbox"]
+                threshold = ((bbox["x2"] - bbox["x1"]) + (bbox["y2"] - bbox["y1"])) / 4
+                if distance < threshold:
+                    filtered.append(det)
+            return filtered
+        
+        return detections
+
+    def _prepare_detection_input(self, image: np.ndarray, config: Dict) -> Tuple[np.ndarray, Dict[str, float]]:
+        """按ROI裁剪并缩放图片，返回模型输入及坐标还原参数（未启用letterbox预处理时使用）
+        
+        Returns:
+            Tuple[np.ndarray, Dict[str, float]]: 模型输入图片，以及
+                offset_x/offset_y（裁剪偏移）和 scale_x/scale_y（缩放比例）
+        """
+        image, transform = self._crop_roi(image, config)
+        imgsz = config.get('imgsz', None)
+        
+        # 处理图片大小
+        if imgsz:
+            h, w = image.shape[:2]
+            image = cv2.resize(image, (imgsz, imgsz))
+            transform["scale_x"] = imgsz / float(w)
+            transform["scale_y"] = imgsz / float(h)
+        
+        return image, transform
+
+    def _create_preprocessor(self, model_code: Optional[str], config: Dict) -> Optional[LetterboxPreprocessor]:
+        """创建letterbox预处理器，未启用时返回None
+        
+        导出格式模型的输入尺寸在导出时固定，只能使用 INFERENCE.imgsz 的正方形输入
+        """
+        if not settings.PREPROCESS.enabled:
+            return None
+        
+        backend = self.backends.status.get(model_code, {}).get('backend', 'torch')
+        if backend != 'torch':
+            return LetterboxPreprocessor(settings.INFERENCE.imgsz, settings.PREPROCESS.stride, auto=False)
+        return LetterboxPreprocessor(
+            config.get('imgsz') or settings.INFERENCE.imgsz,
+            settings.PREPROCESS.stride,
+            auto=settings.PREPROCESS.rect,
+            device=self.device
+        )
+
+    def _get_image_preprocessor(self, model_code: Optional[str], config: Dict) -> Optional[LetterboxPreprocessor]:
+        """获取图片分析共用的预处理器（按输入尺寸和后端复用缓冲区）"""
+        preprocessor = self._create_preprocessor(model_code, config)
+        if preprocessor is None:
+            return None
+        key = (preprocessor.imgsz, preprocessor.auto, preprocessor.device.type)
+        return self._image_preprocessors.setdefault(key, preprocessor)
+
+    @staticmethod
+    def _apply_letterbox(transforms: List[Dict[str, float]], letterbox_info: List[Dict[str, float]]):
+        """将letterbox的缩放比例和填充写入坐标还原参数"""
+        for transform, info in zip(transforms, letterbox_info):
+            transform["scale_x"] = transform["scale_y"] = info["ratio"]
+            transform["pad_x"] = info["pad_x"]
+            transform["pad_y"] = info["pad_y"]
+
+    def _parse_detection_result(self, result, transform: Dict[str, float]) -> List[Dict[str, Any]]:
+        """将单张图片的推理结果转换为检测字典，坐标还原到原图像素坐标"""
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            return []
+        data = np.column_stack([boxes.xyxy.cpu().numpy(), boxes.conf.cpu().numpy(), boxes.cls.cpu().numpy()])
+        return self._detections_from_array(data, result.names, transform)
+
+    @staticmethod
+    def _detections_from_array(data: np.ndarray, names: Dict[int, str], transform: Dict[str, float]) -> List[Dict[str, Any]]:
+        """将检测数组 (N, 6): x1, y1, x2, y2, conf, cls 转换为检测字典，坐标还原到原图像素坐标"""
+        detections = []
+        if data is None or len(data) == 0:
+            return detections
+        
+        xyxy = data[:, :4].astype(np.float64)
+        confs = data[:, 4]
+        clss = data[:, 5].astype(int)
+        
+        # 先去除letterbox填充、还原缩放，再加上ROI裁剪偏移
+        xyxy[:, [0, 2]] = (xyxy[:, [0, 2]] - transform.get("pad_x", 0.0)) / transform["scale_x"] + transform["offset_x"]
+        xyxy[:, [1, 3]] = (xyxy[:, [1, 3]] - transform.get("pad_y", 0.0)) / transform["scale_y"] + transform["offset_y"]
+        
+        for bbox, conf, cls in zip(xyxy, confs, clss):
+            detection = {
+                "bbox": {
+                    "x1": float(bbox[0]),
+                    "y1": float(bbox[1]),
+                    "x2": float(bbox[2]),
+                    "y2": float(bbox[3])
+                },
+                "confidence": float(conf),
+                "class_id": int(cls),
+                "class_name": names.get(int(cls), str(int(cls))),
+                "area": float((bbox[2] - bbox[0]) * (bbox[3] - bbox[1])),  # 计算面积
+                "parent_idx": None,  # 用于存储父目标的索引
+                "children": []  # 用于存储子目标列表
+            }
+            detections.append(detection)
+        
+        return detections
+
+    def _build_nested_detections(self, detections: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """处理嵌套检测，将被包含的目标挂到父目标的children下"""
+        if len(detections) <= 1:
+            return detections
+        
+        logger.info("开始处理嵌套检测...")
+        
+        # 按面积从大到小排序
+        detections.sort(key=lambda x: x['area'], reverse=True)
+        
+        # 检查嵌套关系
+        for i, parent in enumerate(detections):
+            parent_bbox = parent['bbox']
+            
+            # 检查其他目标是否在当前目标内部
+            for j, child in enumerate(detections):
+                if i != j:  # 不与自己比较
+                    child_bbox = child['bbox']
+                    
+                    # 计算重叠区域
+                    overlap_x1 = max(parent_bbox['x1'], child_bbox['x1'])
+                    overlap_y1 = max(parent_bbox['y1'], child_bbox['y1'])
+                    overlap_x2 = min(parent_bbox['x2'], child_bbox['x2'])
+                    overlap_y2 = min(parent_bbox['y2'], child_bbox['y2'])
+                    
+                    # 如果有重叠
+                    if overlap_x1 < overlap_x2 and overlap_y1 < overlap_y2:
+                        # 计算重叠区域面积
+                        overlap_area = (overlap_x2 - overlap_x1) * (overlap_y2 - overlap_y1)
+                        child_area = (child_bbox['x2'] - child_bbox['x1']) * (child_bbox['y2'] - child_bbox['y1'])
+                        
+                        # 如果子目标的90%以上区域在父目标内部
+                        if child_area > 0 and overlap_area / child_area > 0.9:
+                            child['parent_idx'] = i
+                            parent['children'].append(child)
+        
+        # 只保留没有父目标的检测结果
+        return [det for det in detections if det['parent_idx'] is None]
+
+    async def detect(self, image, config: Optional[Dict] = None, model_code: Optional[str] = None) -> List[Dict[str, Any]]:
         """执行检测
         
         Args:
@@ -542,130 +886,157 @@ class YOLODetector:
                 - roi: 感兴趣区域，格式为{x1, y1, x2, y2}，值为0-1的归一化坐标
                 - imgsz: 输入图片大小
                 - nested_detection: 是否进行嵌套检测
+            model_code: 模型代码，默认为最近加载的模型
+        """
+        results = await self.detect_batch([image], config=config, model_code=model_code)
+        return results[0]
+
+    async def detect_batch(
+        self,
+        images: List[np.ndarray],
+        config: Optional[Dict] = None,
+        model_code: Optional[str] = None,
+        allow_tiling: bool = False
+    ) -> List[List[Dict[str, Any]]]:
+        """批量执行检测，返回与输入顺序一致的检测结果列表
+        
+        Args:
+            images: 输入图片列表
+            config: 检测配置，参数同 detect
+            model_code: 模型代码，默认为最近加载的模型
+            allow_tiling: 是否按 TILING / 任务 tiling 配置切片推理，仅图片分析流水线启用，视频逐帧检测不切片
         """
         try:
-            if self.model is None:
-                model_code = self.current_model_code
-                if not model_code:
-                    raise Exception("No model code specified")
-                await self.load_model(model_code)
+            # 按模型代码取模型引用，不使用共享的 self.model，避免并发请求加载其他模型后串用
+            model_code = model_code or self.current_model_code
+            if not model_code:
+                raise Exception("No model code specified")
+            model = await self.get_model(model_code)
             
             # 使用配置参数或默认值
             config = config or {}
-            conf = config.get('confidence', self.default_confidence)
-            iou = config.get('iou', self.default_iou)
-            classes = config.get('classes', None)
-            roi = config.get('roi', None)
-            imgsz = config.get('imgsz', None)
+            conf, iou, classes = self._resolve_detection_params(config)
             nested_detection = config.get('nested_detection', False)
             
-            # 确保置信度和IoU阈值有效
-            if conf is None:
-                conf = self.default_confidence
-            if iou is None:
-                iou = self.default_iou
-                
-            logger.info(f"检测配置 - 置信度: {conf}, IoU: {iou}, 类别: {classes}, ROI: {roi}, 图片大小: {imgsz}, 嵌套检测: {nested_detection}")
-            
-            # 处理ROI
-            original_shape = None
-            if roi:
-                h, w = image.shape[:2]
-                original_shape = (h, w)
-                x1 = int(roi['x1'] * w)
-                y1 = int(roi['y1'] * h)
-                x2 = int(roi['x2'] * w)
-                y2 = int(roi['y2'] * h)
-                image = image[y1:y2, x1:x2]
-            
-            # 处理图片大小
-            if imgsz:
-                image = cv2.resize(image, (imgsz, imgsz))
-            
-            # 执行推理
-            results = self.model(
-                image,
-                conf=conf,
-                iou=iou,
-                classes=classes
+            logger.info(
+                f"检测配置 - 置信度: {conf}, IoU: {iou}, 类别: {classes}, ROI: {config.get('roi')}, "
+                f"图片大小: {config.get('imgsz')}, 嵌套检测: {nested_detection}, 图片数: {len(images)}"
             )
             
-            # 处理检测结果
-            detections = []
-            for result in results:
-                boxes = result.boxes
-                for box in boxes:
-                    bbox = box.xyxy[0].cpu().numpy()
-                    conf = float(box.conf[0])
-                    cls = int(box.cls[0])
-                    name = result.names[cls]
-                    
-                    # 如果使用了ROI，需要调整坐标
-                    if roi and original_shape:
-                        h, w = original_shape
-                        bbox[0] = bbox[0] / w * (roi['x2'] - roi['x1']) * w + roi['x1'] * w
-                        bbox[1] = bbox[1] / h * (roi['y2'] - roi['y1']) * h + roi['y1'] * h
-                        bbox[2] = bbox[2] / w * (roi['x2'] - roi['x1']) * w + roi['x1'] * w
-                        bbox[3] = bbox[3] / h * (roi['y2'] - roi['y1']) * h + roi['y1'] * h
-                    
-                    detection = {
-                        "bbox": {
-                            "x1": float(bbox[0]),
-                            "y1": float(bbox[1]),
-                            "x2": float(bbox[2]),
-                            "y2": float(bbox[3])
-                        },
-                        "confidence": conf,
-                        "class_id": cls,
-                        "class_name": name,
-                        "area": float((bbox[2] - bbox[0]) * (bbox[3] - bbox[1])),  # 计算面积
-                        "parent_idx": None,  # 用于存储父目标的索引
-                        "children": []  # 用于存储子目标列表
-                    }
-                    detections.append(detection)
-            
-            # 处理嵌套检测
-            if nested_detection and len(detections) > 1:
-                logger.info("开始处理嵌套检测...")
+            tiling = create_tiling_options(config) if allow_tiling else None
+            backend = self.backends.status.get(model_code, {}).get("backend", "torch")
+            if tiling and backend != "torch" and tiling['tile_size'] != settings.INFERENCE.imgsz:
+                # 导出格式模型的输入尺寸固定为 INFERENCE.imgsz，切片尺寸随之调整
+                logger.warning(
+                    f"模型 {model_code} 使用固定输入尺寸的导出后端，切片尺寸 {tiling['tile_size']} "
+                    f"调整为 {settings.INFERENCE.imgsz}"
+                )
+                tiling = {**tiling, 'tile_size': settings.INFERENCE.imgsz}
+            all_detections: List[Optional[List[Dict[str, Any]]]] = [None] * len(images)
+            
+            preprocessor = self._get_image_preprocessor(model_code, config)
+            
+            # 启用切片且图片大于切片尺寸时走切片推理，其余图片按批次整图推理
+            pending = []
+            for index, image in enumerate(images):
+                if tiling and max(image.shape[:2]) > tiling['tile_size']:
+                    all_detections[index] = self._detect_tiled(model, image, config, tiling, conf, iou, classes)
+                elif preprocessor is not None:
+                    pending.append((index, *self._crop_roi(image, config)))
+                else:
+                    pending.append((index, *self._prepare_detection_input(image, config)))
+            
+            batch_size = max(1, settings.IMAGE_PIPELINE.batch_size)
+            for start in range(0, len(pending), batch_size):
+                chunk = pending[start:start + batch_size]
                 
-                # 按面积从大到小排序
-                detections.sort(key=lambda x: x['area'], reverse=True)
+                if preprocessor is not None:
+                    model_input, letterbox_info = preprocessor.prepare([item[1] for item in chunk])
+                    self._apply_letterbox([item[2] for item in chunk], letterbox_info)
+                else:
+                    model_input = [item[1] for item in chunk]
                 
-                # 检查嵌套关系
-                for i, parent in enumerate(detections):
-                    parent_bbox = parent['bbox']
-                    
-                    # 检查其他目标是否在当前目标内部
-                    for j, child in enumerate(detections):
-                        if i != j:  # 不与自己比较
-                            child_bbox = child['bbox']
-                            
-                            # 计算重叠区域
-                            overlap_x1 = max(parent_bbox['x1'], child_bbox['x1'])
-                            overlap_y1 = max(parent_bbox['y1'], child_bbox['y1'])
-                            overlap_x2 = min(parent_bbox['x2'], child_bbox['x2'])
-                            overlap_y2 = min(parent_bbox['y2'], child_bbox['y2'])
-                            
-                            # 如果有重叠
-                            if overlap_x1 < overlap_x2 and overlap_y1 < overlap_y2:
-                                # 计算重叠区域面积
-                                overlap_area = (overlap_x2 - overlap_x1) * (overlap_y2 - overlap_y1)
-                                child_area = (child_bbox['x2'] - child_bbox['x1']) * (child_bbox['y2'] - child_bbox['y1'])
-                                
-                                # 如果子目标的90%以上区域在父目标内部
-                                if overlap_area / child_area > 0.9:
-                                    child['parent_idx'] = i
-                                    parent['children'].append(child)
+                # 执行推理，同一批次的图片一次前向完成
+                results = model(
+                    model_input,
+                    conf=conf,
+                    iou=iou,
+                    classes=classes,
+                    verbose=False
+                )
                 
-                # 只保留没有父目标的检测结果
-                detections = [det for det in detections if det['parent_idx'] is None]
+                for result, (index, _, transform) in zip(results, chunk):
+                    all_detections[index] = self._parse_detection_result(result, transform)
             
-            return detections
+            if nested_detection:
+                all_detections = [self._build_nested_detections(detections) for detections in all_detections]
+            
+            return all_detections
                     
         except Exception as e:
             logger.error(f"检测失败: {str(e)}", exc_info=True)
             raise
 
+    def _detect_tiled(
+        self,
+        model: Any,
+        image: np.ndarray,
+        config: Dict[str, Any],
+        tiling: Dict[str, Any],
+        conf: float,
+        iou: float,
+        classes: Optional[List[int]]
+    ) -> List[Dict[str, Any]]:
+        """切片推理：按模型原生分辨率切片后一次批量推理，跨切片NMS合并
+        
+        Args:
+            model: 模型
+            image: 原始图片
+            config: 检测配置（ROI仍然生效，imgsz由切片尺寸取代）
+            tiling: 切片配置
+            conf: 置信度阈值
+            iou: IoU阈值
+            classes: 类别过滤
+        """
+        image, transform = self._prepare_detection_input(image, {**config, 'imgsz': None})
+        h, w = image.shape[:2]
+        tile_size = tiling['tile_size']
+        tiles = generate_tiles(w, h, tile_size, tiling['overlap'])
+        if len(tiles) > settings.TILING.max_tiles:
+            raise InvalidInputException(
+                f"图片 {w}x{h} 按切片尺寸 {tile_size} 需要 {len(tiles)} 个切片，超过上限 {settings.TILING.max_tiles}"
+            )
+        
+        # 切片按批次推理，限制单次前向的显存/内存占用
+        batch_size = max(1, settings.IMAGE_PIPELINE.batch_size)
+        results = []
+        for start in range(0, len(tiles), batch_size):
+            results.extend(model(
+                [image[y1:y2, x1:x2] for x1, y1, x2, y2 in tiles[start:start + batch_size]],
+                imgsz=tile_size,
+                conf=conf,
+                iou=iou,
+                classes=classes,
+                verbose=False
+            ))
+        
+        detections = []
+        for result, (x1, y1, _, _) in zip(results, tiles):
+            tile_transform = dict(transform)
+            tile_transform['offset_x'] += x1
+            tile_transform['offset_y'] += y1
+            detections.extend(self._parse_detection_result(result, tile_transform))
+        
+        # 整图缩放推理补充切片放不下的大目标
+        if tiling['full_image_pass']:
+            results = model(image, imgsz=tile_size, conf=conf, iou=iou, classes=classes, verbose=False)
+            for result in results:
+                detections.extend(self._parse_detection_result(result, transform))
+        
+        merged = merge_detections(detections, tiling['merge_metric'], tiling['merge_threshold'])
+        logger.info(f"切片推理 - 图片: {w}x{h}, 切片数: {len(tiles)}, 合并前: {len(detections)}, 合并后: {len(merged)}")
+        return merged
+
     async def _save_result_image(self, image: np.ndarray, detections: List[Dict], task_name: Optional[str] = None) -> str:
         """保存带有检测结果的图片"""
         try:
@@ -712,11 +1083,16 @@ class YOLODetector:
         enable_callback: bool = True,
         save_result: bool = False
     ) -> Dict[str, Any]:
-        """检测图片"""
+        """检测图片
+        
+        分阶段流水线：有界并发下载 -> 线程池解码 -> 批量推理，
+        结果按输入顺序返回，并附带各阶段耗时
+        """
         if not model_code:
             raise ValueError("No model code specified")
             
         task_id = f"img_{int(time.time() * 1000)}"
+        self.pending_images += len(image_urls)
         try:
             # 初始化任务信息
             task_info = {
@@ -736,56 +1112,194 @@ class YOLODetector:
             # 保存任务信息到Redis
             await self.task_queue.add_task(task_info)
             
-            # 加载模型
-            await self.load_model(model_code)
+            # 加载模型（推理时按模型代码取模型引用）
+            await self.get_model(model_code)
             
+            config_dict = config.dict() if hasattr(config, 'dict') else (config or {})
+            pipeline_start = time.time()
+            loop = asyncio.get_running_loop()
+            semaphore = asyncio.Semaphore(max(1, settings.IMAGE_PIPELINE.download_concurrency))
+            
+            # 结果缓存: 键包含已加载模型的版本（get_model 按周期向模型服务重新验证，模型更新后重新加载），
+            # 模型更新后旧结果自动失效
+            cache = self.result_cache
+            model_version = self._model_versions.get(model_code) if cache.enabled else None
+            if model_version:
+                cache.check_model_version(model_code, model_version)
+            # 需要结果图时必须拿到图片本身，不能只凭304复用结果
+            need_image = is_base64 or save_result
+            
+            # 推理尺寸远小于原图时降分辨率解码JPEG；结果图和切片推理需要全分辨率
+            decode_target = None
+            if settings.IMAGE_PIPELINE.reduced_decode and not need_image and not create_tiling_options(config_dict):
+                decode_target = config_dict.get('imgsz') or settings.INFERENCE.imgsz
+            
+            async def load_image(url: str) -> Dict[str, Any]:
+                """下载并解码单张图片，命中结果缓存时跳过推理"""
+                item = {'image_url': url, 'image': None, 'timing': {}}
+                is_http = url.startswith(('http://', 'https://'))
+                stage_start = time.time()
+                
+                # 条件请求前预查的缓存结果，下载后内容未变时直接复用，每张图片只计入一次命中指标
+                prefetched = (None, None, None)
+                async with semaphore:
+                    if not (model_version and is_http):
+                        image_data = await self._fetch_image_bytes(url)
+                    else:
+                        headers = None
+                        validator = cache.get_validator(url)
+                        if validator and not need_image:
+                            cache_key = cache.build_key(validator['content_hash'], model_code, model_version, config_dict)
+                            cached, source = await cache.lookup(cache_key)
+                            if cached is not None:
+                                prefetched = (cache_key, cached, source)
+                                headers = cache.conditional_headers(validator)
+                                cache.metrics['conditional_requests'] += 1
+                        
+                        status, image_data, response_headers = await self._fetch_http_image(url, headers)
+                        if status == 304 and headers:
+                            cache.metrics['not_modified'] += 1
+                            cache.record(prefetched[2])
+                            item['detections'] = prefetched[1]
+                            item['cache_key'] = prefetched[0]
+                            item['cache'] = 'not_modified'
+                            item['timing']['download_ms'] = round((time.time() - stage_start) * 1000, 2)
+                            return item
+                        if image_data is not None:
+                            item['content_hash'] = cache.content_hash(image_data)
+                            cache.set_validator(url, response_headers, item['content_hash'])
+                item['timing']['download_ms'] = round((time.time() - stage_start) * 1000, 2)
+                if image_data is None:
+                    item['error'] = "图片下载失败"
+                    return item
+                
+                if model_version:
+                    content_hash = item.get('content_hash') or cache.content_hash(image_data)
+                    item['cache_key'] = cache.build_key(content_hash, model_code, model_version, config_dict)
+                    if prefetched[0] == item['cache_key']:
+                        cached = prefetched[1]
+                        cache.record(prefetched[2])
+                    else:
+                        cached = await cache.get(item['cache_key'])
+                    if cached is not None:
+                        item['detections'] = cached
+                        item['cache'] = 'hit'
+                        if not need_image:
+                            return item
+                
+                stage_start = time.time()
+                item['image'], item['decode_factor'] = await loop.run_in_executor(
+                    self._decode_executor, decode_image, image_data, decode_target, config_dict.get('roi')
+                )
+                item['timing']['decode_ms'] = round((time.time() - stage_start) * 1000, 2)
+                if item['decode_factor'] > 1:
+                    item['timing']['decode_factor'] = item['decode_factor']
+                if item['image'] is None:
+                    item['error'] = "图片解码失败"
+                    item.pop('detections', None)
+                return item
+            
+            # 阶段1: 下载与解码（下载完成的图片立即进入解码线程池）
+            items = await asyncio.gather(*(load_image(url) for url in image_urls))
+            fetch_done = time.time()
+            
+            # 阶段2: 批量推理（已命中缓存的图片不参与）
+            decoded = [item for item in items if item['image'] is not None and 'detections' not in item]
+            if decoded:
+                batch_detections = await self.detect_batch(
+                    [item['image'] for item in decoded], config=config_dict, model_code=model_code, allow_tiling=True
+                )
+                per_image_ms = round((time.time() - fetch_done) * 1000 / len(decoded), 2)
+                for item, detections in zip(decoded, batch_detections):
+                    if item['decode_factor'] > 1:
+                        self._scale_detections(detections, item['decode_factor'])
+                    item['detections'] = detections
+                    item['timing']['inference_ms'] = per_image_ms
+                    if item.get('cache_key'):
+                        item['cache'] = 'miss'
+                        await cache.set(item['cache_key'], detections)
+            inference_done = time.time()
+            
+            # 阶段3: 结果图渲染与保存
             results = []
-            for url in image_urls:
-                # 下载图片
-                image = await self._download_image(url)
-                if image is None:
-                    continue
-                    
-                # 执行检测
-                detections = await self.detect(image, config=config)
+            for item in items:
+                image = item['image']
+                detections = item.get('detections', [])
                 
                 # 处理结果图
                 result_image = None
-                if is_base64:
-                    result_image = await self._encode_result_image(image, detections)
-                    
-                # 保存结果
                 saved_path = None
-                if save_result:
-                    logger.info("尝试保存检测结果图片...")
-                    saved_path = await self._save_result_image(image, detections, task_name)
-                    if saved_path:
-                        logger.info(f"成功保存检测结果图片，路径: {saved_path}")
-                    else:
-                        logger.error("保存检测结果图片失败")
+                if image is not None:
+                    stage_start = time.time()
+                    if is_base64:
+                        result_image = await self._encode_result_image(image, detections)
+                        
+                    # 保存结果
+                    if save_result:
+                        logger.info("尝试保存检测结果图片...")
+                        saved_path = await self._save_result_image(image, detections, task_name)
+                        if saved_path:
+                            logger.info(f"成功保存检测结果图片，路径: {saved_path}")
+                        else:
+                            logger.error("保存检测结果图片失败")
+                    if is_base64 or save_result:
+                        item['timing']['render_ms'] = round((time.time() - stage_start) * 1000, 2)
                     
                 result_dict = {
-                    'image_url': url,
+                    'image_url': item['image_url'],
                     'detections': detections,
                     'result_image': result_image,
-                    'saved_path': saved_path
+                    'saved_path': saved_path,
+                    'timing': item['timing']
                 }
+                if item.get('cache'):
+                    result_dict['cache'] = item['cache']
+                if item.get('error'):
+                    result_dict['error'] = item['error']
                 results.append(result_dict)
             
+            for item in items:
+                for stage in ('download', 'decode', 'inference', 'render'):
+                    stage_ms = item['timing'].get(f'{stage}_ms')
+                    if stage_ms is not None:
+                        metrics.STAGE_LATENCY.observe(stage_ms / 1000, f'image_{stage}', '', model_code)
+            
+            timing = {
+                'fetch_decode_ms': round((fetch_done - pipeline_start) * 1000, 2),
+                'inference_ms': round((inference_done - fetch_done) * 1000, 2),
+                'render_ms': round((time.time() - inference_done) * 1000, 2),
+                'total_ms': round((time.time() - pipeline_start) * 1000, 2),
+                'image_count': len(image_urls),
+                'inferred_count': len(decoded),
+                'cache_hits': sum(1 for item in items if item.get('cache') in ('hit', 'not_modified'))
+            }
+            
             # 更新任务状态和结果
             task_info.update({
                 'status': TaskStatus.COMPLETED,
                 'end_time': datetime.now().isoformat(),
-                'results': results
+                'results': [{k: v for k, v in r.items() if k != 'result_image'} for r in results],
+                'timing': timing
             })
             await self._save_task_result(task_id, task_info)
             
-            return results[0] if results else None
+            # 保持与单图接口兼容：顶层字段为第一张成功图片的结果，全部失败时与原接口一致返回None
+            succeeded = [r for r in results if not r.get('error')]
+            if not succeeded:
+                return None
+            response = dict(succeeded[0])
+            response.update({
+                'results': results,
+                'timing': timing
+            })
+            return response
             
         except Exception as e:
             logger.error(f"Image detection failed: {str(e)}", exc_info=True)
             await self._fail_task(task_id, str(e))
             raise
+        finally:
+            self.pending_images -= len(image_urls)
 
     async def start_stream_analysis(
         self,
@@ -798,7 +1312,8 @@ class YOLODetector:
         task_name: Optional[str] = None,
         enable_callback: bool = False,
         save_result: bool = False,
-        analysis_type: str = "detection"
+        analysis_type: str = "detection",
+        model_codes: Optional[List[str]] = None
     ) -> Dict[str, Any]:
         """启动流分析任务
         
@@ -813,6 +1328,7 @@ class YOLODetector:
             enable_callback: 是否启用回调
             save_result: 是否保存结果
             analysis_type: 分析类型
+            model_codes: 附加模型代码列表，与主模型在同一帧上推理，结果合并后统一回调
             
         Returns:
             Dict[str, Any]: 任务信息
@@ -850,6 +1366,7 @@ class YOLODetector:
             task_info = {
                 "task_id": task_id,
                 "model_code": model_code,
+                "model_codes": resolve_model_codes(model_code, model_codes),
                 "stream_url": stream_url,
                 "callback_urls": callback_urls,
                 "system_callback_url": system_callback_url,  # 保存系统回调URL
@@ -898,11 +1415,24 @@ class YOLODetector:
             logger.error(f"YOLODetector.start_stream_analysis - 启动流分析任务失败: {str(e)}", exc_info=True)
             raise
 
+    def _open_capture(self, stream_url: str, options: Optional[Dict[str, Any]] = None):
+        """打开流分析的取流源
+        
+        replay:// 地址（需启用 REPLAY）打开录制回放；指定解码参数时使用 ffmpeg 管道解码，
+        ffmpeg 不可用时回退到 cv2.VideoCapture
+        """
+        if is_replay_url(stream_url):
+            if not settings.REPLAY.enabled:
+                raise ValueError("回放未启用，请配置 REPLAY.enabled")
+            return ReplayCapture.from_url(stream_url)
+        return open_capture(stream_url, options)
+
     async def _process_stream_analysis(
         self,
         task_id: str
     ) -> None:
         """处理流分析任务"""
+        subscription = None
         try:
             # 获取任务信息
             task_info = await self._get_task_info(task_id)
@@ -930,13 +1460,46 @@ class YOLODetector:
             config.setdefault("iou", self.default_iou)
             config.setdefault("max_det", self.default_max_det)
             
-            # 加载模型
-            await self.load_model(model_code)
+            # 加载模型（使用任务自己的模型引用，避免并发任务切换 self.model）
+            model = await self.get_model(model_code)
+            preprocessor = self._create_preprocessor(model_code, config)
+            
+            # 多模型：附加模型与主模型在同一帧上推理，可选级联模型在主模型检测框上推理
+            model_codes = task_info.get("model_codes") or [model_code]
+            cascade = create_cascade_options(config)
+            model_group = None
+            cascade_model = None
+            if len(model_codes) > 1 or cascade:
+                models = [(model_code, model)] + [(code, await self.get_model(code)) for code in model_codes[1:]]
+                model_group = self._create_model_group(models, config)
+                if cascade:
+                    cascade_model = await self.get_model(cascade["model_code"])
+                logger.info(f"任务 {task_id} 启用多模型分析: {model_codes}，级联模型: {cascade['model_code'] if cascade else None}")
             
-            # 打开流
             logger.info(f"开始处理流 {stream_url}")
-            cap = cv2.VideoCapture(stream_url)
-            if not cap.isOpened():
+            # 解码参数：按分析帧率和推理尺寸在解码器内降帧、降分辨率
+            analyze_interval = config.get("analyze_interval")
+            if analyze_interval is None:
+                analyze_interval = settings.ANALYSIS.analyze_interval
+            decoder_options = None if is_replay_url(stream_url) else create_decoder_options(
+                config, 1.0 / analyze_interval if analyze_interval else None
+            )
+            
+            snapshot_mode = not is_replay_url(stream_url) and snapshot_mode_enabled(
+                config, analyze_interval, decoder_options
+            )
+            if snapshot_mode:
+                # 快照模式：到分析时刻才连接并解码一帧，按保温策略断开或保持会话
+                subscription = SnapshotSource(
+                    stream_url, self._open_capture, analyze_interval, decoder_options, config.get("warm_keep")
+                )
+                if not await subscription.start():
+                    subscription = None
+                logger.info(f"任务 {task_id} 使用快照模式，分析间隔: {analyze_interval}s")
+            else:
+                # 订阅流（同一地址的任务共享一个连接和解码）
+                subscription = await self.stream_hub.subscribe(stream_url, task_id, decoder_options)
+            if subscription is None:
                 logger.error(f"无法打开流: {stream_url}")
                 task_info["status"] = TaskStatus.FAILED
                 task_info["error_message"] = f"无法打开流: {stream_url}"
@@ -944,9 +1507,11 @@ class YOLODetector:
                 return
             
             # 获取流信息
-            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            fps = int(cap.get(cv2.CAP_PROP_FPS)) or 25  # 默认为25fps
+            # 解码帧小于原图时，检测坐标按 decode_scale 还原到原图像素坐标
+            decode_scale = subscription.scale
+            width = round(subscription.width * decode_scale)
+            height = round(subscription.height * decode_scale)
+            fps = int(subscription.fps)
             
             # 更新任务信息
             task_info["frame_width"] = width
@@ -956,16 +1521,44 @@ class YOLODetector:
             
             # 设置帧处理计数器
             frame_count = 0
-            last_process_time = time.time()
-            process_interval = 1.0  # 默认处理间隔，单位秒
             
-            # 设置回调参数
-            callback_interval = 10  # 回调间隔，单位帧
-            last_callback_frame = 0
+            # 按挂钟时间调度分析、推送和报警
+            scheduler = StreamScheduler.from_config(config)
+            # 普通推送是否携带结果图片（默认携带，与报警一致）
+            push_image = config.get("push_image", True) is not False
+            
+            # 变化回调模式：只在目标出现/离开/数量变化时回调，画面不变时只发心跳
+            deduplicator = create_event_deduplicator(config, scheduler.alarm_interval)
+            if deduplicator:
+                scheduler.push_interval = deduplicator.heartbeat_interval
+                logger.info(f"任务 {task_id} 启用变化回调模式，心跳间隔: {deduplicator.heartbeat_interval}s")
+            
+            # 节点级QoS：过载时放宽分析间隔、降低推理尺寸
+            active_imgsz = config.get("imgsz") or settings.INFERENCE.imgsz
+            # 静态导出的后端输入尺寸固定，降低推理尺寸不起作用，只放宽分析间隔
+            backend = self.backends.status.get(model_code, {}).get("backend", "torch")
+            qos_state = self.qos.register(
+                task_id,
+                config.get("priority", settings.QOS.default_priority),
+                scheduler.analyze_interval,
+                active_imgsz,
+                fixed_imgsz=backend != "torch"
+            )
+            
+            # 流水线指标标签
+            metric_task = metrics.task_label(task_id)
+            
+            # 帧新鲜度：采集到回调发出的端到端时延
+            freshness = FreshnessTracker.from_config(config)
             
             # 检测结果缓存
             last_detections = []
             
+            # 运动门控（静止画面跳过推理，复用上一次检测结果）
+            motion_gate = create_motion_gate(config)
+            if motion_gate:
+                logger.info(f"任务 {task_id} 启用运动门控: {motion_gate.method}")
+            
             # 根据分析类型初始化相关组件
             if analysis_type == "tracking":
                 tracker_type = config.get("tracker_type", "sort")
@@ -975,177 +1568,152 @@ class YOLODetector:
             # 主循环
             while not await self._should_stop(task_id):
                 try:
-                    # 读取一帧
-                    ret, frame = cap.read()
-                    if not ret:
-                        # 对于大多数流，读取失败通常意味着流结束或出现错误
-                        # 重新打开流继续处理
-                        logger.warning(f"读取帧失败，尝试重新打开流: {stream_url}")
-                        cap.release()
-                        await asyncio.sleep(2)  # 等待一下再重试
-                        cap = cv2.VideoCapture(stream_url)
-                        if not cap.isOpened():
-                            logger.error(f"重新打开流失败: {stream_url}")
+                    # 未到分析时刻时让出事件循环，读取进度由取流线程保持
+                    scheduler.analyze_interval = qos_state.process_interval
+                    if snapshot_mode:
+                        subscription.policy.interval = scheduler.analyze_interval
+                    wait = scheduler.time_to_analyze()
+                    if frame_count > 0 and wait > 0:
+                        await asyncio.sleep(min(wait, 1.0))
+                        continue
+                    
+                    # 等待取流线程解码的下一帧
+                    with metrics.time_stage("read", metric_task, model_code):
+                        item = await subscription.read(settings.STREAM_HUB.read_timeout)
+                    if item is None:
+                        if subscription.finished:
+                            # 回放到结尾视为任务正常结束
+                            if subscription.end_reason == "finished":
+                                logger.info(f"回放结束: {stream_url}")
+                                break
+                            logger.error(f"流已中断且重连失败: {stream_url}")
                             break
+                        metrics.FRAMES_DROPPED.inc(metric_task, model_code, "read_timeout")
+                        logger.warning(f"读取帧超时: {stream_url}")
                         continue
                     
+                    # 两次分析之间未使用的帧计为调度丢弃
+                    if subscription.skipped:
+                        metrics.FRAMES_DROPPED.inc(metric_task, model_code, "schedule", amount=subscription.skipped)
+                    
                     # 更新帧计数
-                    frame_count += 1
+                    frame_count += 1 + subscription.skipped
                     task_info["frame_count"] = frame_count
                     
-                    # 控制处理频率
-                    current_time = time.time()
-                    if current_time - last_process_time < process_interval and frame_count > 1:
-                        continue
-                    
-                    last_process_time = current_time
+                    frame = item.image
+                    capture_ts = item.capture_ts
+                    metrics.FRAMES_ANALYZED.inc(metric_task, model_code)
+                    lag_seconds = scheduler.lag() if frame_count > 1 else 0.0
+                    scheduler.mark_analyzed()
                     
-                    # 执行检测
-                    detections = await self._process_frame(frame, self.model, config)
+                    # 应用QoS调整后的推理尺寸
+                    if qos_state.imgsz != active_imgsz:
+                        active_imgsz = qos_state.imgsz
+                        config = {**config, "imgsz": active_imgsz}
+                        preprocessor = self._create_preprocessor(model_code, config)
+                        if model_group is not None:
+                            model_group = self._create_model_group([item[:2] for item in model_group], config)
                     
-                    # 处理不同类型的ROI
-                    roi_type = config.get("roi_type", 0)
-                    roi = config.get("roi")
+                    # 运动门控：画面无变化时复用上一次（已过滤的）检测结果
+                    inference_skipped = motion_gate is not None and not motion_gate.check(frame)
+                    if inference_skipped:
+                        metrics.INFERENCE_SKIPPED.inc(metric_task, model_code, "motion")
+                        detections = last_detections
+                    else:
+                        # 执行检测
+                        with metrics.time_stage("inference", metric_task, model_code) as timer:
+                            if model_group is not None:
+                                detections = await self._process_frame_multi(frame, model_group, config, cascade, cascade_model)
+                            else:
+                                detections = await self._process_frame(frame, model, config, preprocessor, model_code)
+                        qos_state.observe((time.perf_counter() - timer.start) * 1000, lag_seconds)
+                        if decode_scale != 1.0:
+                            self._scale_detections(detections, decode_scale)
                     
-                    # 如果配置了ROI，过滤检测结果
-                    if roi and roi_type > 0:
-                        # 矩形ROI
-                        if roi_type == 1 and all(k in roi for k in ["x1", "y1", "x2", "y2"]):
-                            x1, y1, x2, y2 = roi["x1"], roi["y1"], roi["x2"], roi["y2"]
-                            # 转换为像素坐标
-                            x1_px, y1_px = int(x1 * width), int(y1 * height)
-                            x2_px, y2_px = int(x2 * width), int(y2 * height)
-                            # 过滤检测结果
-                            filtered_detections = []
-                            for det in detections:
-                                bbox = det["bbox"]
-                                # 计算中心点
-                                cx = bbox["x"] + bbox["width"] / 2
-                                cy = bbox["y"] + bbox["height"] / 2
-                                # 检查是否在ROI内
-                                if x1_px <= cx <= x2_px and y1_px <= cy <= y2_px:
-                                    filtered_detections.append(det)
-                            detections = filtered_detections
-                            
-                        # 多边形ROI
-                        elif roi_type == 2 and "points" in roi:
-                            # 转换为像素坐标
-                            points = [(int(p[0] * width), int(p[1] * height)) for p in roi["points"]]
-                            points_array = np.array(points, np.int32)
-                            points_array = points_array.reshape((-1, 1, 2))
-                            
-                            # 过滤检测结果
-                            filtered_detections = []
-                            for det in detections:
-                                bbox = det["bbox"]
-                                # 计算中心点
-                                cx = int(bbox["x"] + bbox["width"] / 2)
-                                cy = int(bbox["y"] + bbox["height"] / 2)
-                                # 检查点是否在多边形内
-                                result = cv2.pointPolygonTest(points_array, (cx, cy), False)
-                                if result >= 0:  # 点在多边形内或在边界上
-                                    filtered_detections.append(det)
-                            detections = filtered_detections
-                            
-                        # 线段ROI
-                        elif roi_type == 3 and "points" in roi and len(roi["points"]) == 2:
-                            # 转换为像素坐标
-                            points = [(int(p[0] * width), int(p[1] * height)) for p in roi["points"]]
-                            line_start, line_end = points
-                            line_vec = np.array([line_end[0] - line_start[0], line_end[1] - line_start[1]])
-                            line_length = np.linalg.norm(line_vec)
-                            
-                            # 过滤检测结果 - 对于线段，检测目标是否与线段相交
-                            filtered_detections = []
-                            for det in detections:
-                                bbox = det["bbox"]
-                                # 定义边界框的四个角点
-                                box_left = bbox["x"]
-                                box_top = bbox["y"]
-                                box_right = box_left + bbox["width"]
-                                box_bottom = box_top + bbox["height"]
-                                
-                                # 检查线段是否与边界框相交
-                                # 使用简化的相交检测：检查线段的两个端点是否在边界框的两侧
-                                intersects = False
-                                
-                                # 计算点到线段的距离
-                                def point_to_line_distance(point, line_start, line_end):
-                                    # 线段向量
-                                    line_vec = np.array([line_end[0] - line_start[0], line_end[1] - line_start[1]])
-                                    # 点到线段起点的向量
-                                    point_vec = np.array([point[0] - line_start[0], point[1] - line_start[1]])
-                                    # 计算点在线段上的投影长度
-                                    line_length = np.linalg.norm(line_vec)
-                                    projection = np.dot(point_vec, line_vec) / line_length
-                                    
-                                    # 如果投影在线段外，返回到端点的距离
-                                    if projection < 0:
-                                        return np.linalg.norm(point_vec)
-                                    elif projection > line_length:
-                                        return np.linalg.norm(np.array([point[0] - line_end[0], point[1] - line_end[1]]))
-                                    
-                                    # 如果投影在线段上，计算点到线的垂直距离
-                                    unit_line_vec = line_vec / line_length
-                                    # 垂直向量
-                                    perp_vec = np.array([-unit_line_vec[1], unit_line_vec[0]])
-                                    # 垂直距离
-                                    distance = abs(np.dot(point_vec, perp_vec))
-                                    return distance
-                                
-                                # 计算边界框中心到线段的距离
-                                center = (box_left + box_right) / 2, (box_top + box_bottom) / 2
-                                distance = point_to_line_distance(center, line_start, line_end)
-                                
-                                # 如果距离小于阈值，认为相交
-                                threshold = (bbox["width"] + bbox["height"]) / 4  # 使用边界框尺寸的平均值的一半作为阈值
-                                if distance < threshold:
-                                    filtered_detections.append(det)
-                                    
-                            detections = filtered_detections
+                    # 按ROI（矩形、多边形、线段）过滤检测结果
+                    if not inference_skipped:
+                        with metrics.time_stage("roi_filter", metric_task, model_code):
+                            detections = self._filter_detections_by_roi(detections, config, width, height)
                     
                     # 更新检测计数
                     task_info["detection_count"] = len(detections)
                     
+                    # 有目标且距上次报警超过报警间隔时报警（带结果图），否则按推送间隔推送检测结果
+                    schedule_now = time.monotonic()
+                    events = None
+                    if deduplicator is not None:
+                        # 报警间隔按目标去重，由去重器控制
+                        events = deduplicator.update(detections, schedule_now)
+                        is_alarm = any(e["type"] in (EventType.OBJECT_NEW, EventType.OBJECT_REPEAT) for e in events)
+                        need_callback = bool(events) or scheduler.push_due(schedule_now)
+                    else:
+                        is_alarm = bool(detections) and scheduler.alarm_due(schedule_now)
+                        need_callback = is_alarm or scheduler.push_due(schedule_now)
+                    
                     # 是否需要执行用户回调
-                    need_user_callback = enable_callback and callback_urls and (
-                        frame_count - last_callback_frame >= callback_interval or 
-                        frame_count == 1  # 第一帧始终回调
-                    )
+                    need_user_callback = enable_callback and callback_urls and need_callback
                     
                     # 是否需要执行系统回调（始终需要，除非未指定系统回调URL）
-                    need_system_callback = system_callback_url is not None and (
-                        frame_count - last_callback_frame >= callback_interval or 
-                        frame_count == 1  # 第一帧始终回调
-                    )
+                    need_system_callback = system_callback_url is not None and need_callback
+                    
+                    # 帧已超过最大帧龄时不再推送普通结果，报警和目标事件仍然发出
+                    if (need_user_callback or need_system_callback) and not is_alarm and not events and freshness.is_stale(capture_ts):
+                        freshness.record_drop("callback")
+                        metrics.STALE_DROPS.inc(metric_task, model_code, "callback")
+                        need_user_callback = need_system_callback = False
                     
                     # 结果图片
                     result_image = None
                     
-                    # 保存结果或需要回调时，绘制结果
-                    if save_result or need_user_callback or need_system_callback:
-                        result_image = await self._encode_result_image(
-                            frame, 
-                            detections,
-                            return_image=True,
-                            draw_tracks=analysis_type == "tracking",
-                            draw_track_ids=analysis_type == "tracking"
-                        )
+                    # 保存结果或回调需要携带图片时，绘制结果
+                    attach_image = is_alarm or push_image
+                    if save_result or ((need_user_callback or need_system_callback) and attach_image):
+                        with metrics.time_stage("render", metric_task, model_code):
+                            result_image = await self._encode_result_image(
+                                frame if decode_scale == 1.0 else cv2.resize(frame, (width, height)),
+                                detections,
+                                return_image=True,
+                                draw_tracks=analysis_type == "tracking",
+                                draw_track_ids=analysis_type == "tracking"
+                            )
                     
                     # 保存结果图片
                     saved_path = None
                     if save_result and result_image is not None:
-                        saved_path = await self._save_result_image(result_image, detections, task_name or task_id)
+                        with metrics.time_stage("save", metric_task, model_code):
+                            saved_path = await self._save_result_image(result_image, detections, task_name or task_id)
                     
                     # 如果需要回调
                     if need_user_callback or need_system_callback:
-                        last_callback_frame = frame_count
+                        if is_alarm:
+                            scheduler.mark_alarmed(schedule_now)
+                        scheduler.mark_pushed(schedule_now)
                         base64_image = None
                         
-                        # 转换图片为base64
-                        if result_image is not None:
-                            _, buffer = cv2.imencode('.jpg', result_image)
-                            base64_image = base64.b64encode(buffer).decode('utf-8')
+                        # 转换图片为base64（push_image 关闭时仅报警携带图片）
+                        if attach_image and result_image is not None:
+                            with metrics.time_stage("encode", metric_task, model_code):
+                                _, buffer = cv2.imencode('.jpg', result_image)
+                                base64_image = base64.b64encode(buffer).decode('utf-8')
+                        
+                        if events is None:
+                            event_type = "alarm" if is_alarm else "push"
+                        else:
+                            event_type = "alarm" if is_alarm else ("event" if events else "heartbeat")
+                        processed_ts = time.time()
+                        result_data = {
+                            "detections": detections,
+                            "task_id": task_id,
+                            "frame_index": frame_count,
+                            "event_type": event_type,
+                            "capture_ts": round(capture_ts, 3),
+                            "processed_ts": round(processed_ts, 3)
+                        }
+                        if model_group is not None:
+                            result_data["models"] = model_codes
+                        if events is not None:
+                            result_data["events"] = events
+                            result_data["counts"] = deduplicator.counts
                         
                         # 准备回调数据
                         callback_data = CallbackData(
@@ -1164,11 +1732,7 @@ class YOLODetector:
                             src_pic_data=base64_image,
                             alarm_pic_data=base64_image,
                             parameter=config,
-                            result_data={
-                                "detections": detections,
-                                "task_id": task_id,
-                                "frame_index": frame_count
-                            },
+                            result_data=result_data,
                             extra_info=detections
                         )
                         
@@ -1177,9 +1741,11 @@ class YOLODetector:
                         if need_system_callback:
                             try:
                                 logger.info(f"发送系统级回调到 {system_callback_url}")
-                                system_callback_success = await self._send_callback(system_callback_url, callback_data.to_dict())
+                                with metrics.time_stage("callback", metric_task, model_code):
+                                    system_callback_success = await self._send_callback(system_callback_url, callback_data.to_dict())
                                 
                                 if not system_callback_success:
+                                    metrics.CALLBACK_FAILURES.inc(metric_task, model_code, "system")
                                     logger.error(f"系统级回调失败! URL: {system_callback_url}")
                                     # 停止任务，因为系统回调是必须的
                                     logger.error(f"系统级回调失败，停止任务 {task_id}")
@@ -1188,6 +1754,7 @@ class YOLODetector:
                                     await self._update_task_info(task_id, task_info)
                                     break
                             except Exception as e:
+                                metrics.CALLBACK_FAILURES.inc(metric_task, model_code, "system")
                                 logger.error(f"系统级回调异常: {str(e)}")
                                 # 停止任务，因为系统回调是必须的
                                 logger.error(f"系统级回调异常，停止任务 {task_id}")
@@ -1199,25 +1766,46 @@ class YOLODetector:
                         # 执行用户回调（仅当系统回调成功时）
                         if need_user_callback and system_callback_success:
                             try:
-                                await self._send_callback(callback_urls, callback_data.to_dict())
+                                with metrics.time_stage("callback", metric_task, model_code):
+                                    user_callback_success = await self._send_callback(callback_urls, callback_data.to_dict())
+                                if not user_callback_success:
+                                    metrics.CALLBACK_FAILURES.inc(metric_task, model_code, "user")
                             except Exception as e:
+                                metrics.CALLBACK_FAILURES.inc(metric_task, model_code, "user")
                                 logger.error(f"用户回调异常: {str(e)}")
                                 # 用户回调失败不影响任务继续执行
                     
+                    # 记录帧新鲜度：有回调时取回调返回（送达）时刻，包含回调投递耗时；否则取处理完成时刻
+                    frame_age = freshness.record(capture_ts, time.time())
+                    metrics.FRAME_AGE.observe(frame_age, metric_task, model_code)
+                    
                     # 缓存检测结果
                     last_detections = detections
                     
                     # 更新任务信息
                     task_info["last_detections"] = detections
                     task_info["last_update_time"] = datetime.now().isoformat()
-                    await self._update_task_info(task_id, task_info)
+                    if motion_gate:
+                        task_info["motion_gate"] = motion_gate.stats()
+                    task_info["schedule"] = scheduler.stats()
+                    task_info["freshness"] = freshness.stats()
+                    if snapshot_mode:
+                        task_info["snapshot"] = subscription.stats()
+                    if deduplicator:
+                        task_info["events"] = deduplicator.stats()
+                    if qos_state.changed:
+                        task_info["qos"] = qos_state.snapshot()
+                        qos_state.changed = False
+                    with metrics.time_stage("redis", metric_task, model_code):
+                        await self._update_task_info(task_id, task_info)
                     
                 except Exception as e:
+                    metrics.FRAMES_DROPPED.inc(metric_task, model_code, "error")
                     logger.error(f"处理帧时出错: {str(e)}", exc_info=True)
                     continue
             
             # 任务完成
-            cap.release()
+            subscription.close()
             logger.info(f"流分析任务 {task_id} 已停止")
             
             # 更新任务状态
@@ -1235,6 +1823,11 @@ class YOLODetector:
                 task_info["error_message"] = str(e)
                 task_info["end_time"] = datetime.now().isoformat()
                 await self._update_task_info(task_id, task_info)
+        finally:
+            if subscription is not None:
+                subscription.close()
+            self.qos.unregister(task_id)
+            metrics.registry.remove_task(task_id)
 
     async def stop_stream_analysis(self, task_id: str):
         """停止视频流分析"""
@@ -1532,9 +2125,8 @@ class YOLODetector:
             task_info['process_start_time'] = datetime.now().isoformat()
             await self._update_task_info(task_id, task_info)
             
-            # 加载模型
-            if not self.model:
-                await self.load_model(model_code)
+            # 加载模型（推理时按模型代码取模型引用）
+            await self.get_model(model_code)
             
             # 初始化跟踪器（如果启用）
             if enable_tracking:
@@ -1597,17 +2189,30 @@ class YOLODetector:
                     os.remove(local_video_path)
                 raise
             
+            # 初始化采样策略，跳过的帧只grab不解码
+            sampling_policy = create_sampling_policy(config_dict.get('sampling'))
+            
+            # 按目标帧率采样且不输出结果视频时，由 ffmpeg 在解码器内降到目标帧率并降分辨率
+            decoder_options = None
+            if not save_result and sampling_policy.name == "target_fps":
+                decoder_options = create_decoder_options(config_dict, None)
+                if decoder_options:
+                    decoder_options["fps"] = sampling_policy.target_fps
+            
             # 打开视频
-            cap = cv2.VideoCapture(local_video_path)
+            cap = open_capture(local_video_path, decoder_options)
             if not cap.isOpened():
                 raise Exception(f"无法打开视频: {local_video_path}")
             
-            # 获取视频信息
+            # 获取视频信息（解码帧小于原图时，检测坐标按 decode_scale 还原）
+            decode_scale = getattr(cap, "scale", 1.0)
             fps = cap.get(cv2.CAP_PROP_FPS)
             frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
             frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
             total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            frame_interval = 3  # 每3帧检测一次
+            sampling_policy.configure(fps, frame_width, frame_height)
+            frame_width = round(frame_width * decode_scale)
+            frame_height = round(frame_height * decode_scale)
             
             # 更新任务信息
             task_info.update({
@@ -1616,14 +2221,14 @@ class YOLODetector:
                     'width': frame_width,
                     'height': frame_height,
                     'total_frames': total_frames,
-                    'frame_interval': frame_interval
+                    'sampling_policy': sampling_policy.name
                 },
                 'progress': 0,
                 'processed_frames': 0
             })
             await self._update_task_info(task_id, task_info)
             
-            logger.info(f"视频信息 - FPS: {fps}, 尺寸: {frame_width}x{frame_height}, 总帧数: {total_frames}")
+            logger.info(f"视频信息 - FPS: {fps}, 尺寸: {frame_width}x{frame_height}, 总帧数: {total_frames}, 采样策略: {sampling_policy.name}")
             
             # 如果需要保存结果，创建视频写入器
             saved_path = None
@@ -1680,26 +2285,54 @@ class YOLODetector:
                 return task_info.get('status') == TaskStatus.STOPPING or task_info.get('status') == TaskStatus.CANCELLED
             
             while True:
-                # 检查是否需要停止
-                if await should_stop():
+                # 检查是否需要停止（跳帧时不必每帧查询Redis）
+                if frame_count % 10 == 0 and await should_stop():
                     logger.info(f"任务 {task_id} 收到停止信号")
                     break
                 
+                action = sampling_policy.decide(frame_count)
+                sampling_policy.record(action)
+                
+                # 不需要分析且不需要写结果视频的帧只grab，不解码
+                if action == SampleAction.SKIP and not save_result:
+                    if not cap.grab():
+                        break
+                    frame_count += 1
+                    if frame_count % 30 == 0:
+                        await asyncio.sleep(0)
+                    continue
+                
                 ret, frame = cap.read()
                 if not ret:
                     break
                 
+                frame_index = frame_count
                 frame_count += 1
-                frames_buffer.append(frame.copy())
+                if save_result:
+                    frames_buffer.append(frame.copy())
+                
+                if action == SampleAction.PROBE:
+                    analyze = sampling_policy.observe_frame(frame_index, frame)
+                else:
+                    analyze = action == SampleAction.ANALYZE
                 
-                # 按间隔处理帧
-                if frame_count % frame_interval == 0:
+                # 按采样策略处理帧
+                if analyze:
                     processed_count += 1
                     current_time = time.time()
+                    sampling_policy.on_analyze(frame_index, frame)
                     
                     try:
                         # 执行检测
-                        detections = await self.detect(frame, config=config_dict)
+                        try:
+                            detections = await self.detect(frame, config=config_dict, model_code=model_code)
+                        except Exception:
+                            # 检测失败按无目标回传，避免采样策略停留在逐帧分析
+                            sampling_policy.observe_detections(frame_index, [])
+                            raise
+                        if decode_scale != 1.0:
+                            self._scale_detections(detections, decode_scale)
+                        sampling_policy.observe_detections(frame_index, detections)
                         
                         # 如果启用了跟踪，更新跟踪状态
                         if enable_tracking and self.tracker:
@@ -1730,12 +2363,13 @@ class YOLODetector:
                             'processed_frames': frame_count,
                             'total_frames': total_frames,
                             'current_detections': detections,
+                            'sampling_stats': sampling_policy.stats(),
                             'last_update_time': datetime.now().isoformat(),
                             'video_info': {
                                 'total_frames': total_frames,
-                                'fps': cap.get(cv2.CAP_PROP_FPS),
-                                'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
-                                'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+                                'fps': fps,
+                                'width': frame_width,
+                                'height': frame_height
                             }
                         })
                         await self._update_task_info(task_id, task_info)
@@ -1904,74 +2538,50 @@ class YOLODetector:
         self,
         frame: np.ndarray,
         model: YOLO,
-        config: Dict[str, Any]
+        config: Dict[str, Any],
+        preprocessor: Optional[LetterboxPreprocessor] = None,
+        model_code: Optional[str] = None
     ) -> List[Dict[str, Any]]:
-        """处理单帧图像"""
+        """处理单帧图像
+        
+        Args:
+            frame: 视频帧
+            model: 模型
+            config: 检测配置
+            preprocessor: 该路流独占的letterbox预处理器，为None时使用缩放预处理
+            model_code: 模型代码，启用推理工作池时据此在工作进程中推理
+        """
         try:
             # 使用配置参数或默认值
-            conf = config.get('confidence', self.default_confidence)
-            iou = config.get('iou', self.default_iou)
-            classes = config.get('classes', None)
-            roi = config.get('roi', None)
-            imgsz = config.get('imgsz', None)
-            
-            # 保存原始图像尺寸
-            original_shape = frame.shape[:2]  # (height, width)
-            
-            # 如果指定了ROI，裁剪图像
-            if roi:
-                h, w = frame.shape[:2]
-                x1 = int(roi['x1'] * w)
-                y1 = int(roi['y1'] * h)
-                x2 = int(roi['x2'] * w)
-                y2 = int(roi['y2'] * h)
-                frame = frame[y1:y2, x1:x2]
-            
-            # 处理图片大小
-            if imgsz:
-                frame = cv2.resize(frame, (imgsz, imgsz))
+            conf, iou, classes = self._resolve_detection_params(config)
+            
+            # 推理工作池：ROI裁剪后写入共享内存，由工作进程完成预处理、推理和后处理
+            if model_code is not None and self.worker_pool is not None:
+                cropped, transform = self._crop_roi(frame, config)
+                if cropped.nbytes <= self.worker_pool.slot_bytes:
+                    return await self._infer_in_pool(model_code, cropped, transform, config, conf, iou, classes)
+            
+            # 按ROI裁剪并缩放
+            if preprocessor is not None:
+                cropped, transform = self._crop_roi(frame, config)
+                model_input, letterbox_info = preprocessor.prepare([cropped])
+                self._apply_letterbox([transform], letterbox_info)
+            else:
+                model_input, transform = self._prepare_detection_input(frame, config)
             
             # 执行推理
             results = model(
-                frame,
+                model_input,
                 conf=conf,
                 iou=iou,
-                classes=classes
+                classes=classes,
+                verbose=False
             )
             
             # 处理检测结果
             detections = []
             for result in results:
-                boxes = result.boxes
-                for box in boxes:
-                    bbox = box.xyxy[0].cpu().numpy()
-                    conf = float(box.conf[0])
-                    cls = int(box.cls[0])
-                    name = result.names[cls]
-                    
-                    # 如果使用了ROI，需要调整坐标
-                    if roi and original_shape:
-                        h, w = original_shape
-                        bbox[0] = bbox[0] / w * (roi['x2'] - roi['x1']) * w + roi['x1'] * w
-                        bbox[1] = bbox[1] / h * (roi['y2'] - roi['y1']) * h + roi['y1'] * h
-                        bbox[2] = bbox[2] / w * (roi['x2'] - roi['x1']) * w + roi['x1'] * w
-                        bbox[3] = bbox[3] / h * (roi['y2'] - roi['y1']) * h + roi['y1'] * h
-                    
-                    detection = {
-                        "bbox": {
-                            "x1": float(bbox[0]),
-                            "y1": float(bbox[1]),
-                            "x2": float(bbox[2]),
-                            "y2": float(bbox[3])
-                        },
-                        "confidence": conf,
-                        "class_id": cls,
-                        "class_name": name,
-                        "area": float((bbox[2] - bbox[0]) * (bbox[3] - bbox[1])),  # 计算面积
-                        "parent_idx": None,  # 用于存储父目标的索引
-                        "children": []  # 用于存储子目标列表
-                    }
-                    detections.append(detection)
+                detections.extend(self._parse_detection_result(result, transform))
             
             return detections
             
@@ -1979,6 +2589,143 @@ class YOLODetector:
             logger.error(f"处理帧失败: {str(e)}", exc_info=True)
             raise ProcessingException(f"处理帧失败: {str(e)}")
 
+    async def _infer_in_pool(
+        self,
+        model_code: str,
+        image: np.ndarray,
+        transform: Dict[str, float],
+        config: Dict[str, Any],
+        conf: float,
+        iou: float,
+        classes: Optional[List[int]]
+    ) -> List[Dict[str, Any]]:
+        """在推理工作池中推理一张（已裁剪的）图片"""
+        model_path = self._model_paths.get(model_code) or await self.get_model_path(model_code)
+        # 导出格式模型的输入尺寸固定
+        backend = self.backends.status.get(model_code, {}).get("backend", "torch")
+        imgsz = (config.get("imgsz") or settings.INFERENCE.imgsz) if backend == "torch" else settings.INFERENCE.imgsz
+        data, names = await self.worker_pool.infer(
+            model_code, model_path, image, {"conf": conf, "iou": iou, "classes": classes, "imgsz": imgsz}
+        )
+        return self._detections_from_array(data, names, transform)
+
+    def _create_model_group(
+        self,
+        models: List[Tuple[str, Any]],
+        config: Dict[str, Any]
+    ) -> List[Tuple[str, Any, Optional[LetterboxPreprocessor]]]:
+        """为多模型任务创建预处理器，输入尺寸和填充方式相同的模型共用一个预处理器
+        
+        Args:
+            models: [(模型代码, 模型)]，第一个为主模型
+            config: 检测配置
+        """
+        shared: Dict[Tuple, LetterboxPreprocessor] = {}
+        group = []
+        for code, model in models:
+            preprocessor = self._create_preprocessor(code, config)
+            if preprocessor is not None:
+                preprocessor = shared.setdefault((preprocessor.imgsz, preprocessor.auto), preprocessor)
+            group.append((code, model, preprocessor))
+        return group
+
+    async def _process_frame_multi(
+        self,
+        frame: np.ndarray,
+        group: List[Tuple[str, Any, Optional[LetterboxPreprocessor]]],
+        config: Dict[str, Any],
+        cascade: Optional[Dict[str, Any]] = None,
+        cascade_model: Optional[Any] = None
+    ) -> List[Dict[str, Any]]:
+        """在同一帧上运行多个模型并合并结果
+        
+        共用预处理器的模型只做一次ROI裁剪和letterbox；classes 只作用于主模型，
+        附加模型的类别过滤由 model_classes 按模型指定。级联模型在主模型检测框的
+        裁剪图上一次批量推理，结果挂到对应父目标的 children 下
+        
+        Args:
+            frame: 视频帧
+            group: _create_model_group 的结果
+            config: 检测配置
+            cascade: 级联配置
+            cascade_model: 级联模型
+        """
+        try:
+            conf, iou, classes = self._resolve_detection_params(config)
+            model_classes = config.get("model_classes") or {}
+            prepared: Dict[int, Tuple[Any, Dict[str, float]]] = {}
+            detections: List[Dict[str, Any]] = []
+            primary: List[Dict[str, Any]] = []
+            
+            # 推理工作池：各模型分派到不同工作进程并行推理
+            if self.worker_pool is not None:
+                cropped, transform = self._crop_roi(frame, config)
+                if cropped.nbytes <= self.worker_pool.slot_bytes:
+                    results = await asyncio.gather(*[
+                        self._infer_in_pool(
+                            code, cropped, dict(transform), config, conf, iou,
+                            classes if index == 0 else model_classes.get(code)
+                        )
+                        for index, (code, _, _) in enumerate(group)
+                    ])
+                    for (code, _, _), model_detections in zip(group, results):
+                        detections.extend(tag_detections(model_detections, code))
+                    primary = results[0]
+                    group = []  # 已在工作池中完成，跳过进程内推理
+            
+            for index, (code, model, preprocessor) in enumerate(group):
+                key = id(preprocessor)
+                if key not in prepared:
+                    if preprocessor is not None:
+                        cropped, transform = self._crop_roi(frame, config)
+                        model_input, letterbox_info = preprocessor.prepare([cropped])
+                        self._apply_letterbox([transform], letterbox_info)
+                    else:
+                        model_input, transform = self._prepare_detection_input(frame, config)
+                    prepared[key] = (model_input, transform)
+                model_input, transform = prepared[key]
+                
+                results = model(
+                    model_input,
+                    conf=conf,
+                    iou=iou,
+                    classes=classes if index == 0 else model_classes.get(code),
+                    verbose=False
+                )
+                model_detections = []
+                for result in results:
+                    model_detections.extend(self._parse_detection_result(result, transform))
+                tag_detections(model_detections, code)
+                if index == 0:
+                    primary = model_detections
+                detections.extend(model_detections)
+            
+            if cascade and cascade_model is not None and primary:
+                crops = cascade_crops(frame, primary, cascade)
+                if crops:
+                    # 导出格式模型的输入尺寸固定
+                    backend = self.backends.status.get(cascade["model_code"], {}).get("backend", "torch")
+                    results = cascade_model(
+                        [crop for _, crop, _ in crops],
+                        imgsz=cascade["imgsz"] if backend == "torch" else settings.INFERENCE.imgsz,
+                        conf=cascade.get("confidence") or conf,
+                        iou=iou,
+                        classes=cascade.get("classes"),
+                        verbose=False
+                    )
+                    for result, (parent_index, _, (x1, y1)) in zip(results, crops):
+                        transform = {"offset_x": float(x1), "offset_y": float(y1), "scale_x": 1.0, "scale_y": 1.0}
+                        children = tag_detections(self._parse_detection_result(result, transform), cascade["model_code"])
+                        for child in children:
+                            child["parent_idx"] = parent_index
+                        primary[parent_index]["children"].extend(children)
+            
+            return detections
+            
+        except Exception as e:
+            logger.error(f"多模型处理帧失败: {str(e)}", exc_info=True)
+            raise ProcessingException(f"多模型处理帧失败: {str(e)}")
+
     async def _send_callback(self, callback_urls: str, data: Dict[str, Any]) -> bool:
         """发送回调数据
         
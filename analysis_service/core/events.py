@@ -0,0 +1,222 @@
+"""
+报警事件去重模块
+按跟踪ID或“类别+位置”识别同一目标（多模型任务再加上来源模型，不同模型的类别ID互不相干），把逐帧检测结果转换为新目标、目标离开、数量变化等事件，
+画面不变时只发送心跳，避免同一目标被反复报警
+"""
+import time
+from typing import Dict, Any, List, Optional
+from shared.utils.logger import setup_logger
+from core.config import settings
+
+logger = setup_logger(__name__)
+
+class EventType:
+    """事件类型"""
+    OBJECT_NEW = "object_new"          # 新目标出现
+    OBJECT_LEFT = "object_left"        # 目标离开
+    OBJECT_REPEAT = "object_repeat"    # 目标持续存在，超过报警间隔后再次报警
+    COUNT_CHANGED = "count_changed"    # 某类目标数量变化
+
+def _bbox_iou(a: Dict[str, float], b: Dict[str, float]) -> float:
+    x1, y1 = max(a["x1"], b["x1"]), max(a["y1"], b["y1"])
+    x2, y2 = min(a["x2"], b["x2"]), min(a["y2"], b["y2"])
+    inter = max(0.0, x2 - x1) * max(0.0, y2 - y1)
+    union = (a["x2"] - a["x1"]) * (a["y2"] - a["y1"]) + (b["x2"] - b["x1"]) * (b["y2"] - b["y1"]) - inter
+    return inter / union if union > 0 else 0.0
+
+class EventDeduplicator:
+    """事件去重器
+
+    每路流一个实例，输入每次分析的检测结果，输出需要上报的事件
+    """
+
+    def __init__(
+        self,
+        alarm_interval: float = 60.0,
+        match_iou: float = 0.3,
+        leave_timeout: float = 5.0,
+        realarm: bool = True,
+        heartbeat_interval: float = 60.0,
+        clock=time.monotonic
+    ):
+        """初始化事件去重器
+
+        Args:
+            alarm_interval: 同一目标两次报警的最小间隔（秒），离开后在该时间内重新出现不视为新目标
+            match_iou: 无跟踪ID时，同类别检测框与已知目标IoU超过该值视为同一目标
+            leave_timeout: 目标连续消失超过该时长（秒）才判定离开，避免漏检抖动
+            realarm: 目标持续存在超过报警间隔后是否再次报警
+            heartbeat_interval: 画面无变化时的心跳回调间隔（秒）
+            clock: 单调时钟
+        """
+        self.alarm_interval = alarm_interval
+        self.match_iou = match_iou
+        self.leave_timeout = leave_timeout
+        self.realarm = realarm
+        self.heartbeat_interval = heartbeat_interval
+        self.clock = clock
+
+        self._objects: Dict[str, Dict[str, Any]] = {}
+        self._departed: Dict[str, Dict[str, Any]] = {}
+        self._counts: Dict[str, int] = {}
+        self._next_id = 0
+
+        self.event_counts: Dict[str, int] = {}
+        self.suppressed = 0
+
+    @staticmethod
+    def _scope(det: Dict[str, Any]) -> str:
+        """目标键和类别计数的模型前缀，单模型任务的检测结果没有 model_code，前缀为空"""
+        model_code = det.get("model_code")
+        return f"{model_code}/" if model_code else ""
+
+    def _match(self, det: Dict[str, Any], candidates: Dict[str, Dict[str, Any]], used: set) -> Optional[str]:
+        """为检测结果匹配已知目标，返回目标键"""
+        track_id = det.get("track_id")
+        if track_id is not None:
+            key = f"track:{self._scope(det)}{track_id}"
+            return key if key in candidates and key not in used else None
+
+        best_key, best_iou = None, self.match_iou
+        for key, obj in candidates.items():
+            if key in used or key.startswith("track:"):
+                continue
+            if obj["class_id"] != det["class_id"] or obj.get("model_code") != det.get("model_code"):
+                continue
+            iou = _bbox_iou(obj["bbox"], det["bbox"])
+            if iou >= best_iou:
+                best_key, best_iou = key, iou
+        return best_key
+
+    def _new_key(self, det: Dict[str, Any]) -> str:
+        track_id = det.get("track_id")
+        if track_id is not None:
+            return f"track:{self._scope(det)}{track_id}"
+        self._next_id += 1
+        return f"{self._scope(det)}{det['class_id']}:{self._next_id}"
+
+    def _event(self, event_type: str, obj: Dict[str, Any], **extra) -> Dict[str, Any]:
+        self.event_counts[event_type] = self.event_counts.get(event_type, 0) + 1
+        event = {
+            "type": event_type,
+            "object_id": obj.get("key"),
+            "class_id": obj.get("class_id"),
+            "class_name": obj.get("class_name"),
+            "bbox": obj.get("bbox"),
+            "confidence": obj.get("confidence")
+        }
+        if obj.get("model_code"):
+            event["model_code"] = obj["model_code"]
+        event.update(extra)
+        return event
+
+    def update(self, detections: List[Dict[str, Any]], now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """输入一次分析的检测结果，返回本次产生的事件
+
+        Args:
+            detections: 检测结果（原图像素坐标）
+            now: 当前时间（单调时钟秒），默认取 clock()
+
+        Returns:
+            List[Dict[str, Any]]: 事件列表，为空表示画面无变化
+        """
+        now = self.clock() if now is None else now
+        events: List[Dict[str, Any]] = []
+        used: set = set()
+
+        # 过期的离开记录
+        for key in [k for k, obj in self._departed.items() if now - obj["left_at"] > self.alarm_interval]:
+            del self._departed[key]
+
+        for det in detections:
+            key = self._match(det, self._objects, used)
+            revived = False
+            if key is None:
+                # 刚离开不久又出现（漏检、遮挡）的目标沿用原记录，不重复报新目标
+                key = self._match(det, self._departed, used)
+                revived = key is not None
+            if key is None:
+                key = self._new_key(det)
+
+            used.add(key)
+            obj = self._departed.pop(key, None) if revived else self._objects.get(key)
+            is_new = obj is None
+            if is_new:
+                obj = {"key": key, "first_seen": now, "last_alarm": None}
+            obj.update({
+                "model_code": det.get("model_code"),
+                "class_id": det["class_id"],
+                "class_name": det.get("class_name"),
+                "bbox": det["bbox"],
+                "confidence": det.get("confidence"),
+                "last_seen": now
+            })
+            self._objects[key] = obj
+
+            if is_new:
+                obj["last_alarm"] = now
+                events.append(self._event(EventType.OBJECT_NEW, obj))
+            elif revived:
+                self.suppressed += 1
+            elif self.realarm and obj["last_alarm"] is not None and now - obj["last_alarm"] >= self.alarm_interval:
+                obj["last_alarm"] = now
+                events.append(self._event(EventType.OBJECT_REPEAT, obj, duration=round(now - obj["first_seen"], 3)))
+            else:
+                self.suppressed += 1
+
+        # 消失超过离开超时的目标
+        for key in [k for k, obj in self._objects.items() if k not in used and now - obj["last_seen"] > self.leave_timeout]:
+            obj = self._objects.pop(key)
+            obj["left_at"] = now
+            self._departed[key] = obj
+            events.append(self._event(EventType.OBJECT_LEFT, obj, duration=round(obj["last_seen"] - obj["first_seen"], 3)))
+
+        # 按类别统计当前目标数（含离开超时内暂时漏检的目标），多模型任务按“模型/类别”分别统计
+        counts: Dict[str, int] = {}
+        for obj in self._objects.values():
+            name = self._scope(obj) + str(obj.get("class_name") or obj["class_id"])
+            counts[name] = counts.get(name, 0) + 1
+        for name in sorted(set(counts) | set(self._counts)):
+            previous, current = self._counts.get(name, 0), counts.get(name, 0)
+            if previous != current:
+                self.event_counts[EventType.COUNT_CHANGED] = self.event_counts.get(EventType.COUNT_CHANGED, 0) + 1
+                events.append({"type": EventType.COUNT_CHANGED, "class_name": name, "previous": previous, "current": current})
+        self._counts = counts
+
+        return events
+
+    @property
+    def counts(self) -> Dict[str, int]:
+        """当前各类别目标数"""
+        return dict(self._counts)
+
+    def stats(self) -> Dict[str, Any]:
+        """获取事件统计信息"""
+        return {
+            "active_objects": len(self._objects),
+            "events": dict(self.event_counts),
+            "suppressed": self.suppressed
+        }
+
+def create_event_deduplicator(config: Optional[Dict[str, Any]] = None, alarm_interval: float = 60.0) -> Optional[EventDeduplicator]:
+    """根据服务配置与任务配置创建事件去重器
+
+    Args:
+        config: 任务检测配置，可包含 events 字段覆盖服务级 EVENTS 配置
+        alarm_interval: 报警间隔（秒）
+
+    Returns:
+        Optional[EventDeduplicator]: 回调模式不是 change 时返回None
+    """
+    options = settings.EVENTS.dict()
+    options.update({k: v for k, v in ((config or {}).get("events") or {}).items() if v is not None})
+    if options.get("callback_mode") != "change":
+        return None
+
+    return EventDeduplicator(
+        alarm_interval=alarm_interval,
+        match_iou=options["match_iou"],
+        leave_timeout=options["leave_timeout"],
+        realarm=options["realarm"],
+        heartbeat_interval=options["heartbeat_interval"]
+    )
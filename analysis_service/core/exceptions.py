@@ -50,4 +50,14 @@ class ValidationException(AnalysisException):
 class StorageException(AnalysisException):
     """存储异常"""
     def __init__(self, message: str, data: Optional[Any] = None):
-        super().__init__(message, 500, data) 
\ No newline at end of file
+        super().__init__(message, 500, data) 
+
+class AuthenticationException(AnalysisException):
+    """认证失败异常"""
+    def __init__(self, message: str, data: Optional[Any] = None):
+        super().__init__(message, 401, data)
+
+class ForbiddenException(AnalysisException):
+    """禁止访问异常"""
+    def __init__(self, message: str, data: Optional[Any] = None):
+        super().__init__(message, 403, data)
@@ -0,0 +1,229 @@
+"""
+FFmpeg管道解码模块
+由 ffmpeg 子进程在解码器内完成降帧（fps 滤镜）和降分辨率（scale 滤镜），低频分析时只解码关键帧
+（-skip_frame nokey），原始BGR帧经管道读入预分配缓冲区；接口与流分析用到的 cv2.VideoCapture 方法一致。
+输出帧小于原始分辨率时通过 scale 属性把检测坐标还原到原图像素坐标
+"""
+import os
+import json
+import shutil
+import subprocess
+from typing import Any, Dict, Optional, Tuple
+import cv2
+import numpy as np
+from core.config import settings
+from shared.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+def ffmpeg_available() -> bool:
+    return shutil.which(settings.FFMPEG.ffmpeg_path) is not None and shutil.which(settings.FFMPEG.ffprobe_path) is not None
+
+def create_decoder_options(config: Optional[Dict[str, Any]], analysis_fps: Optional[float]) -> Optional[Dict[str, Any]]:
+    """根据任务的分析帧率和推理尺寸选择解码参数
+
+    Args:
+        config: 任务检测配置，decoder 为 auto（默认，按 FFMPEG.enabled）、ffmpeg 或 opencv
+        analysis_fps: 分析帧率，None 表示逐帧分析
+
+    Returns:
+        Optional[Dict[str, Any]]: 解码参数 fps / long_side / keyframes_only；使用 OpenCV 时返回None
+    """
+    config = config or {}
+    decoder = config.get("decoder") or "auto"
+    if decoder == "opencv" or (decoder == "auto" and not settings.FFMPEG.enabled):
+        return None
+
+    options = settings.FFMPEG
+    imgsz = config.get("imgsz") or settings.INFERENCE.imgsz
+    keyframes_only = analysis_fps is not None and analysis_fps <= options.keyframe_max_fps
+    fps = None
+    if analysis_fps is not None and not keyframes_only:
+        # 多解码一些帧，给调度抖动和QoS调整留余量
+        fps = round(analysis_fps * options.fps_margin, 3)
+    return {
+        "fps": fps,
+        "long_side": int(imgsz * options.scale_margin),
+        "keyframes_only": keyframes_only
+    }
+
+def _network_args(url: str) -> list:
+    return ["-rtsp_transport", "tcp"] if url.lower().startswith("rtsp://") else []
+
+def _parse_rate(value: Optional[str]) -> float:
+    try:
+        num, _, den = (value or "0/1").partition("/")
+        return float(num) / float(den or 1)
+    except (ValueError, ZeroDivisionError):
+        return 0.0
+
+def probe_stream(url: str) -> Optional[Dict[str, Any]]:
+    """用 ffprobe 读取源分辨率、帧率和时长"""
+    cmd = [
+        settings.FFMPEG.ffprobe_path, "-v", "error", *_network_args(url),
+        "-select_streams", "v:0",
+        "-show_entries", "stream=width,height,avg_frame_rate,r_frame_rate:format=duration",
+        "-of", "json", url
+    ]
+    try:
+        output = subprocess.run(cmd, capture_output=True, timeout=settings.FFMPEG.probe_timeout, check=True).stdout
+        info = json.loads(output)
+        stream = info["streams"][0]
+        fps = _parse_rate(stream.get("avg_frame_rate")) or _parse_rate(stream.get("r_frame_rate"))
+        return {
+            "width": int(stream["width"]),
+            "height": int(stream["height"]),
+            "fps": fps,
+            "duration": float(info.get("format", {}).get("duration") or 0)
+        }
+    except (subprocess.SubprocessError, OSError, ValueError, KeyError, IndexError) as e:
+        logger.warning(f"ffprobe 读取流信息失败: {str(e)}")
+        return None
+
+def output_size(width: int, height: int, long_side: Optional[int]) -> Tuple[int, int]:
+    """按长边缩放（只缩小不放大）"""
+    if not long_side or max(width, height) <= long_side:
+        return width, height
+    ratio = long_side / max(width, height)
+    return max(1, round(width * ratio)), max(1, round(height * ratio))
+
+class FFmpegCapture:
+    """ffmpeg 管道取流源"""
+
+    def __init__(self, url: str, fps: Optional[float] = None, long_side: Optional[int] = None, keyframes_only: bool = False):
+        """启动 ffmpeg 子进程
+
+        Args:
+            url: 流地址或视频文件
+            fps: 输出帧率，None 时保持源帧率
+            long_side: 输出长边（像素），None 时保持源分辨率
+            keyframes_only: 只解码关键帧
+        """
+        self.url = url
+        self.finished = False
+        self.scale = 1.0
+        self._process: Optional[subprocess.Popen] = None
+        self._buffer: Optional[np.ndarray] = None
+        self._has_frame = False
+        self._grabbed = 0
+        self._is_file = os.path.isfile(url)
+
+        probe = probe_stream(url)
+        if probe is None:
+            return
+        self.source_width, self.source_height = probe["width"], probe["height"]
+        self.width, self.height = output_size(self.source_width, self.source_height, long_side)
+        self.scale = self.source_width / self.width
+        self.fps = fps or probe["fps"] or 25.0
+        self.frame_count = int(probe["duration"] * self.fps) if probe["duration"] else 0
+
+        filters = []
+        if fps:
+            filters.append(f"fps={fps}")
+        if (self.width, self.height) != (self.source_width, self.source_height):
+            filters.append(f"scale={self.width}:{self.height}:flags={settings.FFMPEG.scale_flags}")
+        cmd = [settings.FFMPEG.ffmpeg_path, "-hide_banner", "-loglevel", "error", "-nostdin", *_network_args(url)]
+        if keyframes_only:
+            cmd += ["-skip_frame", "nokey"]
+        cmd += ["-i", url, "-an", "-sn", "-dn"]
+        if filters:
+            cmd += ["-vf", ",".join(filters)]
+        if keyframes_only:
+            # 关键帧间隔不固定，按解码出的帧原样输出，不补帧
+            cmd += ["-vsync", "passthrough"]
+        cmd += ["-pix_fmt", "bgr24", "-f", "rawvideo", "pipe:1"]
+
+        self._frame_bytes = self.width * self.height * 3
+        try:
+            self._process = subprocess.Popen(
+                cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, bufsize=self._frame_bytes
+            )
+        except OSError as e:
+            logger.error(f"启动 ffmpeg 失败: {str(e)}")
+            return
+        self._buffer = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        logger.info(
+            f"ffmpeg 解码: {self.source_width}x{self.source_height} -> {self.width}x{self.height}, "
+            f"fps={fps or '源帧率'}, 仅关键帧={keyframes_only}"
+        )
+
+    def isOpened(self) -> bool:
+        return self._process is not None and self._buffer is not None
+
+    @property
+    def pid(self) -> Optional[int]:
+        """ffmpeg 子进程号，用于统计解码CPU开销"""
+        return self._process.pid if self._process is not None else None
+
+    def grab(self) -> bool:
+        """从管道读满一帧到预分配缓冲区，未取用的帧不分配新内存"""
+        if not self.isOpened():
+            return False
+        view = memoryview(self._buffer.reshape(-1))
+        received = 0
+        while received < self._frame_bytes:
+            count = self._process.stdout.readinto(view[received:])
+            if not count:
+                self._has_frame = False
+                # 本地文件读到结尾视为正常结束，网络流交由调用方重连
+                if self._is_file:
+                    self.finished = True
+                return False
+            received += count
+        self._has_frame = True
+        self._grabbed += 1
+        return True
+
+    def retrieve(self) -> Tuple[bool, Optional[np.ndarray]]:
+        """取出已读入的帧；取出的数组交给调用方持有，后续帧读入新的缓冲区"""
+        if not self._has_frame:
+            return False, None
+        frame = self._buffer
+        self._buffer = np.empty_like(frame)
+        self._has_frame = False
+        return True, frame
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    def get(self, prop_id: int) -> float:
+        if not self.isOpened():
+            return 0.0
+        if prop_id == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.width)
+        if prop_id == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.height)
+        if prop_id == cv2.CAP_PROP_FPS:
+            return float(self.fps)
+        if prop_id == cv2.CAP_PROP_FRAME_COUNT:
+            return float(self.frame_count)
+        if prop_id == cv2.CAP_PROP_POS_FRAMES:
+            return float(self._grabbed)
+        return 0.0
+
+    def set(self, prop_id: int, value: float) -> bool:
+        return False
+
+    def release(self):
+        if self._process is not None:
+            if self._process.poll() is None:
+                self._process.kill()
+            self._process.stdout.close()
+            self._process.wait()
+            self._process = None
+        self._buffer = None
+
+def open_capture(url: str, options: Optional[Dict[str, Any]] = None):
+    """按解码参数打开取流源：可用时使用 ffmpeg 管道，ffmpeg 不存在或打开失败时回退到 OpenCV"""
+    if options is not None:
+        if ffmpeg_available():
+            capture = FFmpegCapture(url, options.get("fps"), options.get("long_side"), options.get("keyframes_only", False))
+            if capture.isOpened():
+                return capture
+            capture.release()
+            logger.warning(f"ffmpeg 打开失败，回退到 OpenCV: {url}")
+        else:
+            logger.warning("未找到 ffmpeg/ffprobe，回退到 OpenCV 解码")
+    return cv2.VideoCapture(url)
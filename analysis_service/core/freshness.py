@@ -0,0 +1,79 @@
+"""
+帧新鲜度统计模块
+记录每帧从采集到回调送达的端到端时延，按流统计分位数，
+并对超过最大帧龄的结果执行丢弃统计，用于按摄像头设定时效SLO
+"""
+import time
+from collections import deque
+from typing import Dict, Any, Optional
+from core.config import settings
+
+def _percentile(sorted_values, q: float) -> float:
+    """最近秩分位数"""
+    index = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+class FreshnessTracker:
+    """单路流的帧新鲜度统计
+
+    capture_ts 为帧从采集器读出时的挂钟时间，processed_ts 为结果回调返回（无回调时为处理完成）时的挂钟时间
+    """
+
+    def __init__(self, max_age: float = 0.0, window_size: int = 500):
+        """初始化新鲜度统计
+
+        Args:
+            max_age: 最大帧龄（秒），超过后非报警结果不再回调；0表示不限制
+            window_size: 参与分位数统计的最近帧数
+        """
+        self.max_age = max(0.0, float(max_age or 0.0))
+        self._ages = deque(maxlen=max(1, window_size))
+        self.last_age: Optional[float] = None
+        self.count = 0
+        self.stale_drops: Dict[str, int] = {}
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]] = None) -> "FreshnessTracker":
+        """根据任务配置创建，max_frame_age 未提供时使用服务级 FRESHNESS 配置"""
+        max_age = (config or {}).get("max_frame_age")
+        if max_age is None:
+            max_age = settings.FRESHNESS.max_age
+        return cls(max_age, settings.FRESHNESS.window_size)
+
+    def age(self, capture_ts: float, now: Optional[float] = None) -> float:
+        """帧龄（秒）"""
+        return max(0.0, (time.time() if now is None else now) - capture_ts)
+
+    def is_stale(self, capture_ts: float, now: Optional[float] = None) -> bool:
+        """帧龄是否超过最大帧龄"""
+        return self.max_age > 0 and self.age(capture_ts, now) > self.max_age
+
+    def record(self, capture_ts: float, processed_ts: float) -> float:
+        """记录一帧的端到端时延，返回时延（秒）"""
+        latency = max(0.0, processed_ts - capture_ts)
+        self._ages.append(latency)
+        self.last_age = latency
+        self.count += 1
+        return latency
+
+    def record_drop(self, stage: str):
+        """记录一次因帧过旧导致的丢弃"""
+        self.stale_drops[stage] = self.stale_drops.get(stage, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        """获取写入任务记录的新鲜度统计（毫秒）"""
+        result: Dict[str, Any] = {
+            "count": self.count,
+            "max_age_ms": round(self.max_age * 1000, 1) if self.max_age else None,
+            "last_ms": round(self.last_age * 1000, 1) if self.last_age is not None else None,
+            "stale_drops": dict(self.stale_drops)
+        }
+        if self._ages:
+            ages = sorted(self._ages)
+            result.update({
+                "p50_ms": round(_percentile(ages, 0.50) * 1000, 1),
+                "p95_ms": round(_percentile(ages, 0.95) * 1000, 1),
+                "p99_ms": round(_percentile(ages, 0.99) * 1000, 1),
+                "max_ms": round(ages[-1] * 1000, 1)
+            })
+        return result
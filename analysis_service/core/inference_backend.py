@@ -0,0 +1,341 @@
+"""
+推理后端模块
+在PyTorch权重之外提供ONNX Runtime / OpenVINO推理后端，首次使用时导出并缓存到模型目录
+"""
+import os
+import time
+import uuid
+import shutil
+from abc import ABC, abstractmethod
+from typing import Dict, Any, List, Tuple
+import cv2
+import numpy as np
+import torch
+from ultralytics import YOLO
+from shared.utils.logger import setup_logger
+from core.config import settings
+
+logger = setup_logger(__name__)
+
+class BaseInferenceBackend(ABC):
+    """推理后端基类"""
+
+    name = "base"
+
+    def __init__(self, model_code: str, weights_path: str, device: Any = "cpu"):
+        """初始化推理后端
+
+        Args:
+            model_code: 模型代码
+            weights_path: PyTorch权重路径（data/models/{code}/best.pt）
+            device: 推理设备
+        """
+        self.model_code = model_code
+        self.weights_path = weights_path
+        self.device = device
+
+    @property
+    @abstractmethod
+    def artifact_path(self) -> str:
+        """推理产物路径"""
+        pass
+
+    def prepare(self) -> str:
+        """确保推理产物存在，返回产物路径"""
+        return self.artifact_path
+
+    @abstractmethod
+    def load(self) -> YOLO:
+        """加载模型，返回与ultralytics YOLO调用方式一致的模型对象"""
+        pass
+
+class TorchBackend(BaseInferenceBackend):
+    """PyTorch后端，直接加载 .pt 权重"""
+
+    name = "torch"
+
+    @property
+    def artifact_path(self) -> str:
+        return self.weights_path
+
+    def load(self) -> YOLO:
+        model = YOLO(self.weights_path)
+        model.to(self.device)
+        return model
+
+class ExportedBackend(BaseInferenceBackend):
+    """导出格式后端基类，产物缓存在权重文件旁"""
+
+    export_format = ""
+    suffix = ""
+
+    @property
+    def artifact_path(self) -> str:
+        stem, _ = os.path.splitext(self.weights_path)
+        return f"{stem}{self.suffix}"
+
+    def _is_stale(self) -> bool:
+        """权重比导出产物更新时需要重新导出"""
+        if not os.path.exists(self.artifact_path):
+            return True
+        return os.path.getmtime(self.weights_path) > os.path.getmtime(self.artifact_path)
+
+    def prepare(self) -> str:
+        if not self._is_stale():
+            return self.artifact_path
+
+        logger.info(f"导出模型 {self.model_code} 为 {self.export_format} 格式: {self.weights_path}")
+        start = time.time()
+        # 在临时目录中导出后整体改名到约定位置，导出中途崩溃不会留下写了一半的产物
+        work_dir = f"{os.path.splitext(self.artifact_path)[0]}.export-{uuid.uuid4().hex[:8]}"
+        os.makedirs(work_dir)
+        try:
+            weights_copy = os.path.join(work_dir, os.path.basename(self.weights_path))
+            shutil.copy2(self.weights_path, weights_copy)
+            exported = YOLO(weights_copy).export(
+                format=self.export_format,
+                imgsz=settings.INFERENCE.imgsz,
+                half=False,
+                dynamic=False,
+                device="cpu"
+            )
+            if os.path.isdir(self.artifact_path):
+                shutil.rmtree(self.artifact_path)
+            os.replace(str(exported), self.artifact_path)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        logger.info(f"模型 {self.model_code} 导出完成，耗时 {time.time() - start:.1f}s: {self.artifact_path}")
+        return self.artifact_path
+
+    def load(self) -> YOLO:
+        # 导出格式不支持 .to(device)，设备由运行时自行选择
+        return YOLO(self.artifact_path, task="detect")
+
+class OnnxBackend(ExportedBackend):
+    """ONNX Runtime后端"""
+
+    name = "onnx"
+    export_format = "onnx"
+    suffix = ".onnx"
+
+class OpenVINOBackend(ExportedBackend):
+    """OpenVINO后端"""
+
+    name = "openvino"
+    export_format = "openvino"
+    suffix = "_openvino_model"
+
+BACKEND_MAP = {
+    "torch": TorchBackend,
+    "onnx": OnnxBackend,
+    "openvino": OpenVINOBackend
+}
+
+def create_backend(backend_type: str, model_code: str, weights_path: str, device: Any = "cpu") -> BaseInferenceBackend:
+    """创建推理后端实例
+
+    Args:
+        backend_type: 后端类型，支持 'torch'、'onnx'、'openvino'
+        model_code: 模型代码
+        weights_path: PyTorch权重路径
+        device: 推理设备
+
+    Returns:
+        BaseInferenceBackend: 推理后端实例
+    """
+    if backend_type not in BACKEND_MAP:
+        raise ValueError(f"不支持的推理后端: {backend_type}")
+    return BACKEND_MAP[backend_type](model_code, weights_path, device)
+
+def _box_iou(box1: np.ndarray, box2: np.ndarray) -> float:
+    """计算两个 [x1, y1, x2, y2] 边界框的IoU"""
+    x1, y1 = max(box1[0], box2[0]), max(box1[1], box2[1])
+    x2, y2 = min(box1[2], box2[2]), min(box1[3], box2[3])
+    inter = max(0.0, x2 - x1) * max(0.0, y2 - y1)
+    union = (box1[2] - box1[0]) * (box1[3] - box1[1]) + (box2[2] - box2[0]) * (box2[3] - box2[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+class InferenceBackendManager:
+    """推理后端管理器
+
+    按服务配置和模型级覆盖选择后端，导出失败、加载失败或自检不通过时回退到PyTorch
+    """
+
+    def __init__(self, device: Any = "cpu"):
+        self.device = device
+        self.status: Dict[str, Dict[str, Any]] = {}
+
+    def resolve_backend(self, model_code: str) -> str:
+        """获取模型应使用的后端类型"""
+        overrides = settings.INFERENCE.model_backends or {}
+        return overrides.get(model_code, settings.INFERENCE.backend)
+
+    def load(self, model_code: str, weights_path: str) -> YOLO:
+        """加载模型（同步阻塞，应在线程池中调用）
+
+        Args:
+            model_code: 模型代码
+            weights_path: PyTorch权重路径
+
+        Returns:
+            YOLO: 模型对象
+        """
+        backend_type = self.resolve_backend(model_code)
+        torch_backend = TorchBackend(model_code, weights_path, self.device)
+
+        if backend_type == TorchBackend.name:
+            self.status[model_code] = {"backend": TorchBackend.name}
+            return torch_backend.load()
+
+        status: Dict[str, Any] = {"backend": backend_type, "requested_backend": backend_type}
+        try:
+            backend = create_backend(backend_type, model_code, weights_path, self.device)
+            backend.prepare()
+            model = backend.load()
+
+            if settings.INFERENCE.self_test:
+                reference = torch_backend.load()
+                result = self.self_test(reference, model)
+                status["self_test"] = result
+                if not result["passed"]:
+                    raise RuntimeError(f"自检未通过: {result['reason']}")
+
+            status["artifact"] = backend.artifact_path
+            self.status[model_code] = status
+            logger.info(f"模型 {model_code} 使用 {backend_type} 推理后端")
+            return model
+
+        except Exception as e:
+            logger.warning(f"模型 {model_code} 使用 {backend_type} 后端失败，回退到PyTorch: {str(e)}")
+            status["backend"] = TorchBackend.name
+            status["fallback_reason"] = str(e)
+            self.status[model_code] = status
+            return torch_backend.load()
+
+    def self_test(self, reference: YOLO, candidate: YOLO) -> Dict[str, Any]:
+        """比较参考后端与候选后端在合成图片上的输出
+
+        主判据为NMS之前的原始输出张量：框坐标通道按输入尺寸归一化后的最大绝对差、
+        类别分数通道的最大绝对差均需在容差内。合成图片上通常检不出目标，检测框一致率只在
+        参考后端有检测框时作为附加判据，无检测框时记为不确定而不是一致
+
+        Args:
+            reference: PyTorch参考模型
+            candidate: 待验证模型
+
+        Returns:
+            Dict[str, Any]: 自检结果
+        """
+        options = settings.INFERENCE
+        imgsz = options.imgsz
+        image = self._synthetic_image(imgsz)
+
+        ref_raw = self._raw_output(reference, image, imgsz)
+        cand_raw = self._raw_output(candidate, image, imgsz)
+        if ref_raw.shape != cand_raw.shape:
+            return {
+                "passed": False,
+                "reason": f"原始输出形状不一致: {ref_raw.shape} != {cand_raw.shape}"
+            }
+        box_diff, score_diff = self._raw_diff(ref_raw, cand_raw, imgsz)
+        result: Dict[str, Any] = {
+            "box_diff": round(box_diff, 6),
+            "score_diff": round(score_diff, 6)
+        }
+        result.update(self._box_agreement(reference, candidate, image))
+
+        reasons = []
+        if not np.isfinite(box_diff) or box_diff > options.self_test_box_tolerance:
+            reasons.append(f"框坐标偏差 {box_diff:.4f} > {options.self_test_box_tolerance}")
+        if not np.isfinite(score_diff) or score_diff > options.self_test_score_tolerance:
+            reasons.append(f"分数偏差 {score_diff:.4f} > {options.self_test_score_tolerance}")
+        if result["agreement"] is not None and result["agreement"] < options.self_test_min_agreement:
+            reasons.append(f"一致率 {result['agreement']:.2f} < {options.self_test_min_agreement}")
+        result["passed"] = not reasons
+        result["reason"] = "; ".join(reasons) or None
+        return result
+
+    @staticmethod
+    def _raw_output(model: YOLO, image: np.ndarray, imgsz: int) -> np.ndarray:
+        """模型前向的原始输出（NMS之前）"""
+        # 先走一次预测以按相同参数初始化predictor，再复用其预处理直接前向
+        model.predict(image, imgsz=imgsz, verbose=False)
+        predictor = model.predictor
+        with torch.inference_mode():
+            output = predictor.model(predictor.preprocess([image]))
+        if isinstance(output, (list, tuple)):
+            output = output[0]
+        if isinstance(output, torch.Tensor):
+            output = output.detach().float().cpu().numpy()
+        return np.asarray(output, dtype=np.float32)
+
+    @staticmethod
+    def _raw_diff(ref_raw: np.ndarray, cand_raw: np.ndarray, imgsz: int) -> Tuple[float, float]:
+        """返回 (框坐标最大偏差/输入尺寸, 分数最大偏差)
+
+        检测头输出为 (1, 4 + 类别数, 候选框数)；其他布局按参考输出幅值计算相对偏差
+        """
+        diff = np.abs(ref_raw - cand_raw)
+        if ref_raw.ndim == 3 and ref_raw.shape[1] > 4:
+            return float(diff[:, :4].max()) / imgsz, float(diff[:, 4:].max())
+        relative = float(diff.max()) / max(float(np.abs(ref_raw).max()), 1e-6)
+        return relative, relative
+
+    def _box_agreement(self, reference: YOLO, candidate: YOLO, image: np.ndarray) -> Dict[str, Any]:
+        """以参考后端的检测框为基准，统计候选后端中同类别且IoU达标的匹配比例"""
+        conf = settings.INFERENCE.self_test_conf
+        ref_boxes = self._predict(reference, image, conf)
+        cand_boxes = self._predict(candidate, image, conf)
+
+        matched = 0
+        max_conf_diff = 0.0
+        for ref in ref_boxes:
+            best = None
+            for cand in cand_boxes:
+                if cand["class_id"] != ref["class_id"]:
+                    continue
+                iou = _box_iou(ref["bbox"], cand["bbox"])
+                if iou >= settings.INFERENCE.self_test_iou and (best is None or iou > best[0]):
+                    best = (iou, cand)
+            if best is not None:
+                matched += 1
+                max_conf_diff = max(max_conf_diff, abs(best[1]["confidence"] - ref["confidence"]))
+
+        # 参考后端没有检测框时无从比较，不作为一致
+        agreement = round(matched / max(len(ref_boxes), len(cand_boxes)), 4) if ref_boxes else None
+        return {
+            "agreement": agreement,
+            "reference_boxes": len(ref_boxes),
+            "candidate_boxes": len(cand_boxes),
+            "max_confidence_diff": round(max_conf_diff, 4)
+        }
+
+    @staticmethod
+    def _predict(model: YOLO, image: np.ndarray, conf: float) -> List[Dict[str, Any]]:
+        results = model(image, conf=conf, verbose=False)
+        boxes = []
+        for result in results:
+            for box in result.boxes:
+                boxes.append({
+                    "bbox": box.xyxy[0].cpu().numpy(),
+                    "confidence": float(box.conf[0]),
+                    "class_id": int(box.cls[0])
+                })
+        return boxes
+
+    @staticmethod
+    def _synthetic_image(size: int) -> np.ndarray:
+        """生成固定种子的合成测试图片（渐变背景加随机色块）"""
+        rng = np.random.default_rng(0)
+        gradient = np.linspace(0, 255, size, dtype=np.uint8)
+        image = np.dstack([
+            np.tile(gradient, (size, 1)),
+            np.tile(gradient[:, None], (1, size)),
+            np.full((size, size), 96, dtype=np.uint8)
+        ]).copy()
+        for _ in range(12):
+            x1, y1 = rng.integers(0, size - 64, 2)
+            w, h = rng.integers(24, 160, 2)
+            color = tuple(int(c) for c in rng.integers(0, 255, 3))
+            cv2.rectangle(image, (int(x1), int(y1)), (int(x1 + w), int(y1 + h)), color, -1)
+        return image
@@ -0,0 +1,107 @@
+"""
+推理工作进程入口
+工作进程以本模块作为主模块启动，只导入共享内存帧环和推理后端，不导入应用、路由和检测器
+"""
+import os
+from multiprocessing import shared_memory
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
+
+class FrameRing:
+    """共享内存帧环：固定数量、固定大小的槽位"""
+
+    def __init__(self, slots: int, slot_bytes: int, name: Optional[str] = None):
+        """创建或附加共享内存
+
+        Args:
+            slots: 槽位数
+            slot_bytes: 每个槽位字节数
+            name: 已有共享内存名称，为None时新建
+        """
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=slots * slot_bytes)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def view(self, slot: int, shape: Tuple[int, ...]) -> np.ndarray:
+        """槽位上的数组视图（不拷贝）"""
+        return np.ndarray(shape, dtype=np.uint8, buffer=self.shm.buf, offset=slot * self.slot_bytes)
+
+    def write(self, slot: int, frame: np.ndarray) -> Tuple[int, ...]:
+        """把帧写入槽位，返回形状；ROI裁剪得到的非连续视图也在这一次拷贝中完成"""
+        if frame.dtype != np.uint8 or frame.nbytes > self.slot_bytes:
+            raise ValueError(f"帧大小 {frame.nbytes} 超过槽位大小 {self.slot_bytes}")
+        np.copyto(self.view(slot, frame.shape), frame)
+        return frame.shape
+
+    def close(self):
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+def worker_main(
+    worker_id: int,
+    shm_name: str,
+    slots: int,
+    slot_bytes: int,
+    requests: Any,
+    responses: Any,
+    torch_threads: int,
+    device: str
+):
+    """推理工作进程入口"""
+    import cv2
+    import torch
+    from core.inference_backend import InferenceBackendManager
+
+    torch.set_num_threads(max(1, torch_threads))
+    cv2.setNumThreads(1)
+    ring = FrameRing(slots, slot_bytes, name=shm_name)
+    backends = InferenceBackendManager(device)
+    models: Dict[str, Any] = {}
+    responses.put(("ready", worker_id, os.getpid()))
+
+    try:
+        while True:
+            request = requests.get()
+            if request is None:
+                break
+            request_id, model_code, model_path, slot, shape, params = request
+            try:
+                # 权重文件被更新（模型服务上的新版本）时重新加载
+                mtime = os.path.getmtime(model_path)
+                loaded_mtime, model = models.get(model_code, (None, None))
+                first_use = model is None or loaded_mtime != mtime
+                if first_use:
+                    model = backends.load(model_code, model_path)
+                    models[model_code] = (mtime, model)
+                results = model(ring.view(slot, shape), verbose=False, **params)
+                boxes = results[0].boxes
+                if boxes is None or len(boxes) == 0:
+                    data = np.zeros((0, 6), dtype=np.float32)
+                else:
+                    data = np.column_stack([
+                        boxes.xyxy.cpu().numpy(),
+                        boxes.conf.cpu().numpy(),
+                        boxes.cls.cpu().numpy()
+                    ]).astype(np.float32)
+                # 类别名称每个模型只回传一次，由主进程缓存
+                names = dict(results[0].names) if first_use else None
+                responses.put((request_id, data, names, None))
+            except Exception as e:
+                responses.put((request_id, None, None, str(e)))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        try:
+            ring.close()
+        except BufferError:
+            # 推理结果仍引用共享内存视图，进程退出时由系统回收
+            pass
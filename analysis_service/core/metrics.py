@@ -0,0 +1,206 @@
+"""
+分析流水线指标模块
+按阶段记录耗时直方图（按任务、模型区分），以及丢帧、跳过推理、回调失败等计数，
+以 Prometheus 文本格式导出
+
+观测只在事件循环中进行，每次观测仅一次 perf_counter 差值与一次二分查找，开销可忽略
+"""
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from core.config import settings
+
+LabelValues = Tuple[str, ...]
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[Any], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class Counter:
+    """计数器"""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1.0):
+        self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def remove(self, predicate: Callable[[Dict[str, str]], bool]):
+        for key in [k for k in self._values if predicate(dict(zip(self.label_names, k)))]:
+            del self._values[key]
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for key, value in self._values.items():
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}")
+        return lines
+
+class Histogram:
+    """固定分桶直方图"""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = sorted(float(b) for b in buckets)
+        # 每组标签: [各分桶计数(最后一个为+Inf), 总和, 次数]
+        self._series: Dict[LabelValues, List[Any]] = {}
+
+    def observe(self, value: float, *label_values: str):
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def remove(self, predicate: Callable[[Dict[str, str]], bool]):
+        for key in [k for k in self._series if predicate(dict(zip(self.label_names, k)))]:
+            del self._series[key]
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        bounds = self.buckets + [float("inf")]
+        for key, (counts, total, count) in self._series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.label_names, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+class MetricsRegistry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics: List[Any] = []
+        self._gauges: Dict[str, Tuple[str, Callable[[], Dict[LabelValues, float]], Tuple[str, ...]]] = {}
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, documentation, label_names)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, label_names: Sequence[str] = (), buckets: Optional[Sequence[float]] = None) -> Histogram:
+        metric = Histogram(name, documentation, label_names, buckets or settings.METRICS.buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_gauge(self, name: str, documentation: str, provider: Callable[[], Any], label_names: Sequence[str] = ()):
+        """注册导出时取值的仪表
+
+        provider 无标签时返回数值，有标签时返回 {标签值元组: 数值}
+        """
+        self._gauges[name] = (documentation, provider, tuple(label_names))
+
+    def remove_task(self, task_id: str):
+        """移除某任务的全部序列，避免已结束任务的标签无限增长"""
+        for metric in self._metrics:
+            if "task_id" in metric.label_names:
+                metric.remove(lambda labels: labels.get("task_id") == task_id)
+
+    def render(self) -> str:
+        """导出 Prometheus 文本格式"""
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for name, (documentation, provider, label_names) in self._gauges.items():
+            try:
+                value = provider()
+            except Exception:
+                continue
+            if value is None:
+                continue
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} gauge")
+            values = value if isinstance(value, dict) else {(): value}
+            for key, item in values.items():
+                if item is not None:
+                    lines.append(f"{name}{_format_labels(label_names, key)} {_format_value(item)}")
+        return "\n".join(lines) + "\n"
+
+class StageTimer:
+    """阶段计时上下文，退出时把耗时（秒）记入阶段直方图"""
+
+    __slots__ = ("labels", "start")
+
+    def __init__(self, stage: str, task_id: str, model: str):
+        self.labels = (stage, task_id, model)
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        STAGE_LATENCY.observe(time.perf_counter() - self.start, *self.labels)
+        return False
+
+def task_label(task_id: str) -> str:
+    """按配置返回任务标签值；关闭按任务统计时各任务合并为按模型统计"""
+    return task_id if settings.METRICS.per_task else ""
+
+def time_stage(stage: str, task_id: str, model: str) -> StageTimer:
+    """为某个流水线阶段计时
+
+    Args:
+        stage: 阶段名（read、inference、roi_filter、render、encode、save、redis、callback 等）
+        task_id: 任务标签值，取 task_label() 的结果
+        model: 模型编码
+    """
+    return StageTimer(stage, task_id, model)
+
+# 进程内共享的指标注册表
+registry = MetricsRegistry()
+
+STAGE_LATENCY = registry.histogram(
+    "analysis_stage_latency_seconds",
+    "Latency of analysis pipeline stages",
+    ("stage", "task_id", "model")
+)
+FRAMES_ANALYZED = registry.counter(
+    "analysis_frames_analyzed_total",
+    "Frames decoded and analyzed by stream tasks",
+    ("task_id", "model")
+)
+FRAMES_DROPPED = registry.counter(
+    "analysis_frames_dropped_total",
+    "Frames read from streams but not analyzed",
+    ("task_id", "model", "reason")
+)
+INFERENCE_SKIPPED = registry.counter(
+    "analysis_inference_skipped_total",
+    "Analyzed frames whose inference was skipped",
+    ("task_id", "model", "reason")
+)
+STALE_DROPS = registry.counter(
+    "analysis_stale_drops_total",
+    "Results dropped because the frame exceeded the maximum frame age",
+    ("task_id", "model", "stage")
+)
+FRAME_AGE = registry.histogram(
+    "analysis_frame_age_seconds",
+    "Age of analyzed frames from capture to callback delivery",
+    ("task_id", "model")
+)
+CALLBACK_FAILURES = registry.counter(
+    "analysis_callback_failures_total",
+    "Failed result callbacks",
+    ("task_id", "model", "kind")
+)
@@ -0,0 +1,277 @@
+"""
+模型文件获取模块
+从模型服务流式下载模型到临时文件，校验后原子替换，并合并同一模型的并发下载请求；
+本地缓存按 MODEL_FETCH.revalidate_interval 用内容哈希向模型服务重新验证，模型更新后重新下载。
+文件写入、fsync 和哈希计算在线程池中执行，不阻塞事件循环
+"""
+import os
+import json
+import time
+import uuid
+import hashlib
+import zipfile
+import asyncio
+from typing import Dict, Any, Optional
+import aiohttp
+from shared.utils.logger import setup_logger
+from core.config import settings
+
+logger = setup_logger(__name__)
+
+class ModelFetcher:
+    """模型文件获取器"""
+
+    def __init__(self, base_url: str, api_prefix: str, cache_root: str = os.path.join("data", "models")):
+        """初始化模型获取器
+
+        Args:
+            base_url: 模型服务地址
+            api_prefix: 模型服务API前缀
+            cache_root: 本地模型缓存根目录
+        """
+        self.base_url = base_url
+        self.api_prefix = api_prefix
+        self.cache_root = cache_root
+        self.chunk_size = settings.MODEL_FETCH.chunk_size
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._validated_at: Dict[str, float] = {}
+
+        # 下载指标
+        self.metrics: Dict[str, Any] = {
+            "cache_hits": 0,
+            "revalidations": 0,
+            "revalidation_failures": 0,
+            "downloads": 0,
+            "download_failures": 0,
+            "coalesced_requests": 0,
+            "bytes_downloaded": 0,
+            "download_seconds": 0.0,
+            "last_download": None
+        }
+
+    def model_path(self, model_code: str) -> str:
+        """本地模型文件路径"""
+        return os.path.join(self.cache_root, model_code, "best.pt")
+
+    def meta_path(self, model_code: str) -> str:
+        """本地模型元数据路径"""
+        return f"{self.model_path(model_code)}.meta.json"
+
+    def get_meta(self, model_code: str) -> Optional[Dict[str, Any]]:
+        """读取本地模型元数据"""
+        try:
+            with open(self.meta_path(model_code), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def get_version(self, model_code: str) -> Optional[str]:
+        """获取本地模型版本标识（内容哈希或ETag）"""
+        meta = self.get_meta(model_code)
+        if not meta:
+            return None
+        return meta.get("sha256") or meta.get("etag")
+
+    def _check_cache(self, model_code: str) -> bool:
+        """检查本地缓存是否有效"""
+        model_path = self.model_path(model_code)
+        if not os.path.exists(model_path):
+            return False
+
+        meta = self.get_meta(model_code)
+        if meta:
+            if meta.get("size") == os.path.getsize(model_path):
+                return True
+            logger.warning(f"模型 {model_code} 文件大小与元数据不一致，重新下载")
+            return False
+
+        # 旧版本缓存没有元数据: .pt 为zip格式，截断文件缺少中央目录，无法通过检查
+        if zipfile.is_zipfile(model_path):
+            self._write_meta(model_code, {
+                "size": os.path.getsize(model_path),
+                "sha256": self._file_sha256(model_path),
+                "source": "legacy_cache"
+            })
+            return True
+
+        logger.warning(f"模型 {model_code} 本地缓存已损坏，删除后重新下载: {model_path}")
+        os.remove(model_path)
+        return False
+
+    def revalidation_due(self, model_code: str) -> bool:
+        """本地缓存是否到了需要向模型服务重新验证的时间"""
+        interval = settings.MODEL_FETCH.revalidate_interval
+        if interval < 0:
+            return False
+        return time.time() - self._validated_at.get(model_code, 0.0) >= interval
+
+    async def fetch(self, model_code: str) -> str:
+        """获取模型文件路径
+
+        本地无有效缓存时从模型服务下载；有缓存且到了重新验证时间时携带内容哈希做条件请求，
+        模型未更新时不传输文件。同一模型的并发请求只触发一次下载
+
+        Args:
+            model_code: 模型代码
+
+        Returns:
+            str: 本地模型文件路径
+        """
+        loop = asyncio.get_running_loop()
+        cached = await loop.run_in_executor(None, self._check_cache, model_code)
+        if cached and not self.revalidation_due(model_code):
+            self.metrics["cache_hits"] += 1
+            return self.model_path(model_code)
+
+        task = self._inflight.get(model_code)
+        if task is not None:
+            self.metrics["coalesced_requests"] += 1
+            logger.info(f"模型 {model_code} 正在下载，等待已有下载完成")
+            return await asyncio.shield(task)
+
+        meta = self.get_meta(model_code) if cached else None
+        task = asyncio.create_task(self._download(model_code, meta))
+        self._inflight[model_code] = task
+        try:
+            return await asyncio.shield(task)
+        finally:
+            if task.done():
+                self._inflight.pop(model_code, None)
+            else:
+                task.add_done_callback(lambda _: self._inflight.pop(model_code, None))
+
+    async def _download(self, model_code: str, cached_meta: Optional[Dict[str, Any]] = None) -> str:
+        """流式下载模型到临时文件，校验后原子替换
+
+        Args:
+            model_code: 模型代码
+            cached_meta: 本地缓存元数据，提供时为重新验证：模型服务返回304或内容哈希与本地一致时沿用缓存，
+                模型服务不可用时也沿用缓存
+        """
+        api_url = f"{self.base_url}{self.api_prefix}/models/download?code={model_code}"
+        model_path = self.model_path(model_code)
+        os.makedirs(os.path.dirname(model_path), exist_ok=True)
+        tmp_path = f"{model_path}.{uuid.uuid4().hex[:8]}.tmp"
+        loop = asyncio.get_running_loop()
+
+        headers = {}
+        cached_sha256 = (cached_meta or {}).get("sha256")
+        if cached_meta is not None:
+            etag = cached_meta.get("etag") or (f'"{cached_sha256}"' if cached_sha256 else None)
+            if etag:
+                headers["If-None-Match"] = etag
+            logger.info(f"重新验证本地缓存模型: {api_url}")
+        else:
+            logger.info(f"开始从模型服务下载: {api_url}")
+        start = time.time()
+        size = 0
+        digest = hashlib.sha256()
+
+        try:
+            timeout = aiohttp.ClientTimeout(total=settings.MODEL_FETCH.timeout)
+            async with aiohttp.ClientSession(timeout=timeout) as session:
+                async with session.get(api_url, headers=headers) as response:
+                    expected_sha256 = response.headers.get("X-Content-SHA256")
+                    if cached_meta is not None and (
+                        response.status == 304
+                        or (response.status == 200 and expected_sha256 and expected_sha256.lower() == cached_sha256)
+                    ):
+                        # 模型未更新，不读取响应体
+                        self._validated_at[model_code] = time.time()
+                        self.metrics["revalidations"] += 1
+                        return model_path
+                    if response.status != 200:
+                        error_msg = await response.text()
+                        raise Exception(f"模型下载失败: HTTP {response.status} - {error_msg}")
+
+                    # 经过压缩传输时Content-Length为压缩后大小，无法用于校验
+                    expected_size = None if response.headers.get("Content-Encoding") else response.headers.get("Content-Length")
+                    etag = response.headers.get("ETag")
+
+                    f = await loop.run_in_executor(None, open, tmp_path, "wb")
+                    try:
+                        async for chunk in response.content.iter_chunked(self.chunk_size):
+                            await loop.run_in_executor(None, self._write_chunk, f, digest, chunk)
+                            size += len(chunk)
+                        await loop.run_in_executor(None, self._sync_file, f)
+                    finally:
+                        f.close()
+
+            sha256 = digest.hexdigest()
+            if expected_size is not None and int(expected_size) != size:
+                raise Exception(f"模型文件不完整: 期望 {expected_size} 字节，实际 {size} 字节")
+            if expected_sha256 and expected_sha256.lower() != sha256:
+                raise Exception(f"模型文件哈希校验失败: 期望 {expected_sha256}，实际 {sha256}")
+
+            os.replace(tmp_path, model_path)
+            await loop.run_in_executor(None, self._write_meta, model_code, {
+                "size": size,
+                "sha256": sha256,
+                "etag": etag,
+                "downloaded_at": time.time()
+            })
+            self._validated_at[model_code] = time.time()
+            if cached_meta is not None:
+                logger.info(f"模型 {model_code} 已更新: {cached_sha256} -> {sha256}")
+
+            elapsed = time.time() - start
+            self.metrics["downloads"] += 1
+            self.metrics["bytes_downloaded"] += size
+            self.metrics["download_seconds"] += elapsed
+            self.metrics["last_download"] = {
+                "model_code": model_code,
+                "bytes": size,
+                "seconds": round(elapsed, 3),
+                "throughput_mbps": round(size * 8 / elapsed / 1e6, 2) if elapsed > 0 else None
+            }
+            logger.info(f"模型下载成功并保存到: {model_path} ({size} 字节, {elapsed:.2f}s)")
+            return model_path
+
+        except Exception as e:
+            if cached_meta is not None:
+                # 重新验证失败时沿用本地缓存，到下一个验证周期再试
+                self._validated_at[model_code] = time.time()
+                self.metrics["revalidation_failures"] += 1
+                logger.warning(f"重新验证模型 {model_code} 失败，沿用本地缓存: {str(e)}")
+                return model_path
+            self.metrics["download_failures"] += 1
+            if isinstance(e, aiohttp.ClientError):
+                raise Exception(f"请求模型服务失败: {str(e)}")
+            raise
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _write_meta(self, model_code: str, meta: Dict[str, Any]):
+        """原子写入模型元数据"""
+        meta_path = self.meta_path(model_code)
+        tmp_path = f"{meta_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+
+    @staticmethod
+    def _write_chunk(f: Any, digest: Any, chunk: bytes):
+        f.write(chunk)
+        digest.update(chunk)
+
+    @staticmethod
+    def _sync_file(f: Any):
+        f.flush()
+        os.fsync(f.fileno())
+
+    @staticmethod
+    def _file_sha256(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """获取下载指标"""
+        metrics = dict(self.metrics)
+        seconds = metrics["download_seconds"]
+        metrics["avg_throughput_mbps"] = round(metrics["bytes_downloaded"] * 8 / seconds / 1e6, 2) if seconds > 0 else None
+        metrics["inflight"] = list(self._inflight.keys())
+        return metrics
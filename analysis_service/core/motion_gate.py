@@ -0,0 +1,205 @@
+"""
+运动门控模块
+在推理前对画面做低成本的运动检测，静止场景跳过YOLO推理并复用上一次的检测结果
+"""
+import time
+import cv2
+import numpy as np
+from typing import Dict, Any, Optional
+from shared.utils.logger import setup_logger
+from core.config import settings
+
+logger = setup_logger(__name__)
+
+class MotionGate:
+    """运动门控
+
+    支持两种运动评估方式：
+    - diff: 降采样灰度帧与上一次推理帧做帧差
+    - mog2: 降采样灰度帧输入背景建模器，取前景像素占比
+    """
+
+    def __init__(
+        self,
+        method: str = "diff",
+        downscale_width: int = 160,
+        pixel_threshold: int = 25,
+        motion_ratio: float = 0.002,
+        max_skip_duration: float = 30.0,
+        blur_size: int = 5,
+        roi_type: int = 0,
+        roi: Optional[Dict[str, Any]] = None
+    ):
+        """初始化运动门控
+
+        Args:
+            method: 运动评估方式，'diff' 或 'mog2'
+            downscale_width: 降采样后的宽度（像素）
+            pixel_threshold: 判定像素变化的灰度差阈值
+            motion_ratio: 变化像素占比超过该值时认为有运动
+            max_skip_duration: 最长跳过时长（秒），超过后强制推理刷新
+            blur_size: 高斯模糊核大小，用于抑制噪声，0表示不模糊
+            roi_type: ROI类型: 0-无ROI, 1-矩形, 2-多边形, 3-线段
+            roi: 感兴趣区域（归一化坐标），只统计区域内的运动
+        """
+        if method not in ("diff", "mog2"):
+            raise ValueError(f"不支持的运动评估方式: {method}")
+
+        self.method = method
+        self.downscale_width = downscale_width
+        self.pixel_threshold = pixel_threshold
+        self.motion_ratio = motion_ratio
+        self.max_skip_duration = max_skip_duration
+        self.blur_size = blur_size if blur_size and blur_size % 2 == 1 else 0
+        self.roi_type = roi_type or 0
+        self.roi = roi
+
+        self._reference: Optional[np.ndarray] = None
+        self._mask: Optional[np.ndarray] = None
+        self._mask_area = 0
+        self._mask_shape = None
+        self._subtractor = None
+        self._last_inference_time = 0.0
+
+        # 统计信息
+        self.checked_frames = 0
+        self.skipped_frames = 0
+        self.forced_refreshes = 0
+        self.last_score = 0.0
+
+    def _prepare(self, frame: np.ndarray) -> np.ndarray:
+        """降采样并转换为灰度图"""
+        h, w = frame.shape[:2]
+        scale = min(1.0, self.downscale_width / float(w))
+        small = cv2.resize(
+            frame,
+            (max(1, int(w * scale)), max(1, int(h * scale))),
+            interpolation=cv2.INTER_AREA
+        )
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+        if self.blur_size:
+            gray = cv2.GaussianBlur(gray, (self.blur_size, self.blur_size), 0)
+        return gray
+
+    def _build_mask(self, shape) -> None:
+        """根据ROI构建统计掩码：矩形(1)和多边形(2)只统计区域内变化，线段(3)及无ROI统计整帧"""
+        h, w = shape[:2]
+        roi = self.roi or {}
+        mask = None
+
+        if self.roi_type == 2 and roi.get("points"):
+            mask = np.zeros((h, w), dtype=np.uint8)
+            points = np.array([(int(p[0] * w), int(p[1] * h)) for p in roi["points"]], np.int32)
+            cv2.fillPoly(mask, [points.reshape((-1, 1, 2))], 255)
+        elif self.roi_type == 1 and all(k in roi for k in ("x1", "y1", "x2", "y2")):
+            mask = np.zeros((h, w), dtype=np.uint8)
+            x1, y1 = int(roi["x1"] * w), int(roi["y1"] * h)
+            x2, y2 = int(roi["x2"] * w), int(roi["y2"] * h)
+            mask[y1:y2, x1:x2] = 255
+
+        if mask is not None and cv2.countNonZero(mask) > 0:
+            self._mask = mask
+            self._mask_area = cv2.countNonZero(mask)
+        else:
+            self._mask = None
+            self._mask_area = h * w
+
+    def _score(self, gray: np.ndarray) -> float:
+        """计算运动分数（变化像素占比）"""
+        if self.method == "mog2":
+            if self._subtractor is None:
+                self._subtractor = cv2.createBackgroundSubtractorMOG2(detectShadows=False)
+            foreground = self._subtractor.apply(gray)
+            _, changed = cv2.threshold(foreground, 127, 255, cv2.THRESH_BINARY)
+        else:
+            if self._reference is None:
+                return 1.0
+            diff = cv2.absdiff(gray, self._reference)
+            _, changed = cv2.threshold(diff, self.pixel_threshold, 255, cv2.THRESH_BINARY)
+
+        if self._mask is not None:
+            changed = cv2.bitwise_and(changed, self._mask)
+        return cv2.countNonZero(changed) / float(self._mask_area or 1)
+
+    def check(self, frame: np.ndarray) -> bool:
+        """判断当前帧是否需要执行推理
+
+        Args:
+            frame: BGR图像
+
+        Returns:
+            bool: True表示需要推理，False表示可以跳过并复用上一次结果
+        """
+        self.checked_frames += 1
+        now = time.time()
+
+        try:
+            gray = self._prepare(frame)
+            if self._mask_shape != gray.shape:
+                # 首帧或分辨率变化时重建掩码和参考帧
+                self._build_mask(gray.shape)
+                self._mask_shape = gray.shape
+                self._reference = None
+
+            self.last_score = self._score(gray)
+        except Exception as e:
+            logger.warning(f"运动门控计算失败，执行推理: {str(e)}")
+            self._last_inference_time = now
+            return True
+
+        if self._reference is None and self.method == "diff":
+            run_inference = True
+        elif self.last_score >= self.motion_ratio:
+            run_inference = True
+        elif now - self._last_inference_time >= self.max_skip_duration:
+            self.forced_refreshes += 1
+            run_inference = True
+        else:
+            run_inference = False
+
+        if run_inference:
+            # 以最近一次推理帧为参考，缓慢移动的目标也会逐步累积出差异
+            self._reference = gray
+            self._last_inference_time = now
+        else:
+            self.skipped_frames += 1
+
+        return run_inference
+
+    def stats(self) -> Dict[str, Any]:
+        """获取门控统计信息"""
+        return {
+            "method": self.method,
+            "checked_frames": self.checked_frames,
+            "skipped_frames": self.skipped_frames,
+            "forced_refreshes": self.forced_refreshes,
+            "skip_ratio": round(self.skipped_frames / self.checked_frames, 4) if self.checked_frames else 0.0,
+            "last_score": round(self.last_score, 6)
+        }
+
+def create_motion_gate(config: Optional[Dict[str, Any]] = None) -> Optional[MotionGate]:
+    """根据服务配置与任务配置创建运动门控
+
+    Args:
+        config: 任务检测配置，可包含 motion_gate 字段覆盖服务级配置
+
+    Returns:
+        Optional[MotionGate]: 未启用时返回None
+    """
+    config = config or {}
+    options = settings.MOTION_GATE.dict()
+    options.update(config.get("motion_gate") or {})
+
+    if not options.pop("enabled", False):
+        return None
+
+    return MotionGate(
+        method=options.get("method", "diff"),
+        downscale_width=options.get("downscale_width", 160),
+        pixel_threshold=options.get("pixel_threshold", 25),
+        motion_ratio=options.get("motion_ratio", 0.002),
+        max_skip_duration=options.get("max_skip_duration", 30.0),
+        blur_size=options.get("blur_size", 5),
+        roi_type=config.get("roi_type", 0) if options.get("use_roi", True) else 0,
+        roi=config.get("roi") if options.get("use_roi", True) else None
+    )
@@ -0,0 +1,91 @@
+"""
+多模型分析模块
+一路流在同一帧上依次运行多个模型，输入尺寸相同的模型共用一次预处理结果，
+检测结果按模型标记后合并；可选级联模式在主模型检测框的裁剪图上批量运行二级模型
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from core.config import settings
+from core.exceptions import InvalidInputException
+
+def resolve_model_codes(model_code: str, model_codes: Optional[List[str]] = None) -> List[str]:
+    """合并主模型与附加模型，去重并保持顺序，主模型始终排在第一位"""
+    codes = [model_code]
+    for code in model_codes or []:
+        if code and code not in codes:
+            codes.append(code)
+    if len(codes) > settings.MULTI_MODEL.max_models:
+        raise InvalidInputException(f"单个任务最多同时运行 {settings.MULTI_MODEL.max_models} 个模型")
+    return codes
+
+def create_cascade_options(config: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """合并服务级 MULTI_MODEL 级联默认值与任务配置
+
+    Args:
+        config: 任务检测配置，可包含 cascade 字段
+
+    Returns:
+        Optional[Dict[str, Any]]: 未配置级联模型时返回None
+    """
+    cascade = (config or {}).get("cascade") or {}
+    if not cascade.get("model_code"):
+        return None
+    defaults = settings.MULTI_MODEL
+    options = {
+        "imgsz": defaults.cascade_imgsz,
+        "padding": defaults.cascade_padding,
+        "min_size": defaults.cascade_min_size,
+        "max_crops": defaults.cascade_max_crops,
+        "parent_classes": None,
+        "classes": None,
+        "confidence": None
+    }
+    options.update({k: v for k, v in cascade.items() if v is not None})
+    return options
+
+def tag_detections(detections: List[Dict[str, Any]], model_code: str) -> List[Dict[str, Any]]:
+    """为检测结果标记来源模型（原地修改）"""
+    for det in detections:
+        det["model_code"] = model_code
+    return detections
+
+def cascade_crops(
+    frame: np.ndarray,
+    parents: List[Dict[str, Any]],
+    options: Dict[str, Any]
+) -> List[Tuple[int, np.ndarray, Tuple[int, int]]]:
+    """按父目标检测框裁剪二级模型输入
+
+    检测框按比例外扩后裁剪，过小的框跳过；父目标过多时只取置信度最高的 max_crops 个
+
+    Args:
+        frame: 原始帧
+        parents: 主模型检测结果（原图像素坐标）
+        options: 级联配置
+
+    Returns:
+        List[Tuple[int, np.ndarray, Tuple[int, int]]]: (父目标索引, 裁剪图, 裁剪左上角坐标)
+    """
+    height, width = frame.shape[:2]
+    parent_classes = options.get("parent_classes")
+    candidates = [
+        (index, det) for index, det in enumerate(parents)
+        if parent_classes is None or det["class_id"] in parent_classes
+    ]
+    candidates.sort(key=lambda item: item[1]["confidence"], reverse=True)
+
+    crops = []
+    for index, det in candidates[:options["max_crops"]]:
+        bbox = det["bbox"]
+        box_w, box_h = bbox["x2"] - bbox["x1"], bbox["y2"] - bbox["y1"]
+        if min(box_w, box_h) < options["min_size"]:
+            continue
+        pad_x, pad_y = box_w * options["padding"], box_h * options["padding"]
+        x1 = max(0, int(bbox["x1"] - pad_x))
+        y1 = max(0, int(bbox["y1"] - pad_y))
+        x2 = min(width, int(bbox["x2"] + pad_x))
+        y2 = min(height, int(bbox["y2"] + pad_y))
+        if x2 <= x1 or y2 <= y1:
+            continue
+        crops.append((index, frame[y1:y2, x1:x2], (x1, y1)))
+    return crops
@@ -0,0 +1,142 @@
+"""
+模型预加载模块
+服务启动时在后台下载、加载并预热模型，避免新任务首帧承担冷启动开销
+"""
+import time
+import asyncio
+from typing import Dict, Any, List
+import numpy as np
+from shared.utils.logger import setup_logger
+from core.config import settings
+from core.task_queue import TaskStatus
+
+logger = setup_logger(__name__)
+
+class ModelStatus:
+    """模型就绪状态"""
+    PENDING = "pending"    # 等待预加载
+    LOADING = "loading"    # 下载/加载中
+    WARMING = "warming"    # 预热中
+    READY = "ready"        # 已就绪
+    FAILED = "failed"      # 加载失败
+
+class ModelPreloader:
+    """模型预加载器"""
+
+    def __init__(self, detector):
+        """初始化预加载器
+
+        Args:
+            detector: YOLODetector实例，预加载的模型进入其模型缓存
+        """
+        self.detector = detector
+        self.models: Dict[str, Dict[str, Any]] = {}
+        self.finished = False
+
+    async def collect_model_codes(self) -> List[str]:
+        """收集需要预加载的模型代码：配置列表 + Redis中可恢复任务使用的模型"""
+        codes = list(settings.PRELOAD.model_codes or [])
+
+        if settings.PRELOAD.from_redis:
+            try:
+                keys = await self.detector.redis.scan_keys("task:*")
+                for key in keys:
+                    # 跳过 task:{id}:callbacks 等附属键
+                    if key.count(":") != 1:
+                        continue
+                    task_info = await self.detector.redis.get_value(key, as_json=True)
+                    if not isinstance(task_info, dict):
+                        continue
+                    if task_info.get("status") not in (TaskStatus.WAITING, TaskStatus.PROCESSING):
+                        continue
+                    # 主模型、多模型任务的附加模型和级联二级模型
+                    cascade = (task_info.get("config") or {}).get("cascade") or {}
+                    task_codes = [task_info.get("model_code"), *(task_info.get("model_codes") or []), cascade.get("model_code")]
+                    for model_code in task_codes:
+                        if model_code and model_code not in codes:
+                            codes.append(model_code)
+            except Exception as e:
+                logger.warning(f"从Redis收集预加载模型失败: {str(e)}")
+
+        return codes
+
+    async def run(self):
+        """执行预加载（后台任务）"""
+        try:
+            codes = await self.collect_model_codes()
+            if not codes:
+                logger.info("没有需要预加载的模型")
+                return
+
+            logger.info(f"开始预加载模型: {codes}")
+            for code in codes:
+                self.models.setdefault(code, {"status": ModelStatus.PENDING})
+
+            semaphore = asyncio.Semaphore(max(1, settings.PRELOAD.concurrency))
+
+            async def preload(code: str):
+                async with semaphore:
+                    await self.preload_model(code)
+
+            await asyncio.gather(*(preload(code) for code in codes))
+            ready = sum(1 for m in self.models.values() if m["status"] == ModelStatus.READY)
+            logger.info(f"模型预加载完成: {ready}/{len(codes)} 就绪")
+
+        except Exception as e:
+            logger.error(f"模型预加载失败: {str(e)}", exc_info=True)
+        finally:
+            self.finished = True
+
+    async def preload_model(self, model_code: str):
+        """下载、加载并预热单个模型"""
+        state = self.models.setdefault(model_code, {})
+        state["status"] = ModelStatus.LOADING
+        start = time.time()
+
+        async def warmup(model):
+            state["load_time"] = round(time.time() - start, 3)
+            state["backend"] = self.detector.backends.status.get(model_code, {}).get("backend")
+            state["status"] = ModelStatus.WARMING
+            warmup_start = time.time()
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._warmup, model)
+            state["warmup_time"] = round(time.time() - warmup_start, 3)
+
+        try:
+            # 预热在模型发布到模型缓存之前完成，不会与已在使用该模型的推理并发调用同一个模型对象；
+            # 模型已被任务加载时不再预热
+            await self.detector.get_model(model_code, on_loaded=warmup)
+            state.setdefault("load_time", round(time.time() - start, 3))
+            state.setdefault("warmup_time", 0.0)
+            state["status"] = ModelStatus.READY
+            state["ready_at"] = time.time()
+            logger.info(f"模型 {model_code} 已就绪，加载 {state['load_time']}s，预热 {state['warmup_time']}s")
+
+        except Exception as e:
+            state["status"] = ModelStatus.FAILED
+            state["error"] = str(e)
+            logger.error(f"预加载模型 {model_code} 失败: {str(e)}")
+
+    @staticmethod
+    def _warmup(model):
+        """在配置的输入尺寸上执行若干次推理，触发懒初始化"""
+        imgsz = settings.PRELOAD.imgsz or settings.INFERENCE.imgsz
+        image = np.zeros((imgsz, imgsz, 3), dtype=np.uint8)
+        for _ in range(max(1, settings.PRELOAD.warmup_runs)):
+            model(image, imgsz=imgsz, verbose=False)
+
+    def get_status(self) -> Dict[str, Any]:
+        """获取模型就绪状态
+
+        运行中按需加载的模型也视为就绪
+        """
+        models = {code: dict(state) for code, state in self.models.items()}
+        for code in list(self.detector._models.keys()):
+            models.setdefault(code, {"status": ModelStatus.READY})
+
+        return {
+            "preload_finished": self.finished,
+            # 预加载结束前尚未收集到模型列表，不能视为就绪
+            "ready": self.finished and all(m.get("status") == ModelStatus.READY for m in models.values()),
+            "models": models
+        }
@@ -0,0 +1,138 @@
+"""
+图片预处理模块
+保持长宽比的letterbox缩放，直接写入预分配的CHW浮点缓冲区并以张量交给模型，
+避免拉伸变形以及ultralytics内部的二次缩放
+
+letterbox_geometry 的几何计算移植自仓库根目录 utils/preprocess.py 的 letterbox（分析服务镜像只包含 analysis_service 与 shared）
+"""
+import math
+from typing import Any, Dict, List, Optional, Tuple
+import cv2
+import numpy as np
+import torch
+
+def letterbox_geometry(shape, new_shape=(640, 640), auto=True, scaleup=True, stride=32):
+    """计算letterbox的缩放比例、缩放后尺寸和单侧填充
+
+    Args:
+        shape: 原图尺寸 (h, w)
+        new_shape: 目标尺寸 (h, w)
+        auto: 是否只填充到stride整数倍（最小矩形）
+        scaleup: 是否允许放大
+        stride: 模型步长
+
+    Returns:
+        Tuple: (r, (new_h, new_w), (dw, dh))
+    """
+    # Scale ratio (new / old)
+    r = min(new_shape[0] / shape[0], new_shape[1] / shape[1])
+    if not scaleup:  # only scale down, do not scale up (for better val mAP)
+        r = min(r, 1.0)
+
+    # Compute padding
+    new_w, new_h = int(round(shape[1] * r)), int(round(shape[0] * r))
+    dw, dh = new_shape[1] - new_w, new_shape[0] - new_h  # wh padding
+
+    if auto:  # minimum rectangle
+        dw, dh = np.mod(dw, stride), np.mod(dh, stride)  # wh padding
+
+    return r, (new_h, new_w), (dw / 2, dh / 2)
+
+class LetterboxPreprocessor:
+    """letterbox预处理器
+
+    每个实例持有一组预分配缓冲区（按输入几何复用），适合一路视频流独占使用；
+    返回的张量与缓冲区共享内存，必须在下一次 prepare 之前完成推理
+    """
+
+    PAD_VALUE = 114
+
+    def __init__(self, imgsz: int = 640, stride: int = 32, auto: bool = True, device: Any = "cpu"):
+        """初始化预处理器
+
+        Args:
+            imgsz: 推理输入尺寸（长边）
+            stride: 模型步长，输入尺寸会向上取整到其整数倍
+            auto: True时只填充到stride整数倍（矩形输入），False时填充为 imgsz x imgsz；
+                固定输入尺寸的导出模型（ONNX/OpenVINO）必须为False
+            device: 推理设备
+        """
+        self.stride = stride
+        self.imgsz = int(math.ceil(imgsz / stride) * stride)
+        self.auto = auto
+        self.device = torch.device(device) if not isinstance(device, torch.device) else device
+
+        self._buffer: Optional[np.ndarray] = None
+        self._tensor: Optional[torch.Tensor] = None
+        self._device_tensor: Optional[torch.Tensor] = None
+        self._geometry_key = None
+        self._resized: Dict[Tuple[int, int], np.ndarray] = {}
+
+    def _plan(self, shapes: List[Tuple[int, int]]) -> Tuple[Tuple[int, int], List[Dict[str, Any]]]:
+        """计算批次的输入尺寸和每张图片的缩放参数"""
+        target = (self.imgsz, self.imgsz)
+        geometries = [letterbox_geometry(shape, target, self.auto, True, self.stride) for shape in shapes]
+        sizes = {(new_h + int(round(dh * 2)), new_w + int(round(dw * 2))) for _, (new_h, new_w), (dw, dh) in geometries}
+        if len(sizes) > 1:
+            # 批次内矩形尺寸不一致时统一填充为正方形
+            geometries = [letterbox_geometry(shape, target, False, True, self.stride) for shape in shapes]
+            sizes = {target}
+
+        plans = []
+        for r, (new_h, new_w), (dw, dh) in geometries:
+            top, left = int(round(dh - 0.1)), int(round(dw - 0.1))
+            plans.append({"ratio": r, "new_h": new_h, "new_w": new_w, "top": top, "left": left})
+        return sizes.pop(), plans
+
+    def _ensure_buffer(self, batch: int, input_shape: Tuple[int, int], plans: List[Dict[str, Any]]):
+        """按需分配缓冲区；几何不变时直接复用，填充区域无需重写"""
+        key = (batch, input_shape, tuple((p["new_h"], p["new_w"], p["top"], p["left"]) for p in plans))
+        if key == self._geometry_key:
+            return
+
+        if self._buffer is None or self._buffer.shape != (batch, 3, *input_shape):
+            self._buffer = np.empty((batch, 3, *input_shape), dtype=np.float32)
+            self._tensor = torch.from_numpy(self._buffer)
+            self._device_tensor = None
+            if self.device.type != "cpu":
+                self._device_tensor = torch.empty(self._tensor.shape, dtype=torch.float32, device=self.device)
+        self._buffer.fill(self.PAD_VALUE / 255.0)
+        self._geometry_key = key
+
+    def prepare(self, images: List[np.ndarray]) -> Tuple[torch.Tensor, List[Dict[str, float]]]:
+        """将一批BGR图片预处理为模型输入张量
+
+        Args:
+            images: BGR图片列表
+
+        Returns:
+            Tuple[torch.Tensor, List[Dict[str, float]]]: BCHW、RGB、0-1浮点张量，
+                以及每张图片的 ratio、pad_x、pad_y（letterbox坐标 = 原坐标 * ratio + pad）
+        """
+        input_shape, plans = self._plan([image.shape[:2] for image in images])
+        self._ensure_buffer(len(images), input_shape, plans)
+
+        letterbox_info = []
+        for index, (image, plan) in enumerate(zip(images, plans)):
+            new_h, new_w, top, left = plan["new_h"], plan["new_w"], plan["top"], plan["left"]
+            if image.shape[:2] != (new_h, new_w):
+                resized = self._resized.get((new_h, new_w))
+                if resized is None:
+                    if len(self._resized) >= 8:
+                        self._resized.clear()
+                    resized = self._resized[(new_h, new_w)] = np.empty((new_h, new_w, 3), dtype=np.uint8)
+                cv2.resize(image, (new_w, new_h), dst=resized, interpolation=cv2.INTER_LINEAR)
+                image = resized
+
+            # HWC->CHW、BGR->RGB与归一化合并为一次写入缓冲区
+            np.multiply(
+                image.transpose(2, 0, 1)[::-1],
+                1.0 / 255.0,
+                out=self._buffer[index, :, top:top + new_h, left:left + new_w]
+            )
+            letterbox_info.append({"ratio": plan["ratio"], "pad_x": float(left), "pad_y": float(top)})
+
+        tensor = self._tensor
+        if self._device_tensor is not None:
+            tensor = self._device_tensor.copy_(self._tensor, non_blocking=True)
+        return tensor, letterbox_info
@@ -0,0 +1,159 @@
+"""
+运行时剖析模块
+- 采样剖析: 后台线程按固定间隔采集进程内所有线程（事件循环、推理/解码线程池、取流线程）的调用栈，
+  输出可直接用于火焰图的折叠栈（collapsed stack）文本
+- 内存剖析: 基于 tracemalloc 的 top-N 快照与基线对比，用于排查长时间运行的流任务内存增长
+"""
+import sys
+import time
+import threading
+import tracemalloc
+from collections import Counter
+from typing import Dict, Any, List, Optional
+from core.config import settings
+
+class ProfilerBusyError(RuntimeError):
+    """已有剖析正在进行"""
+
+class SamplingProfiler:
+    """采样剖析器，同一时刻只允许一个剖析任务"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _frame_label(frame) -> str:
+        code = frame.f_code
+        return f"{code.co_name} ({code.co_filename}:{frame.f_lineno})"
+
+    def _collect(self, stacks: Counter, own_ident: int, thread_names: Dict[int, str]):
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            labels: List[str] = []
+            while frame is not None:
+                labels.append(self._frame_label(frame))
+                frame = frame.f_back
+            name = thread_names.get(ident) or f"thread-{ident}"
+            labels.append(name.replace(";", "_").replace(" ", "_"))
+            stacks[";".join(reversed(labels))] += 1
+
+    def profile(self, duration: float, interval: float) -> Dict[str, Any]:
+        """执行一次采样剖析（阻塞调用方线程直至结束）
+
+        Args:
+            duration: 剖析时长（秒），不超过 ADMIN.max_profile_seconds
+            interval: 采样间隔（秒）
+
+        Returns:
+            Dict[str, Any]: samples、duration、stacks（折叠栈 -> 次数）
+        """
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusyError("已有剖析任务正在进行")
+        try:
+            duration = min(max(duration, 0.1), settings.ADMIN.max_profile_seconds)
+            interval = max(interval, 0.001)
+            own_ident = threading.get_ident()
+            stacks: Counter = Counter()
+            samples = 0
+            start = time.perf_counter()
+            deadline = start + duration
+            while True:
+                now = time.perf_counter()
+                if now >= deadline:
+                    break
+                # 线程会动态增减，每次采样刷新名称映射
+                thread_names = {t.ident: t.name for t in threading.enumerate()}
+                self._collect(stacks, own_ident, thread_names)
+                samples += 1
+                time.sleep(max(0.0, interval - (time.perf_counter() - now)))
+            return {
+                "samples": samples,
+                "duration": round(time.perf_counter() - start, 3),
+                "interval": interval,
+                "stacks": stacks
+            }
+        finally:
+            self._lock.release()
+
+    @staticmethod
+    def to_collapsed(stacks: Counter) -> str:
+        """折叠栈文本，每行为 `栈帧;栈帧;... 次数`，可直接交给 flamegraph.pl / speedscope"""
+        return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+class MemoryProfiler:
+    """tracemalloc 内存剖析"""
+
+    def __init__(self):
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+
+    def start(self, frames: Optional[int] = None) -> Dict[str, Any]:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames or settings.ADMIN.tracemalloc_frames)
+        return self.status()
+
+    def stop(self) -> Dict[str, Any]:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._baseline = None
+        return self.status()
+
+    def status(self) -> Dict[str, Any]:
+        tracing = tracemalloc.is_tracing()
+        current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+        return {
+            "tracing": tracing,
+            "frames": tracemalloc.get_traceback_limit() if tracing else 0,
+            "traced_bytes": current,
+            "peak_bytes": peak,
+            "has_baseline": self._baseline is not None
+        }
+
+    @staticmethod
+    def _take_snapshot() -> tracemalloc.Snapshot:
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc 未启动，请先执行 start")
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<unknown>")
+        ))
+
+    def baseline(self) -> Dict[str, Any]:
+        """记录基线快照，供之后的 diff 对比"""
+        self._baseline = self._take_snapshot()
+        return self.status()
+
+    def top(self, limit: int = 20, key_type: str = "lineno") -> List[Dict[str, Any]]:
+        """当前内存分配 top-N"""
+        stats = self._take_snapshot().statistics(key_type)
+        return [
+            {
+                "location": str(stat.traceback),
+                "size_bytes": stat.size,
+                "count": stat.count,
+                "traceback": stat.traceback.format()
+            }
+            for stat in stats[:limit]
+        ]
+
+    def diff(self, limit: int = 20, key_type: str = "lineno") -> List[Dict[str, Any]]:
+        """与基线相比增长最多的 top-N"""
+        if self._baseline is None:
+            raise RuntimeError("尚未记录基线快照，请先执行 baseline")
+        stats = self._take_snapshot().compare_to(self._baseline, key_type)
+        return [
+            {
+                "location": str(stat.traceback),
+                "size_bytes": stat.size,
+                "size_diff_bytes": stat.size_diff,
+                "count": stat.count,
+                "count_diff": stat.count_diff,
+                "traceback": stat.traceback.format()
+            }
+            for stat in stats[:limit]
+        ]
+
+# 进程内共享的剖析器
+sampling_profiler = SamplingProfiler()
+memory_profiler = MemoryProfiler()
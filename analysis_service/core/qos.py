@@ -0,0 +1,210 @@
+"""
+服务质量(QoS)控制模块
+节点过载时按优先级放宽低优先级流的分析间隔、降低推理尺寸，负载回落后逐级恢复
+"""
+import time
+import asyncio
+from collections import deque
+from typing import Dict, Any, List, Optional
+from shared.utils.logger import setup_logger
+from core.config import settings
+from core.resource import resource_sampler
+
+logger = setup_logger(__name__)
+
+class StreamQoS:
+    """单路流的QoS状态，由流分析循环持有并读取当前生效参数"""
+
+    def __init__(self, task_id: str, priority: int, base_interval: float, base_imgsz: int,
+                 fixed_imgsz: bool = False):
+        """初始化流QoS状态
+
+        Args:
+            task_id: 任务ID
+            priority: 优先级，数值越大越重要，过载时数值小的流先降级
+            base_interval: 配置的分析间隔（秒）
+            base_imgsz: 配置的推理尺寸
+            fixed_imgsz: 推理尺寸是否固定（静态导出的ONNX/OpenVINO模型），固定时只放宽分析间隔
+        """
+        self.task_id = task_id
+        self.priority = priority
+        self.base_interval = base_interval
+        self.base_imgsz = base_imgsz
+        self.fixed_imgsz = fixed_imgsz
+        self.level = 0
+        self.process_interval = base_interval
+        self.imgsz = base_imgsz
+        self.adjustments = deque(maxlen=settings.QOS.history_size)
+        # 流循环写入任务记录后清除
+        self.changed = False
+
+        # 推理耗时（指数滑动平均，毫秒）与分析滞后
+        self.latency_ms: Optional[float] = None
+        self.lag_seconds = 0.0
+
+    def observe(self, latency_ms: float, lag_seconds: float = 0.0):
+        """上报一次推理耗时和本次分析相对计划时间的滞后"""
+        alpha = 0.2
+        self.latency_ms = latency_ms if self.latency_ms is None else (1 - alpha) * self.latency_ms + alpha * latency_ms
+        self.lag_seconds = (1 - alpha) * self.lag_seconds + alpha * max(0.0, lag_seconds)
+
+    def apply_level(self, level: int, reason: str):
+        """切换降级等级并记录调整"""
+        qos = settings.QOS
+        previous = (self.process_interval, self.imgsz)
+        self.level = level
+
+        interval = self.base_interval * (qos.interval_factor ** level)
+        self.process_interval = min(max(interval, self.base_interval), max(qos.max_interval, self.base_interval))
+
+        imgsz = self.base_imgsz
+        if not self.fixed_imgsz:
+            for step in qos.imgsz_steps[:level]:
+                if step < imgsz:
+                    imgsz = step
+        self.imgsz = max(min(imgsz, self.base_imgsz), min(qos.min_imgsz, self.base_imgsz))
+
+        self.adjustments.append({
+            "time": time.time(),
+            "level": level,
+            "reason": reason,
+            "process_interval": round(self.process_interval, 3),
+            "imgsz": self.imgsz,
+            "previous_interval": round(previous[0], 3),
+            "previous_imgsz": previous[1]
+        })
+        self.changed = True
+        logger.info(
+            f"QoS调整 任务 {self.task_id}: 等级 {level} ({reason})，分析间隔 {previous[0]:.2f}s -> "
+            f"{self.process_interval:.2f}s，推理尺寸 {previous[1]} -> {self.imgsz}"
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        """获取写入任务记录的QoS状态"""
+        return {
+            "priority": self.priority,
+            "level": self.level,
+            "degraded": self.level > 0,
+            "process_interval": round(self.process_interval, 3),
+            "imgsz": self.imgsz,
+            "latency_ms": round(self.latency_ms, 2) if self.latency_ms is not None else None,
+            "lag_seconds": round(self.lag_seconds, 3),
+            "adjustments": list(self.adjustments)
+        }
+
+class QoSController:
+    """节点级QoS控制器
+
+    周期性评估CPU负载和各流的推理耗时/分析滞后：
+    - 过载时每个周期在超出耗时/滞后预算的流中把优先级最低、等级最低的一路降一级；
+      只有CPU过载而没有流超预算时才在全部流中挑选
+    - 连续若干周期空闲后把优先级最高的已降级流恢复一级
+    """
+
+    def __init__(self):
+        self.streams: Dict[str, StreamQoS] = {}
+        self.cpu_percent = 0.0
+        self.overloaded = False
+        self._idle_ticks = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return settings.QOS.enabled
+
+    def register(self, task_id: str, priority: Any, base_interval: float, base_imgsz: int,
+                 fixed_imgsz: bool = False) -> StreamQoS:
+        """注册一路流，首次注册时启动评估循环
+
+        优先级来自任务配置，无法转换为整数时使用默认优先级，避免评估时比较失败导致所有流的QoS失效
+        """
+        try:
+            priority = int(priority)
+        except (TypeError, ValueError):
+            logger.warning(f"任务 {task_id} 优先级无效: {priority!r}，使用默认优先级 {settings.QOS.default_priority}")
+            priority = settings.QOS.default_priority
+        stream = StreamQoS(task_id, priority, base_interval, base_imgsz, fixed_imgsz)
+        self.streams[task_id] = stream
+        if self.enabled and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+        return stream
+
+    def unregister(self, task_id: str):
+        self.streams.pop(task_id, None)
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        """评估循环"""
+        while True:
+            await asyncio.sleep(settings.QOS.evaluate_interval)
+            try:
+                self.evaluate()
+            except Exception as e:
+                logger.error(f"QoS评估失败: {str(e)}", exc_info=True)
+
+    def _stream_overloaded(self, stream: StreamQoS) -> bool:
+        qos = settings.QOS
+        if stream.latency_ms is not None and stream.latency_ms > qos.latency_high_ms:
+            return True
+        return stream.lag_seconds > stream.process_interval * qos.lag_high_ratio
+
+    def evaluate(self):
+        """执行一次负载评估与调整"""
+        qos = settings.QOS
+        # 取评估周期内的CPU平均值，避免单次采样的毛刺触发降级
+        cpu_percent = resource_sampler.average("cpu_percent", qos.evaluate_interval)
+        self.cpu_percent = resource_sampler.get_snapshot()["cpu_percent"] if cpu_percent is None else cpu_percent
+        streams: List[StreamQoS] = list(self.streams.values())
+        if not streams:
+            return
+
+        lagging = [s for s in streams if self._stream_overloaded(s)]
+        self.overloaded = self.cpu_percent > qos.cpu_high or bool(lagging)
+        idle = self.cpu_percent < qos.cpu_low and not lagging and all(
+            s.latency_ms is None or s.latency_ms < qos.latency_low_ms for s in streams
+        )
+
+        if self.overloaded:
+            self._idle_ticks = 0
+            # 有流超出预算时只在超预算的流中挑选，降级正常的低优先级流并不能缓解它们
+            candidates = [s for s in (lagging or streams) if s.level < qos.max_level]
+            if not candidates:
+                return
+            # 低优先级先降级；同优先级时先降等级低的，使负担均摊
+            target = min(candidates, key=lambda s: (s.priority, s.level))
+            reason = f"cpu={self.cpu_percent:.0f}%" if self.cpu_percent > qos.cpu_high else f"lagging={len(lagging)}"
+            target.apply_level(target.level + 1, f"overload {reason}")
+            return
+
+        if not idle:
+            self._idle_ticks = 0
+            return
+
+        self._idle_ticks += 1
+        if self._idle_ticks < qos.restore_after:
+            return
+        self._idle_ticks = 0
+        degraded = [s for s in streams if s.level > 0]
+        if degraded:
+            target = max(degraded, key=lambda s: (s.priority, s.level))
+            target.apply_level(target.level - 1, f"recover cpu={self.cpu_percent:.0f}%")
+
+    def get_status(self) -> Dict[str, Any]:
+        """获取节点QoS状态"""
+        return {
+            "enabled": self.enabled,
+            "cpu_percent": self.cpu_percent,
+            "overloaded": self.overloaded,
+            # 调整历史在各任务记录中，这里只给出当前状态
+            "streams": {
+                task_id: {k: v for k, v in s.snapshot().items() if k != "adjustments"}
+                for task_id, s in self.streams.items()
+            }
+        }
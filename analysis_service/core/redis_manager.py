@@ -147,6 +147,14 @@ class RedisManager:
             logger.error(f"从有序集合移除任务失败 - {key}: {str(e)}")
             return False
 
+    async def scan_keys(self, pattern: str, count: int = 500) -> List[str]:
+        """按模式增量扫描键（不阻塞Redis）"""
+        try:
+            return [key async for key in self.redis.scan_iter(match=pattern, count=count)]
+        except Exception as e:
+            logger.error(f"扫描Redis键失败 - {pattern}: {str(e)}")
+            return []
+
     async def ping(self) -> bool:
         """测试连接"""
         try:
@@ -0,0 +1,301 @@
+"""
+录制与回放模块
+将视频流逐帧录制为分段MJPEG文件加索引，并提供与 cv2.VideoCapture 接口一致的回放源，
+流分析任务以 replay:// 地址按 1x、Nx 或尽快速度回放录制内容，用于问题复现、回归比对和压测
+
+录制目录结构:
+    meta.json            录制信息（尺寸、帧率、帧数、来源）
+    index.jsonl          每帧一行: {"i": 帧序号, "ts": 采集时间, "seg": 分段号, "off": 偏移, "len": 字节数}
+    segment_00000.mjpeg  连续拼接的JPEG帧
+"""
+import os
+import json
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse, parse_qs, urlunparse
+import cv2
+import numpy as np
+from core.config import settings
+from shared.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+REPLAY_SCHEME = "replay"
+
+def _strip_credentials(url: str) -> str:
+    """去除地址中的用户名密码，避免写入录制信息"""
+    parsed = urlparse(url)
+    if parsed.username or parsed.password:
+        netloc = parsed.hostname or ""
+        if parsed.port:
+            netloc = f"{netloc}:{parsed.port}"
+        parsed = parsed._replace(netloc=netloc)
+    return urlunparse(parsed)
+
+class FrameRecorder:
+    """帧录制器"""
+
+    def __init__(self, path: str, segment_frames: Optional[int] = None, quality: Optional[int] = None, source: str = ""):
+        """初始化录制器
+
+        Args:
+            path: 录制目录（不存在时创建，已有录制会被覆盖）
+            segment_frames: 每个分段文件的帧数
+            quality: JPEG质量
+            source: 来源地址，仅记录用
+        """
+        self.path = path
+        self.segment_frames = segment_frames or settings.REPLAY.segment_frames
+        self.quality = quality or settings.REPLAY.jpeg_quality
+        self.source = _strip_credentials(source) if source else ""
+        os.makedirs(path, exist_ok=True)
+        for name in os.listdir(path):
+            if name.startswith("segment_") or name in ("index.jsonl", "meta.json"):
+                os.remove(os.path.join(path, name))
+
+        self._index = open(os.path.join(path, "index.jsonl"), "w", encoding="utf-8")
+        self._segment = None
+        self._segment_no = -1
+        self._offset = 0
+        self.frame_count = 0
+        self.first_ts: Optional[float] = None
+        self.last_ts: Optional[float] = None
+        self.width = 0
+        self.height = 0
+
+    def write(self, frame: np.ndarray, ts: Optional[float] = None):
+        """写入一帧
+
+        Args:
+            frame: BGR帧
+            ts: 采集时间（秒），默认取当前时间
+        """
+        ts = time.time() if ts is None else ts
+        ok, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            raise RuntimeError("JPEG编码失败")
+
+        if self._segment is None or self.frame_count % self.segment_frames == 0:
+            if self._segment is not None:
+                self._segment.close()
+            self._segment_no += 1
+            self._segment = open(os.path.join(self.path, f"segment_{self._segment_no:05d}.mjpeg"), "wb")
+            self._offset = 0
+
+        data = buffer.tobytes()
+        self._segment.write(data)
+        self._index.write(json.dumps({
+            "i": self.frame_count, "ts": round(ts, 6), "seg": self._segment_no, "off": self._offset, "len": len(data)
+        }) + "\n")
+        self._offset += len(data)
+        self.frame_count += 1
+        self.height, self.width = frame.shape[:2]
+        if self.first_ts is None:
+            self.first_ts = ts
+        self.last_ts = ts
+
+    def close(self) -> Dict[str, Any]:
+        """结束录制并写入录制信息"""
+        if self._segment is not None:
+            self._segment.close()
+        self._index.close()
+        duration = (self.last_ts - self.first_ts) if self.frame_count > 1 else 0.0
+        meta = {
+            "version": 1,
+            "source": self.source,
+            "width": self.width,
+            "height": self.height,
+            "frames": self.frame_count,
+            "segments": self._segment_no + 1,
+            "duration": round(duration, 3),
+            "fps": round((self.frame_count - 1) / duration, 3) if duration > 0 else 0.0,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+        }
+        with open(os.path.join(self.path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        return meta
+
+def record_stream(
+    url: str,
+    path: str,
+    duration: Optional[float] = None,
+    max_frames: Optional[int] = None,
+    quality: Optional[int] = None
+) -> Dict[str, Any]:
+    """从视频流录制（阻塞执行）
+
+    Args:
+        url: 流地址或视频文件
+        path: 录制目录
+        duration: 最长录制时长（秒）
+        max_frames: 最多录制帧数
+
+    Returns:
+        Dict[str, Any]: 录制信息
+    """
+    cap = cv2.VideoCapture(url)
+    if not cap.isOpened():
+        raise RuntimeError(f"无法打开流: {_strip_credentials(url)}")
+
+    recorder = FrameRecorder(path, quality=quality, source=url)
+    start = time.time()
+    try:
+        while True:
+            if duration is not None and time.time() - start >= duration:
+                break
+            if max_frames is not None and recorder.frame_count >= max_frames:
+                break
+            ret, frame = cap.read()
+            if not ret:
+                break
+            recorder.write(frame, time.time())
+    finally:
+        cap.release()
+        meta = recorder.close()
+    logger.info(f"录制完成: {path}, 帧数 {meta['frames']}, 时长 {meta['duration']}s")
+    return meta
+
+def is_replay_url(url: str) -> bool:
+    return isinstance(url, str) and url.startswith(f"{REPLAY_SCHEME}://")
+
+def parse_replay_url(url: str) -> Tuple[str, float, bool]:
+    """解析回放地址
+
+    replay://<录制目录>?speed=<倍速>&loop=<0|1>；目录为相对路径时相对 REPLAY.root_dir，
+    speed 为0或 max 时尽快回放
+
+    Returns:
+        Tuple[str, float, bool]: (录制目录绝对路径, 倍速, 是否循环)
+    """
+    parsed = urlparse(url)
+    if parsed.scheme != REPLAY_SCHEME:
+        raise ValueError(f"不是回放地址: {url}")
+    raw_path = (parsed.netloc + parsed.path) if parsed.netloc else parsed.path
+    query = parse_qs(parsed.query)
+
+    speed_value = query.get("speed", ["1"])[0]
+    speed = 0.0 if speed_value == "max" else float(speed_value)
+    loop = query.get("loop", ["0"])[0].lower() in ("1", "true", "yes")
+
+    root = os.path.realpath(settings.REPLAY.root_dir)
+    path = os.path.realpath(raw_path if os.path.isabs(raw_path) else os.path.join(root, raw_path))
+    # 只允许回放录制根目录下的内容
+    if os.path.commonpath([root, path]) != root:
+        raise ValueError(f"回放目录不在录制根目录 {settings.REPLAY.root_dir} 下: {raw_path}")
+    return path, max(0.0, speed), loop
+
+class ReplayCapture:
+    """回放源，接口与流分析用到的 cv2.VideoCapture 方法一致
+
+    按录制时间戳除以倍速控制出帧节奏；消费方慢于录制节奏时不丢帧，保证同一录制的输出逐帧可比
+    """
+
+    def __init__(self, path: str, speed: float = 1.0, loop: bool = False):
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+        self.finished = False
+        self._opened = False
+        self._entries: List[Dict[str, Any]] = []
+        self._meta: Dict[str, Any] = {}
+        self._files: Dict[int, Any] = {}
+        self._position = 0
+        self._current: Optional[Dict[str, Any]] = None
+        self._clock_start: Optional[float] = None
+
+        try:
+            with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+                self._meta = json.load(f)
+            with open(os.path.join(path, "index.jsonl"), "r", encoding="utf-8") as f:
+                self._entries = [json.loads(line) for line in f if line.strip()]
+            self._opened = bool(self._entries)
+        except (OSError, ValueError) as e:
+            logger.error(f"无法打开录制 {path}: {str(e)}")
+
+    @classmethod
+    def from_url(cls, url: str) -> "ReplayCapture":
+        path, speed, loop = parse_replay_url(url)
+        return cls(path, speed, loop)
+
+    def isOpened(self) -> bool:
+        return self._opened
+
+    def _wait_until_due(self, entry: Dict[str, Any]):
+        if self.speed <= 0:
+            return
+        now = time.monotonic()
+        if self._clock_start is None:
+            self._clock_start = now
+        due = self._clock_start + (entry["ts"] - self._entries[0]["ts"]) / self.speed
+        if due > now:
+            time.sleep(due - now)
+
+    def grab(self) -> bool:
+        if not self._opened:
+            return False
+        if self._position >= len(self._entries):
+            if not self.loop:
+                self.finished = True
+                return False
+            self._position = 0
+            self._clock_start = None
+        entry = self._entries[self._position]
+        self._wait_until_due(entry)
+        self._current = entry
+        self._position += 1
+        return True
+
+    def retrieve(self) -> Tuple[bool, Optional[np.ndarray]]:
+        entry = self._current
+        if entry is None:
+            return False, None
+        handle = self._files.get(entry["seg"])
+        if handle is None:
+            handle = self._files[entry["seg"]] = open(os.path.join(self.path, f"segment_{entry['seg']:05d}.mjpeg"), "rb")
+        handle.seek(entry["off"])
+        data = np.frombuffer(handle.read(entry["len"]), dtype=np.uint8)
+        frame = cv2.imdecode(data, cv2.IMREAD_COLOR)
+        return frame is not None, frame
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    def get(self, prop_id: int) -> float:
+        if prop_id == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self._meta.get("width", 0))
+        if prop_id == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self._meta.get("height", 0))
+        if prop_id == cv2.CAP_PROP_FPS:
+            return float(self._meta.get("fps", 0))
+        if prop_id == cv2.CAP_PROP_FRAME_COUNT:
+            return float(len(self._entries))
+        if prop_id == cv2.CAP_PROP_POS_FRAMES:
+            return float(self._position)
+        if prop_id == cv2.CAP_PROP_POS_MSEC and self._current is not None:
+            return (self._current["ts"] - self._entries[0]["ts"]) * 1000
+        return 0.0
+
+    def set(self, prop_id: int, value: float) -> bool:
+        if prop_id == cv2.CAP_PROP_POS_FRAMES:
+            self._position = min(max(int(value), 0), len(self._entries))
+            self._clock_start = None
+            return True
+        return False
+
+    @property
+    def consumer_paced(self) -> bool:
+        """尽快回放时由消费方决定读取节奏，取流中心只在有订阅者等待时读取，保证不丢帧"""
+        return self.speed <= 0
+
+    @property
+    def current_ts(self) -> Optional[float]:
+        """当前帧的录制采集时间"""
+        return self._current["ts"] if self._current is not None else None
+
+    def release(self):
+        for handle in self._files.values():
+            handle.close()
+        self._files.clear()
+        self._opened = False
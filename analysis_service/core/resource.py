@@ -1,13 +1,136 @@
 """
 资源监控模块
 """
+import time
+import asyncio
+from collections import deque
+from typing import Dict, Any, Callable, List, Optional
 import psutil
 import torch
-from typing import Dict
 from shared.utils.logger import setup_logger
+from core.config import settings
+
+try:
+    import GPUtil
+except ImportError:
+    GPUtil = None
 
 logger = setup_logger(__name__)
 
+class ResourceSampler:
+    """后台资源采样器
+
+    按固定周期在线程池中采集CPU、内存、GPU、磁盘和业务指标（如推理队列深度），
+    写入快照和滚动历史，/health 与准入检查直接读取快照，不再阻塞事件循环
+    """
+
+    def __init__(self):
+        self._snapshot: Dict[str, Any] = {}
+        self._history: deque = deque(maxlen=settings.RESOURCE_SAMPLER.history_size)
+        self._gauges: Dict[str, Callable[[], Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def register_gauge(self, name: str, provider: Callable[[], Any]):
+        """注册业务指标，每次采样时调用 provider 取值（在事件循环中执行，必须快速返回）"""
+        self._gauges[name] = provider
+
+    def start(self):
+        """启动后台采样"""
+        if self._task is None or self._task.done():
+            psutil.cpu_percent(interval=None)  # 初始化CPU采样基准
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                sample = await loop.run_in_executor(None, self._sample_system)
+                for name, provider in self._gauges.items():
+                    try:
+                        sample[name] = provider()
+                    except Exception as e:
+                        logger.debug(f"采集指标 {name} 失败: {str(e)}")
+                self._snapshot = sample
+                self._history.append(sample)
+            except Exception as e:
+                logger.error(f"资源采样失败: {str(e)}", exc_info=True)
+            await asyncio.sleep(settings.RESOURCE_SAMPLER.interval)
+
+    @staticmethod
+    def _sample_system() -> Dict[str, Any]:
+        """采集系统资源（阻塞，在线程池中执行）
+
+        CPU使用率取自上一次采样以来的区间平均值，无需额外等待
+        """
+        sample: Dict[str, Any] = {
+            "timestamp": time.time(),
+            "cpu_percent": psutil.cpu_percent(interval=None),
+            "memory_percent": psutil.virtual_memory().percent,
+            "disk_percent": psutil.disk_usage('/').percent,
+            "gpu_percent": None,
+            "gpu_memory_percent": None
+        }
+
+        if GPUtil is not None:
+            try:
+                gpus = GPUtil.getGPUs()
+                if gpus:
+                    sample["gpu_percent"] = gpus[0].load * 100
+                    sample["gpu_memory_percent"] = gpus[0].memoryUtil * 100
+            except Exception:
+                pass
+        if sample["gpu_memory_percent"] is None and torch.cuda.is_available():
+            total = torch.cuda.get_device_properties(0).total_memory
+            sample["gpu_memory_percent"] = torch.cuda.memory_allocated() / total * 100
+
+        return sample
+
+    def get_snapshot(self) -> Dict[str, Any]:
+        """获取最近一次采样结果
+
+        采样器尚未运行时同步采集一次（CPU使用率为非阻塞取值）
+        """
+        if not self._snapshot:
+            self._snapshot = self._sample_system()
+        snapshot = dict(self._snapshot)
+        snapshot["age"] = round(time.time() - snapshot["timestamp"], 3)
+        return snapshot
+
+    def get_history(self) -> List[Dict[str, Any]]:
+        """获取滚动历史（按时间先后）"""
+        return list(self._history)
+
+    def average(self, metric: str, window: float) -> Optional[float]:
+        """最近 window 秒内某指标的平均值，无数据时返回None"""
+        since = time.time() - window
+        values = [s[metric] for s in self._history if s["timestamp"] >= since and s.get(metric) is not None]
+        return sum(values) / len(values) if values else None
+
+    def trend(self, metric: str, window: float) -> Optional[float]:
+        """最近 window 秒内某指标的变化速率（每秒），用于判断负载上升或回落"""
+        since = time.time() - window
+        points = [(s["timestamp"], s[metric]) for s in self._history if s["timestamp"] >= since and s.get(metric) is not None]
+        if len(points) < 2:
+            return None
+        n = len(points)
+        mean_t = sum(t for t, _ in points) / n
+        mean_v = sum(v for _, v in points) / n
+        denom = sum((t - mean_t) ** 2 for t, _ in points)
+        if denom == 0:
+            return None
+        return sum((t - mean_t) * (v - mean_v) for t, v in points) / denom
+
+# 进程内共享的资源采样器
+resource_sampler = ResourceSampler()
+
 class ResourceMonitor:
     """资源监控"""
     
@@ -23,31 +146,13 @@ class ResourceMonitor:
     def get_resource_usage(self) -> Dict:
         """获取资源使用情况"""
         try:
-            # CPU使用率
-            cpu_percent = sum(psutil.cpu_percent(interval=0.1, percpu=True)) / psutil.cpu_count() / 100
-            
-            # 内存使用率
-            memory = psutil.virtual_memory()
-            memory_percent = memory.percent / 100
-            
-            # GPU使用率
-            gpu_percent = 0
-            gpu_memory_percent = 0
-            if torch.cuda.is_available():
-                # GPU内存使用率
-                gpu_memory = torch.cuda.memory_allocated()
-                gpu_memory_total = torch.cuda.get_device_properties(0).total_memory
-                gpu_memory_percent = gpu_memory / gpu_memory_total
-                
-                # GPU使用率（如果可用）
-                try:
-                    gpu_percent = torch.cuda.utilization() / 100
-                except:
-                    gpu_percent = 0
-            
-            # 磁盘使用率
-            disk = psutil.disk_usage('/')
-            disk_percent = disk.percent / 100
+            # 读取后台采样快照，不阻塞调用方
+            snapshot = resource_sampler.get_snapshot()
+            cpu_percent = snapshot["cpu_percent"] / 100
+            memory_percent = snapshot["memory_percent"] / 100
+            gpu_percent = (snapshot.get("gpu_percent") or 0) / 100
+            gpu_memory_percent = (snapshot.get("gpu_memory_percent") or 0) / 100
+            disk_percent = snapshot["disk_percent"] / 100
                 
             logger.debug(f"资源使用情况:")
             logger.debug(f"  - CPU: {cpu_percent*100:.1f}%")
@@ -0,0 +1,197 @@
+"""
+检测结果缓存模块
+以图片内容哈希、模型版本和归一化检测配置为键缓存检测结果，分内存LRU和Redis两级，
+并记录图片URL的ETag/Last-Modified用于条件请求
+"""
+import json
+import time
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+from shared.utils.logger import setup_logger
+from core.config import settings
+
+logger = setup_logger(__name__)
+
+# 影响检测结果的配置字段，其余字段（回调、保存等）不参与缓存键
+RESULT_CONFIG_KEYS = ("confidence", "iou", "classes", "roi_type", "roi", "imgsz", "nested_detection", "tiling")
+
+def normalize_detection_config(config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """归一化检测配置，保证语义相同的配置得到相同的缓存键"""
+    config = config or {}
+    normalized = {key: config.get(key) for key in RESULT_CONFIG_KEYS}
+    if normalized["confidence"] is None:
+        normalized["confidence"] = settings.ANALYSIS.confidence
+    if normalized["iou"] is None:
+        normalized["iou"] = settings.ANALYSIS.iou
+    if normalized["classes"]:
+        normalized["classes"] = sorted(set(normalized["classes"]))
+    normalized["nested_detection"] = bool(normalized["nested_detection"])
+    return normalized
+
+class DetectionResultCache:
+    """检测结果缓存"""
+
+    def __init__(self, redis=None):
+        """初始化结果缓存
+
+        Args:
+            redis: RedisManager实例，为None或未启用时只使用内存缓存
+        """
+        self.config = settings.RESULT_CACHE
+        self.redis = redis if self.config.redis_enabled else None
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._validators: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._model_versions: Dict[str, str] = {}
+
+        self.metrics: Dict[str, int] = {
+            "memory_hits": 0,
+            "redis_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "oversize_skipped": 0,
+            "invalidations": 0,
+            "conditional_requests": 0,
+            "not_modified": 0
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.config.enabled
+
+    @staticmethod
+    def content_hash(data: bytes) -> str:
+        """计算图片内容哈希"""
+        return hashlib.sha256(data).hexdigest()
+
+    def build_key(self, content_hash: str, model_code: str, model_version: str, config: Optional[Dict[str, Any]]) -> str:
+        """构建缓存键"""
+        config_str = json.dumps(normalize_detection_config(config), sort_keys=True, separators=(",", ":"))
+        config_hash = hashlib.sha1(config_str.encode("utf-8")).hexdigest()[:16]
+        return f"result_cache:{model_code}:{model_version[:16]}:{config_hash}:{content_hash}"
+
+    def check_model_version(self, model_code: str, model_version: str):
+        """模型版本变化时清除该模型的内存缓存
+
+        Redis中的旧版本结果因缓存键包含版本号不会再被命中，由TTL自然过期
+        """
+        previous = self._model_versions.get(model_code)
+        self._model_versions[model_code] = model_version
+        if previous is None or previous == model_version:
+            return
+
+        prefix = f"result_cache:{model_code}:"
+        stale = [key for key in self._memory if key.startswith(prefix)]
+        for key in stale:
+            del self._memory[key]
+        self.metrics["invalidations"] += 1
+        logger.info(f"模型 {model_code} 版本变化 ({previous[:8]} -> {model_version[:8]})，清除 {len(stale)} 条内存缓存")
+
+    async def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """查询缓存并计入命中指标"""
+        detections, source = await self.lookup(key)
+        self.record(source)
+        return detections
+
+    async def lookup(self, key: str) -> Tuple[Optional[List[Dict[str, Any]]], Optional[str]]:
+        """查询缓存但不计入命中指标，内存未命中时查询Redis并回填内存
+
+        同一张图片可能先后查询多次（条件请求前预查、下载后确认），由调用方在确定结果后调用 record 计数一次
+
+        Returns:
+            Tuple: (检测结果, 命中来源 memory/redis，未命中为None)
+        """
+        entry = self._memory.get(key)
+        if entry is not None:
+            if entry["expires_at"] > time.time():
+                self._memory.move_to_end(key)
+                return entry["detections"], "memory"
+            del self._memory[key]
+
+        if self.redis is not None:
+            try:
+                detections = await self.redis.get_value(key, as_json=True)
+                if isinstance(detections, list):
+                    self._put_memory(key, detections)
+                    return detections, "redis"
+            except Exception as e:
+                logger.warning(f"查询Redis结果缓存失败: {str(e)}")
+        return None, None
+
+    def record(self, source: Optional[str]):
+        """计入一次查询结果"""
+        if source is None:
+            self.metrics["misses"] += 1
+        else:
+            self.metrics[f"{source}_hits"] += 1
+
+    async def set(self, key: str, detections: List[Dict[str, Any]]):
+        """写入缓存"""
+        payload = json.dumps(detections, separators=(",", ":"))
+        if len(payload) > self.config.max_entry_bytes:
+            self.metrics["oversize_skipped"] += 1
+            return
+
+        self._put_memory(key, detections)
+        self.metrics["stores"] += 1
+
+        if self.redis is not None:
+            try:
+                await self.redis.redis.set(key, payload, ex=self.config.redis_ttl)
+            except Exception as e:
+                logger.warning(f"写入Redis结果缓存失败: {str(e)}")
+
+    def _put_memory(self, key: str, detections: List[Dict[str, Any]]):
+        self._memory[key] = {
+            "detections": detections,
+            "expires_at": time.time() + self.config.memory_ttl
+        }
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.config.memory_max_entries:
+            self._memory.popitem(last=False)
+            self.metrics["evictions"] += 1
+
+    def get_validator(self, url: str) -> Optional[Dict[str, Any]]:
+        """获取URL上次下载时的校验信息（ETag/Last-Modified及内容哈希）"""
+        validator = self._validators.get(url)
+        if validator is not None:
+            self._validators.move_to_end(url)
+        return validator
+
+    def set_validator(self, url: str, headers: Dict[str, str], content_hash: str):
+        """记录URL的校验信息，服务端未返回ETag/Last-Modified时不记录"""
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if not etag and not last_modified:
+            self._validators.pop(url, None)
+            return
+
+        self._validators[url] = {
+            "etag": etag,
+            "last_modified": last_modified,
+            "content_hash": content_hash
+        }
+        self._validators.move_to_end(url)
+        while len(self._validators) > self.config.url_validator_max_entries:
+            self._validators.popitem(last=False)
+
+    @staticmethod
+    def conditional_headers(validator: Dict[str, Any]) -> Dict[str, str]:
+        """构建条件请求头"""
+        headers = {}
+        if validator.get("etag"):
+            headers["If-None-Match"] = validator["etag"]
+        if validator.get("last_modified"):
+            headers["If-Modified-Since"] = validator["last_modified"]
+        return headers
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """获取缓存指标"""
+        metrics = dict(self.metrics)
+        hits = metrics["memory_hits"] + metrics["redis_hits"]
+        total = hits + metrics["misses"]
+        metrics["hit_ratio"] = round(hits / total, 4) if total else 0.0
+        metrics["memory_entries"] = len(self._memory)
+        metrics["url_validators"] = len(self._validators)
+        return metrics
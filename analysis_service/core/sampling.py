@@ -0,0 +1,268 @@
+"""
+视频帧采样策略模块
+决定视频分析中哪些帧需要解码和推理，其余帧只grab不解码
+"""
+from abc import ABC, abstractmethod
+from typing import Dict, Any, List, Optional
+import cv2
+import numpy as np
+from shared.utils.logger import setup_logger
+from core.config import settings
+
+logger = setup_logger(__name__)
+
+class SampleAction:
+    """采样动作"""
+    SKIP = 0      # 只grab，不解码
+    PROBE = 1     # 解码后交给策略判断是否分析
+    ANALYZE = 2   # 解码并执行推理
+
+class BaseSamplingPolicy(ABC):
+    """采样策略基类"""
+
+    name = "base"
+
+    def __init__(self):
+        self.fps = 25.0
+        self.analyzed_frames = 0
+        self.probed_frames = 0
+        self.skipped_frames = 0
+
+    def configure(self, fps: float, width: int, height: int):
+        """根据视频信息初始化策略
+
+        Args:
+            fps: 视频帧率
+            width: 视频宽度
+            height: 视频高度
+        """
+        self.fps = fps if fps and fps > 0 else 25.0
+
+    @abstractmethod
+    def decide(self, frame_index: int) -> int:
+        """决定下一帧的采样动作
+
+        Args:
+            frame_index: 即将读取的帧序号（从0开始）
+
+        Returns:
+            int: SampleAction中的动作
+        """
+        pass
+
+    def observe_frame(self, frame_index: int, frame: np.ndarray) -> bool:
+        """PROBE动作解码后调用，返回是否需要分析该帧"""
+        return True
+
+    def on_analyze(self, frame_index: int, frame: np.ndarray):
+        """确定分析某帧时调用（推理之前）"""
+        self.analyzed_frames += 1
+
+    def observe_detections(self, frame_index: int, detections: List[Dict[str, Any]]):
+        """分析完成后回传检测结果，供策略调整后续采样"""
+        pass
+
+    def _step(self, target_fps: float) -> int:
+        """按目标分析帧率换算采样步长（帧）"""
+        if not target_fps or target_fps <= 0:
+            return 1
+        return max(1, int(round(self.fps / target_fps)))
+
+    def record(self, action: int):
+        """记录采样动作统计"""
+        if action == SampleAction.SKIP:
+            self.skipped_frames += 1
+        elif action == SampleAction.PROBE:
+            self.probed_frames += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """获取采样统计信息"""
+        return {
+            "policy": self.name,
+            "analyzed_frames": self.analyzed_frames,
+            "probed_frames": self.probed_frames,
+            "skipped_frames": self.skipped_frames
+        }
+
+class FixedIntervalPolicy(BaseSamplingPolicy):
+    """固定间隔采样，每N帧分析一次"""
+
+    name = "fixed"
+
+    def __init__(self, frame_interval: int = 3):
+        super().__init__()
+        self.frame_interval = max(1, frame_interval)
+
+    def decide(self, frame_index: int) -> int:
+        # 与旧逻辑一致：第N、2N...帧（从1计数）参与分析
+        if (frame_index + 1) % self.frame_interval == 0:
+            return SampleAction.ANALYZE
+        return SampleAction.SKIP
+
+class TargetFpsPolicy(BaseSamplingPolicy):
+    """按目标分析帧率采样，与视频原始帧率无关"""
+
+    name = "target_fps"
+
+    def __init__(self, target_fps: float = 5.0):
+        super().__init__()
+        self.target_fps = target_fps
+        self.step = 1
+
+    def configure(self, fps: float, width: int, height: int):
+        super().configure(fps, width, height)
+        self.step = self._step(self.target_fps)
+
+    def decide(self, frame_index: int) -> int:
+        if frame_index % self.step == 0:
+            return SampleAction.ANALYZE
+        return SampleAction.SKIP
+
+class SceneChangePolicy(BaseSamplingPolicy):
+    """场景变化驱动采样
+
+    以较低的探测帧率解码画面，与上一次分析帧比较灰度直方图，
+    变化超过阈值或超过最长间隔时才执行推理
+    """
+
+    name = "scene_change"
+
+    def __init__(
+        self,
+        probe_fps: float = 5.0,
+        threshold: float = 0.3,
+        min_interval: float = 0.2,
+        max_interval: float = 5.0
+    ):
+        super().__init__()
+        self.probe_fps = probe_fps
+        self.threshold = threshold
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.probe_step = 1
+        self.min_gap = 0
+        self.max_gap = 1
+        self._last_hist: Optional[np.ndarray] = None
+        self._last_analyzed = None
+
+    def configure(self, fps: float, width: int, height: int):
+        super().configure(fps, width, height)
+        self.probe_step = self._step(self.probe_fps)
+        self.min_gap = int(self.min_interval * self.fps)
+        self.max_gap = max(1, int(self.max_interval * self.fps))
+
+    def decide(self, frame_index: int) -> int:
+        if self._last_analyzed is None:
+            return SampleAction.ANALYZE
+        gap = frame_index - self._last_analyzed
+        if gap >= self.max_gap:
+            return SampleAction.ANALYZE
+        if gap >= self.min_gap and frame_index % self.probe_step == 0:
+            return SampleAction.PROBE
+        return SampleAction.SKIP
+
+    def _histogram(self, frame: np.ndarray) -> np.ndarray:
+        small = cv2.resize(frame, (64, 36), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+        hist = cv2.calcHist([gray], [0], None, [32], [0, 256])
+        return cv2.normalize(hist, hist).flatten()
+
+    def observe_frame(self, frame_index: int, frame: np.ndarray) -> bool:
+        hist = self._histogram(frame)
+        if self._last_hist is None:
+            changed = True
+        else:
+            # Bhattacharyya距离: 0表示相同，1表示完全不同
+            distance = cv2.compareHist(self._last_hist, hist, cv2.HISTCMP_BHATTACHARYYA)
+            changed = distance >= self.threshold
+        if changed:
+            self._last_hist = hist
+        return changed
+
+    def on_analyze(self, frame_index: int, frame: np.ndarray):
+        super().on_analyze(frame_index, frame)
+        self._last_analyzed = frame_index
+        # 因超过最长间隔而直接分析的帧也要刷新参考直方图
+        self._last_hist = self._histogram(frame)
+
+class DensifyPolicy(BaseSamplingPolicy):
+    """检测驱动的加密采样
+
+    未发现目标时按稀疏帧率采样，一旦出现目标立即切换为密集帧率，
+    目标消失超过保持时长后恢复稀疏采样
+    """
+
+    name = "densify"
+
+    def __init__(self, sparse_fps: float = 1.0, dense_fps: float = 10.0, hold_seconds: float = 2.0):
+        super().__init__()
+        self.sparse_fps = sparse_fps
+        self.dense_fps = dense_fps
+        self.hold_seconds = hold_seconds
+        self.sparse_step = 1
+        self.dense_step = 1
+        self.hold_frames = 0
+        self._next_index = 0
+        self._last_hit = None
+
+    def configure(self, fps: float, width: int, height: int):
+        super().configure(fps, width, height)
+        self.sparse_step = self._step(self.sparse_fps)
+        self.dense_step = self._step(self.dense_fps)
+        self.hold_frames = int(self.hold_seconds * self.fps)
+
+    @property
+    def dense(self) -> bool:
+        return self._last_hit is not None
+
+    def decide(self, frame_index: int) -> int:
+        if frame_index >= self._next_index:
+            return SampleAction.ANALYZE
+        return SampleAction.SKIP
+
+    def observe_detections(self, frame_index: int, detections: List[Dict[str, Any]]):
+        if detections:
+            self._last_hit = frame_index
+        elif self._last_hit is not None and frame_index - self._last_hit > self.hold_frames:
+            self._last_hit = None
+        step = self.dense_step if self.dense else self.sparse_step
+        self._next_index = frame_index + step
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats["dense"] = self.dense
+        return stats
+
+def create_sampling_policy(config: Optional[Dict[str, Any]] = None) -> BaseSamplingPolicy:
+    """创建采样策略实例
+
+    Args:
+        config: 采样配置，包含 policy 字段及对应策略参数，
+            未提供的字段使用服务级 VIDEO_SAMPLING 配置
+
+    Returns:
+        BaseSamplingPolicy: 采样策略实例
+    """
+    options = settings.VIDEO_SAMPLING.dict()
+    options.update({k: v for k, v in (config or {}).items() if v is not None})
+    policy = options.get("policy", "fixed")
+
+    if policy == "fixed":
+        return FixedIntervalPolicy(frame_interval=options["frame_interval"])
+    if policy == "target_fps":
+        return TargetFpsPolicy(target_fps=options["target_fps"])
+    if policy == "scene_change":
+        return SceneChangePolicy(
+            probe_fps=options["probe_fps"],
+            threshold=options["scene_threshold"],
+            min_interval=options["min_interval"],
+            max_interval=options["max_interval"]
+        )
+    if policy == "densify":
+        return DensifyPolicy(
+            sparse_fps=options["sparse_fps"],
+            dense_fps=options["dense_fps"],
+            hold_seconds=options["hold_seconds"]
+        )
+
+    raise ValueError(f"不支持的采样策略: {policy}")
@@ -0,0 +1,129 @@
+"""
+流分析调度模块
+按挂钟时间驱动单路流的分析、推送和报警节奏，并用随机相位和抖动错开大量摄像头的唤醒时刻
+"""
+import time
+import random
+from typing import Dict, Any, Optional, Sequence
+from core.config import settings
+
+class StreamScheduler:
+    """单路流调度器
+
+    - 分析: 每 analyze_interval 秒一次，叠加 random_interval 区间内的随机抖动
+    - 推送: 每 push_interval 秒最多推送一次检测结果
+    - 报警: 有目标时每 alarm_interval 秒最多报警一次
+    """
+
+    def __init__(
+        self,
+        analyze_interval: float = 1.0,
+        push_interval: float = 1.0,
+        alarm_interval: float = 60.0,
+        random_interval: Optional[Sequence[float]] = None,
+        clock=time.monotonic
+    ):
+        """初始化调度器
+
+        Args:
+            analyze_interval: 分析间隔（秒）
+            push_interval: 推送间隔（秒）
+            alarm_interval: 报警间隔（秒）
+            random_interval: 每次分析追加的随机延迟区间 [min, max]（秒）
+            clock: 单调时钟
+        """
+        self.analyze_interval = max(0.0, float(analyze_interval))
+        self.push_interval = max(0.0, float(push_interval))
+        self.alarm_interval = max(0.0, float(alarm_interval))
+        low, high = (list(random_interval or (0, 0)) + [0, 0])[:2]
+        self.jitter_range = (max(0.0, float(min(low, high))), max(0.0, float(max(low, high))))
+        self.clock = clock
+
+        now = clock()
+        # 首次分析使用随机相位，避免同时启动的大量流在同一时刻唤醒
+        self.next_analyze = now + random.uniform(0, self.analyze_interval) if self.analyze_interval else now
+        self.next_push = now
+        self.next_alarm = now
+
+        self.analyze_count = 0
+        self.push_count = 0
+        self.alarm_count = 0
+        self.missed_deadlines = 0
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]] = None) -> "StreamScheduler":
+        """根据任务配置创建调度器，未提供的间隔使用服务级 ANALYSIS 配置"""
+        config = config or {}
+        defaults = settings.ANALYSIS
+
+        def pick(key: str):
+            value = config.get(key)
+            return getattr(defaults, key) if value is None else value
+
+        return cls(
+            analyze_interval=pick("analyze_interval"),
+            push_interval=pick("push_interval"),
+            alarm_interval=pick("alarm_interval"),
+            random_interval=pick("random_interval")
+        )
+
+    def _jitter(self) -> float:
+        low, high = self.jitter_range
+        return random.uniform(low, high) if high > 0 else 0.0
+
+    def analyze_due(self, now: Optional[float] = None) -> bool:
+        """是否到了分析时刻"""
+        return (self.clock() if now is None else now) >= self.next_analyze
+
+    def time_to_analyze(self, now: Optional[float] = None) -> float:
+        """距离下一次分析的秒数"""
+        return max(0.0, self.next_analyze - (self.clock() if now is None else now))
+
+    def lag(self, now: Optional[float] = None) -> float:
+        """当前时刻相对计划分析时刻的滞后（秒）"""
+        return max(0.0, (self.clock() if now is None else now) - self.next_analyze)
+
+    def mark_analyzed(self, now: Optional[float] = None):
+        """记录一次分析并安排下一次
+
+        按计划时刻递推以保持固定节奏；落后超过一个间隔时从当前时刻重新起算，
+        不做追赶，避免过载后集中补帧
+        """
+        now = self.clock() if now is None else now
+        self.analyze_count += 1
+        next_analyze = self.next_analyze + self.analyze_interval
+        if next_analyze <= now:
+            self.missed_deadlines += 1
+            next_analyze = now + self.analyze_interval
+        self.next_analyze = next_analyze + self._jitter()
+
+    def push_due(self, now: Optional[float] = None) -> bool:
+        """是否到了推送时刻"""
+        return (self.clock() if now is None else now) >= self.next_push
+
+    def mark_pushed(self, now: Optional[float] = None):
+        now = self.clock() if now is None else now
+        self.push_count += 1
+        self.next_push = now + self.push_interval
+
+    def alarm_due(self, now: Optional[float] = None) -> bool:
+        """是否允许报警（距上次报警已超过报警间隔）"""
+        return (self.clock() if now is None else now) >= self.next_alarm
+
+    def mark_alarmed(self, now: Optional[float] = None):
+        now = self.clock() if now is None else now
+        self.alarm_count += 1
+        self.next_alarm = now + self.alarm_interval
+
+    def stats(self) -> Dict[str, Any]:
+        """获取调度统计信息"""
+        return {
+            "analyze_interval": round(self.analyze_interval, 3),
+            "push_interval": self.push_interval,
+            "alarm_interval": self.alarm_interval,
+            "random_interval": list(self.jitter_range),
+            "analyze_count": self.analyze_count,
+            "push_count": self.push_count,
+            "alarm_count": self.alarm_count,
+            "missed_deadlines": self.missed_deadlines
+        }
@@ -0,0 +1,332 @@
+"""
+关键帧快照模块
+低频分析（几十秒一帧）的流不必持续解码：到分析时刻才连接、解码一帧（ffmpeg 只解码关键帧），
+随后按保温策略断开或保持会话空转到下一次分析。接口与取流中心的订阅者一致，流分析主循环无需区分
+
+保温策略比较两种开销：
+    重连开销  每次建立连接的耗时与CPU时间（滑动平均）
+    保温开销  会话空转时持续读取的CPU占用率 x 分析间隔
+重连耗时超过分析间隔的一定比例，或重连CPU时间高于保温开销时保持会话，否则断开
+
+CPU时间包含取流源的全部开销：调用线程、OpenCV 在打开时创建的解码线程、ffmpeg 解码子进程，
+以及已退出的 ffprobe 子进程（RUSAGE_CHILDREN）
+"""
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Set
+import cv2
+import psutil
+from core.config import settings
+from core.ffmpeg_capture import ffmpeg_available
+from core.stream_hub import StreamFrame
+from shared.utils.logger import setup_logger
+
+try:
+    import resource
+except ImportError:  # Windows 没有 resource 模块
+    resource = None
+
+logger = setup_logger(__name__)
+
+_PROCESS = psutil.Process()
+
+# 快照的建连和等待关键帧会阻塞较长时间，使用独立的有界线程池，不占用事件循环的默认线程池
+_executor = ThreadPoolExecutor(
+    max_workers=max(1, settings.SNAPSHOT.executor_workers), thread_name_prefix="Snapshot"
+)
+
+def _ema(previous: Optional[float], value: float, alpha: float = 0.3) -> float:
+    return value if previous is None else previous + alpha * (value - previous)
+
+def _thread_cpu() -> Dict[int, float]:
+    """本进程各线程累计CPU时间（秒），键为内核线程号"""
+    return {t.id: t.user_time + t.system_time for t in _PROCESS.threads()}
+
+def _reaped_children_cpu() -> float:
+    """已退出并回收的子进程累计CPU时间（秒），不支持的平台返回0"""
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+def _process_cpu(pid: Optional[int]) -> float:
+    """运行中子进程的累计CPU时间（秒）"""
+    if pid is None:
+        return 0.0
+    try:
+        times = psutil.Process(pid).cpu_times()
+        return times.user + times.system
+    except psutil.Error:
+        return 0.0
+
+def snapshot_mode_enabled(
+    config: Optional[Dict[str, Any]],
+    analyze_interval: float,
+    decoder_options: Optional[Dict[str, Any]] = None
+) -> bool:
+    """是否使用快照模式
+
+    auto 只在使用 ffmpeg 解码时启用：OpenCV 解码不能只取关键帧，每次重连都要等待并解码到下一个关键帧
+
+    Args:
+        config: 任务检测配置，snapshot_mode 为 auto（默认，按 SNAPSHOT 配置和分析间隔）、on 或 off
+        analyze_interval: 分析间隔（秒）
+        decoder_options: 解码参数，None 表示使用 OpenCV 解码
+    """
+    mode = (config or {}).get("snapshot_mode") or "auto"
+    if mode == "off":
+        return False
+    if mode == "on":
+        return True
+    return (
+        settings.SNAPSHOT.enabled
+        and analyze_interval >= settings.SNAPSHOT.min_interval
+        and decoder_options is not None
+        and ffmpeg_available()
+    )
+
+class WarmKeepPolicy:
+    """单路摄像头的连接保温策略"""
+
+    def __init__(self, interval: float, mode: Optional[str] = None):
+        """初始化保温策略
+
+        Args:
+            interval: 分析间隔（秒）
+            mode: auto-按实测开销决定, always-始终保持会话, never-每次分析后断开
+        """
+        self.interval = interval
+        self.mode = mode or settings.SNAPSHOT.warm_keep
+        self.connect_latency: Optional[float] = None
+        self.connect_cpu: Optional[float] = None
+        self.idle_cpu_rate = settings.SNAPSHOT.idle_cpu_estimate
+
+    def record_connect(self, latency: float, cpu: float):
+        self.connect_latency = _ema(self.connect_latency, latency)
+        self.connect_cpu = _ema(self.connect_cpu, cpu)
+
+    def record_idle(self, cpu: float, wall: float):
+        if wall > 0:
+            self.idle_cpu_rate = _ema(self.idle_cpu_rate, cpu / wall)
+
+    def keep_warm(self) -> bool:
+        if self.mode == "always":
+            return True
+        if self.mode == "never" or self.connect_latency is None:
+            return False
+        if self.connect_latency >= self.interval * settings.SNAPSHOT.latency_ratio:
+            return True
+        return self.connect_cpu >= self.idle_cpu_rate * self.interval
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "interval": self.interval,
+            "connect_latency": round(self.connect_latency, 3) if self.connect_latency is not None else None,
+            "connect_cpu": round(self.connect_cpu, 3) if self.connect_cpu is not None else None,
+            "idle_cpu_rate": round(self.idle_cpu_rate, 4),
+            "keep_warm": self.keep_warm()
+        }
+
+class SnapshotSource:
+    """快照取流源，由单个流分析任务独占"""
+
+    def __init__(
+        self,
+        url: str,
+        opener: Callable[[str, Optional[Dict[str, Any]]], Any],
+        interval: float,
+        options: Optional[Dict[str, Any]] = None,
+        warm_keep: Optional[str] = None
+    ):
+        """初始化快照源
+
+        Args:
+            url: 流地址
+            opener: 打开取流源的函数 opener(url, options)
+            interval: 分析间隔（秒）
+            options: 解码参数
+            warm_keep: 保温策略，默认使用 SNAPSHOT.warm_keep
+        """
+        self.url = url
+        self.opener = opener
+        self.options = options
+        self.policy = WarmKeepPolicy(interval, warm_keep)
+        self.capture: Any = None
+        self._lock = threading.Lock()
+        self._snapshot_lock = threading.Lock()
+        self._drain_thread: Optional[threading.Thread] = None
+        self._draining = False
+        # 打开取流源时新建的线程（OpenCV解码线程），其CPU时间计入取流开销
+        self._capture_threads: Set[int] = set()
+
+        self.width = 0
+        self.height = 0
+        self.fps = 25.0
+        self.scale = 1.0
+        self.skipped = 0
+        self.finished = False
+        self.end_reason: Optional[str] = None
+        self.closed = False
+
+        self.connects = 0
+        self.snapshots = 0
+        self.failures = 0
+        self._consecutive_failures = 0
+
+    def _capture_cpu(self) -> float:
+        """取流源自身的累计CPU时间：解码线程 + ffmpeg 子进程（不含调用线程）"""
+        threads = _thread_cpu()
+        cpu = sum(threads.get(tid, 0.0) for tid in self._capture_threads)
+        return cpu + _process_cpu(getattr(self.capture, "pid", None))
+
+    def _connect(self) -> bool:
+        """建立连接并记录重连开销（阻塞）"""
+        threads_before = _thread_cpu()
+        start, cpu_start, reaped_start = time.monotonic(), time.thread_time(), _reaped_children_cpu()
+        capture = self.opener(self.url, self.options)
+        if not capture.isOpened():
+            capture.release()
+            return False
+        self.capture = capture
+        self._capture_threads = set(_thread_cpu()) - set(threads_before) - {threading.get_native_id()}
+        cpu = (time.thread_time() - cpu_start) + (_reaped_children_cpu() - reaped_start) + self._capture_cpu()
+        self.policy.record_connect(time.monotonic() - start, cpu)
+        self.connects += 1
+        self.width = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH) or 0)
+        self.height = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT) or 0)
+        self.fps = float(capture.get(cv2.CAP_PROP_FPS) or 0) or 25.0
+        self.scale = float(getattr(capture, "scale", 1.0))
+        return True
+
+    def _disconnect(self):
+        if self.capture is not None:
+            self.capture.release()
+            self.capture = None
+        self._capture_threads = set()
+
+    def _drain(self):
+        """保温：会话空转时持续读取，避免服务端缓冲积压或超时断开，并统计空转开销"""
+        start, cpu_start = time.monotonic(), time.thread_time() + self._capture_cpu()
+        while self._draining:
+            with self._lock:
+                if self.capture is None or not self.capture.grab():
+                    # 会话已断开，下次分析时重连
+                    break
+        with self._lock:
+            cpu = time.thread_time() + self._capture_cpu() - cpu_start
+            self.policy.record_idle(max(0.0, cpu), time.monotonic() - start)
+            if self._draining:
+                self._disconnect()
+
+    def _start_drain(self):
+        self._draining = True
+        self._drain_thread = threading.Thread(target=self._drain, name="SnapshotDrain", daemon=True)
+        self._drain_thread.start()
+
+    def _stop_drain(self):
+        self._draining = False
+        if self._drain_thread is not None:
+            self._drain_thread.join()
+            self._drain_thread = None
+
+    def _snapshot(self) -> Optional[StreamFrame]:
+        """取一帧快照（阻塞）：未连接时先连接，取帧后按保温策略断开或继续空转
+        
+        上一次快照超时仍在执行时等待其结束，同一时刻只有一个快照在读取
+        """
+        with self._snapshot_lock:
+            self._stop_drain()
+            if self.closed:
+                return None
+            if self.capture is None and not self._connect():
+                return None
+
+            with self._lock:
+                ok, image = self.capture.read()
+            if not ok or image is None:
+                self._disconnect()
+                return None
+
+            capture_ts = time.time()
+            self.snapshots += 1
+            if self.policy.keep_warm() and not self.closed:
+                self._start_drain()
+            else:
+                self._disconnect()
+            image.setflags(write=False)
+            return StreamFrame(image, capture_ts, self.snapshots, self.snapshots)
+
+    async def start(self) -> bool:
+        """首次连接以获取画面尺寸，之后按保温策略决定是否保持"""
+        loop = asyncio.get_running_loop()
+        if not await loop.run_in_executor(_executor, self._connect):
+            return False
+        if self.policy.keep_warm():
+            self._start_drain()
+        else:
+            self._disconnect()
+        return True
+
+    async def read(self, timeout: Optional[float] = None) -> Optional[StreamFrame]:
+        """取一帧快照
+
+        Returns:
+            Optional[StreamFrame]: 失败或超时时返回None；连续失败超过 SNAPSHOT.max_failures 次后视为流结束
+        """
+        if self.closed or self.finished:
+            return None
+        loop = asyncio.get_running_loop()
+        if timeout is not None:
+            # 快照包含建连和等待关键帧，超时在实测连接耗时之上放宽
+            timeout += self.policy.connect_latency or 0
+        try:
+            item = await asyncio.wait_for(loop.run_in_executor(_executor, self._snapshot), timeout)
+        except asyncio.TimeoutError:
+            item = None
+        except Exception as e:
+            logger.error(f"快照取帧失败 {self.url}: {str(e)}")
+            item = None
+
+        if item is None:
+            self.failures += 1
+            self._consecutive_failures += 1
+            if self._consecutive_failures >= settings.SNAPSHOT.max_failures:
+                self.finished = True
+                self.end_reason = "error"
+            return None
+        self._consecutive_failures = 0
+        return item
+
+    def _shutdown(self):
+        # 等待进行中的快照结束，避免其在关闭后重新启动空转
+        with self._snapshot_lock:
+            self._stop_drain()
+            with self._lock:
+                self._disconnect()
+
+    def close(self):
+        """关闭快照源
+
+        空转线程可能阻塞在停滞会话的 grab 上，正在执行的快照也可能持有锁，
+        等待线程结束和释放连接放到快照线程池执行，不阻塞事件循环
+        """
+        if self.closed:
+            return
+        self.closed = True
+        self._draining = False
+        try:
+            asyncio.get_running_loop().run_in_executor(_executor, self._shutdown)
+        except RuntimeError:
+            self._shutdown()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connected": self.capture is not None,
+            "connects": self.connects,
+            "snapshots": self.snapshots,
+            "failures": self.failures,
+            "policy": self.policy.stats()
+        }
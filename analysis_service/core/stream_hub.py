@@ -0,0 +1,344 @@
+"""
+节点级取流中心
+同一路流（按规范化地址和解码参数）只建立一个连接、由一个取流线程读取，按引用计数共享给所有订阅任务；
+解码后的帧以只读数组发布给正在等待的订阅者，不做拷贝，最后一个订阅者退出时关闭连接
+
+取流线程持续 grab 保持读取进度，只有存在等待中的订阅者时才解码，
+因此分析间隔较长的任务不会为被丢弃的帧付出解码开销
+"""
+import time
+import json
+import asyncio
+import itertools
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlparse, urlunparse
+import cv2
+import numpy as np
+from core.config import settings
+from core.replay import _strip_credentials
+from shared.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+_thread_ids = itertools.count()
+
+def normalize_stream_url(url: str) -> str:
+    """规范化流地址：去除首尾空白，协议与主机名小写，去掉末尾斜杠"""
+    url = url.strip()
+    parsed = urlparse(url)
+    if not parsed.scheme or not parsed.netloc:
+        return url
+    netloc = parsed.netloc
+    if parsed.hostname:
+        host = parsed.hostname
+        userinfo = netloc.rsplit("@", 1)[0] + "@" if "@" in netloc else ""
+        port = f":{parsed.port}" if parsed.port else ""
+        netloc = f"{userinfo}{host.lower()}{port}"
+    path = parsed.path.rstrip("/") or parsed.path
+    return urlunparse(parsed._replace(scheme=parsed.scheme.lower(), netloc=netloc, path=path))
+
+@dataclass
+class StreamFrame:
+    """发布给订阅者的帧"""
+    image: np.ndarray      # 只读BGR帧，所有订阅者共享同一数组
+    capture_ts: float      # 取流线程读出该帧的挂钟时间
+    seq: int               # 解码序号
+    grab_index: int        # 自连接建立以来读取的总帧数
+
+class StreamSubscription:
+    """订阅者句柄，由单个流分析任务持有"""
+
+    def __init__(self, stream: "SharedStream", subscriber_id: str):
+        self.stream = stream
+        self.subscriber_id = subscriber_id
+        self._loop = asyncio.get_running_loop()
+        self._future: Optional[asyncio.Future] = None
+        self._last_grab_index: Optional[int] = None
+        self.skipped = 0
+        self.closed = False
+
+    @property
+    def width(self) -> int:
+        return self.stream.width
+
+    @property
+    def height(self) -> int:
+        return self.stream.height
+
+    @property
+    def fps(self) -> float:
+        return self.stream.fps
+
+    @property
+    def scale(self) -> float:
+        """原图像素与解码帧像素之比（解码器降分辨率时大于1）"""
+        return self.stream.scale
+
+    @property
+    def finished(self) -> bool:
+        """流已结束（回放结束或断流重连失败）"""
+        return self.stream.ended
+
+    @property
+    def end_reason(self) -> Optional[str]:
+        return self.stream.end_reason
+
+    def _deliver(self, item: Optional[StreamFrame]):
+        """取流线程调用，把帧交给事件循环"""
+        future = self._future
+        if future is None:
+            return
+
+        def resolve():
+            if not future.done():
+                future.set_result(item)
+
+        self._loop.call_soon_threadsafe(resolve)
+
+    async def read(self, timeout: Optional[float] = None) -> Optional[StreamFrame]:
+        """等待下一帧
+
+        Args:
+            timeout: 超时（秒）
+
+        Returns:
+            Optional[StreamFrame]: 新帧；超时或流结束时返回None（通过 finished 区分）
+        """
+        if self.closed or self.stream.ended:
+            return None
+        self._future = self._loop.create_future()
+        self.stream.add_waiting(self)
+        try:
+            item = await asyncio.wait_for(self._future, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self.stream.remove_waiting(self)
+            self._future = None
+
+        if item is not None:
+            # 两次读取之间取流线程读过但本订阅者未使用的帧数
+            if self._last_grab_index is not None:
+                self.skipped = max(0, item.grab_index - self._last_grab_index - 1)
+            self._last_grab_index = item.grab_index
+        return item
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.stream.hub.unsubscribe(self)
+
+class SharedStream:
+    """一路共享流：一个连接、一个取流线程、若干订阅者"""
+
+    def __init__(self, hub: "StreamHub", key: str, url: str, capture: Any, options: Optional[Dict[str, Any]] = None):
+        self.hub = hub
+        self.key = key
+        self.url = url
+        self.options = options
+        self.capture = capture
+        self.width = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH) or 0)
+        self.height = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT) or 0)
+        self.fps = float(capture.get(cv2.CAP_PROP_FPS) or 0) or 25.0  # 默认为25fps
+        self.scale = float(getattr(capture, "scale", 1.0))
+        # 回放尽快模式等由消费方决定节奏的源：只在有订阅者等待时才读取，不丢帧
+        self.pull = bool(getattr(capture, "consumer_paced", False))
+
+        self.subscribers: List[StreamSubscription] = []
+        self._waiting: List[StreamSubscription] = []
+        self._cond = threading.Condition()
+        self._stop = False
+        self.ended = False
+        self.end_reason: Optional[str] = None
+
+        self.grabbed = 0
+        self.decoded = 0
+        self.reconnects = 0
+        self.opened_at = time.time()
+        self._thread = threading.Thread(target=self._run, name=f"StreamHub-{next(_thread_ids)}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+
+    def add_waiting(self, subscription: StreamSubscription):
+        with self._cond:
+            if subscription not in self._waiting:
+                self._waiting.append(subscription)
+            self._cond.notify_all()
+
+    def remove_waiting(self, subscription: StreamSubscription):
+        with self._cond:
+            if subscription in self._waiting:
+                self._waiting.remove(subscription)
+
+    def _end(self, reason: str):
+        with self._cond:
+            self.ended = True
+            self.end_reason = reason
+            waiting, self._waiting = self._waiting, []
+        for subscription in waiting:
+            subscription._deliver(None)
+
+    def _reopen(self) -> bool:
+        """断流后重连一次，失败则结束该流"""
+        logger.warning(f"读取帧失败，尝试重新打开流: {self.url}")
+        try:
+            self.capture.release()
+        except Exception:
+            pass
+        time.sleep(settings.STREAM_HUB.reopen_delay)
+        if self._stop:
+            return False
+        self.capture = self.hub.opener(self.url, self.options)
+        self.reconnects += 1
+        if not self.capture.isOpened():
+            logger.error(f"重新打开流失败: {self.url}")
+            return False
+        return True
+
+    def _run(self):
+        """取流线程"""
+        try:
+            while True:
+                with self._cond:
+                    while self.pull and not self._waiting and not self._stop:
+                        self._cond.wait(0.5)
+                    if self._stop:
+                        break
+
+                if not self.capture.grab():
+                    if getattr(self.capture, "finished", False):
+                        self._end("finished")
+                        break
+                    if not self._reopen():
+                        self._end("error")
+                        break
+                    continue
+                capture_ts = time.time()
+                self.grabbed += 1
+
+                with self._cond:
+                    waiting, self._waiting = self._waiting, []
+                if not waiting:
+                    continue
+
+                ok, image = self.capture.retrieve()
+                if not ok or image is None:
+                    with self._cond:
+                        self._waiting.extend(w for w in waiting if w not in self._waiting)
+                    continue
+                image.setflags(write=False)
+                self.decoded += 1
+                item = StreamFrame(image, capture_ts, self.decoded, self.grabbed)
+                for subscription in waiting:
+                    subscription._deliver(item)
+        except Exception as e:
+            logger.error(f"取流线程异常 {self.url}: {str(e)}", exc_info=True)
+            self._end("error")
+        finally:
+            try:
+                self.capture.release()
+            except Exception:
+                pass
+            logger.info(f"共享流已关闭: {self.url}")
+
+    def stats(self) -> Dict[str, Any]:
+        # 状态经健康检查接口对外暴露，地址中的用户名密码需去除
+        return {
+            "url": _strip_credentials(self.url),
+            "subscribers": [s.subscriber_id for s in self.subscribers],
+            "width": self.width,
+            "height": self.height,
+            "fps": self.fps,
+            "decoder": type(self.capture).__name__,
+            "options": self.options,
+            "grabbed": self.grabbed,
+            "decoded": self.decoded,
+            "reconnects": self.reconnects,
+            "ended": self.ended,
+            "end_reason": self.end_reason,
+            "uptime": round(time.time() - self.opened_at, 1)
+        }
+
+class StreamHub:
+    """取流中心"""
+
+    def __init__(self, opener: Callable[[str], Any]):
+        """初始化取流中心
+
+        Args:
+            opener: 打开取流源的函数 opener(url, options)，返回与 cv2.VideoCapture 接口一致的对象
+        """
+        self.opener = opener
+        self.streams: Dict[str, SharedStream] = {}
+        self._open_locks: Dict[str, asyncio.Lock] = {}
+
+    async def subscribe(
+        self,
+        url: str,
+        subscriber_id: str,
+        options: Optional[Dict[str, Any]] = None
+    ) -> Optional[StreamSubscription]:
+        """订阅一路流，未打开时建立连接
+
+        Args:
+            url: 流地址
+            subscriber_id: 订阅者标识（任务ID）
+            options: 解码参数，参数不同的任务各自建立连接
+
+        Returns:
+            Optional[StreamSubscription]: 打开失败时返回None
+        """
+        key = normalize_stream_url(url)
+        if options:
+            key = f"{key}#{json.dumps(options, sort_keys=True)}"
+        lock = self._open_locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            stream = self.streams.get(key)
+            if stream is None or stream.ended:
+                # 建立连接可能耗时数秒，放到线程池执行
+                loop = asyncio.get_running_loop()
+                capture = await loop.run_in_executor(None, self.opener, url, options)
+                if not capture.isOpened():
+                    capture.release()
+                    return None
+                stream = SharedStream(self, key, url, capture, options)
+                self.streams[key] = stream
+                stream.start()
+                logger.info(f"打开共享流: {url}")
+            else:
+                logger.info(f"复用共享流: {url}，订阅者 {len(stream.subscribers) + 1}")
+
+            subscription = StreamSubscription(stream, subscriber_id)
+            stream.subscribers.append(subscription)
+            return subscription
+
+    def unsubscribe(self, subscription: StreamSubscription):
+        """退订，最后一个订阅者退出时关闭连接"""
+        stream = subscription.stream
+        if subscription in stream.subscribers:
+            stream.subscribers.remove(subscription)
+        stream.remove_waiting(subscription)
+        if not stream.subscribers:
+            stream.stop()
+            if self.streams.get(stream.key) is stream:
+                del self.streams[stream.key]
+
+    def close(self):
+        for stream in list(self.streams.values()):
+            stream.stop()
+        self.streams.clear()
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "streams": len(self.streams),
+            "subscribers": sum(len(s.subscribers) for s in self.streams.values()),
+            "details": [s.stats() for s in self.streams.values()]
+        }
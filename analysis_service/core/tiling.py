@@ -0,0 +1,134 @@
+"""
+切片推理模块
+将高分辨率图片切分为相互重叠的切片，以模型原生分辨率推理后跨切片合并结果，
+避免小目标在整图缩放时丢失
+"""
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+from core.config import settings
+from core.exceptions import InvalidInputException
+
+MERGE_METRICS = ("ios", "iou")
+
+def create_tiling_options(config: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """合并服务级 TILING 配置与任务配置
+
+    Args:
+        config: 任务检测配置，可包含 tiling 字段
+
+    Returns:
+        Optional[Dict[str, Any]]: 未启用时返回None
+
+    Raises:
+        InvalidInputException: 切片配置不合法（取值范围与请求模型 TilingConfig 一致）
+    """
+    tiling = (config or {}).get("tiling") or {}
+    if not isinstance(tiling, dict):
+        raise InvalidInputException("tiling 必须为对象")
+    options = settings.TILING.dict()
+    options.update({k: v for k, v in tiling.items() if v is not None})
+    if not options.get("enabled"):
+        return None
+
+    try:
+        options["tile_size"] = int(options["tile_size"])
+        options["overlap"] = float(options["overlap"])
+        options["merge_threshold"] = float(options["merge_threshold"])
+    except (TypeError, ValueError):
+        raise InvalidInputException(f"切片配置类型错误: {tiling}")
+    if not 128 <= options["tile_size"] <= 2048:
+        raise InvalidInputException("tiling.tile_size 取值范围为 128-2048")
+    if not 0 <= options["overlap"] <= 0.5:
+        raise InvalidInputException("tiling.overlap 取值范围为 0-0.5")
+    if not 0 < options["merge_threshold"] <= 1:
+        raise InvalidInputException("tiling.merge_threshold 取值范围为 (0, 1]")
+    if options.get("merge_metric") not in MERGE_METRICS:
+        raise InvalidInputException(f"tiling.merge_metric 仅支持 {', '.join(MERGE_METRICS)}")
+    return options
+
+def generate_tiles(width: int, height: int, tile_size: int, overlap: float) -> List[Tuple[int, int, int, int]]:
+    """生成覆盖整张图片的切片坐标
+
+    最后一行/列切片向内对齐到图片边缘，保证所有切片尺寸一致
+
+    Args:
+        width: 图片宽度
+        height: 图片高度
+        tile_size: 切片边长（像素）
+        overlap: 相邻切片重叠比例（0-1）
+
+    Returns:
+        List[Tuple[int, int, int, int]]: 切片坐标 (x1, y1, x2, y2)
+    """
+    stride = max(1, int(tile_size * (1 - overlap)))
+
+    def starts(length: int) -> List[int]:
+        if length <= tile_size:
+            return [0]
+        positions = list(range(0, length - tile_size, stride))
+        positions.append(length - tile_size)
+        return positions
+
+    return [
+        (x, y, min(x + tile_size, width), min(y + tile_size, height))
+        for y in starts(height)
+        for x in starts(width)
+    ]
+
+def _match_scores(box: np.ndarray, others: np.ndarray, metric: str) -> np.ndarray:
+    """计算一个框与一组框的匹配度（IoU或交集占较小框比例IoS）"""
+    x1 = np.maximum(box[0], others[:, 0])
+    y1 = np.maximum(box[1], others[:, 1])
+    x2 = np.minimum(box[2], others[:, 2])
+    y2 = np.minimum(box[3], others[:, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area = (box[2] - box[0]) * (box[3] - box[1])
+    other_areas = (others[:, 2] - others[:, 0]) * (others[:, 3] - others[:, 1])
+    if metric == "ios":
+        denom = np.minimum(area, other_areas)
+    else:
+        denom = area + other_areas - inter
+    return np.where(denom > 0, inter / np.maximum(denom, 1e-9), 0.0)
+
+def merge_detections(
+    detections: List[Dict[str, Any]],
+    metric: str = "ios",
+    threshold: float = 0.6
+) -> List[Dict[str, Any]]:
+    """跨切片合并检测结果（按类别做NMS）
+
+    切片边界会把目标切成多个局部框，IoS（交集/较小框面积）比IoU更容易把局部框
+    归并到完整框上
+
+    Args:
+        detections: 已映射到原图坐标的检测结果
+        metric: 匹配度量，'ios' 或 'iou'
+        threshold: 匹配度超过该值的低置信度框被抑制
+
+    Returns:
+        List[Dict[str, Any]]: 合并后的检测结果
+    """
+    if len(detections) <= 1:
+        return detections
+
+    boxes = np.array([
+        [d["bbox"]["x1"], d["bbox"]["y1"], d["bbox"]["x2"], d["bbox"]["y2"]]
+        for d in detections
+    ], dtype=np.float32)
+    scores = np.array([d["confidence"] for d in detections], dtype=np.float32)
+    classes = np.array([d["class_id"] for d in detections])
+
+    keep = []
+    for cls in np.unique(classes):
+        indices = np.where(classes == cls)[0]
+        indices = indices[np.argsort(-scores[indices])]
+        while len(indices) > 0:
+            current = indices[0]
+            keep.append(current)
+            if len(indices) == 1:
+                break
+            rest = indices[1:]
+            indices = rest[_match_scores(boxes[current], boxes[rest], metric) < threshold]
+
+    keep.sort(key=lambda i: -scores[i])
+    return [detections[i] for i in keep]
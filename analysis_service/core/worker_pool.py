@@ -0,0 +1,261 @@
+"""
+多进程推理工作池
+N 个推理进程各自持有模型注册表，绕开单进程GIL对推理前后处理的串行化；
+帧写入 multiprocessing.shared_memory 环形缓冲区的槽位，请求队列只传递槽位号和形状，
+工作进程直接在共享内存上推理，回传紧凑的检测数组 (N, 6): x1, y1, x2, y2, conf, cls
+"""
+import os
+import sys
+import time
+import queue
+import asyncio
+import itertools
+import threading
+import multiprocessing as mp
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from core.config import settings
+from core import inference_worker
+from core.inference_worker import FrameRing
+from shared.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+@contextmanager
+def _worker_main_module():
+    """启动工作进程期间把 __main__ 指向工作进程入口模块
+
+    spawn 方式下子进程会重新执行父进程的 __main__；服务以 python app.py 启动时，
+    这会在每个工作进程里重新导入路由并构建完整的检测器。临时替换后子进程只执行入口模块
+    """
+    main_module = sys.modules["__main__"]
+    sys.modules["__main__"] = inference_worker
+    try:
+        yield
+    finally:
+        sys.modules["__main__"] = main_module
+
+class _Worker:
+    """主进程中的工作进程句柄"""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.process: Optional[mp.Process] = None
+        self.requests: Any = None
+        self.outstanding = 0
+        self.processed = 0
+        self.failed = 0
+        self.restarts = 0
+        self.pid: Optional[int] = None
+        self.ready = False
+
+class InferenceWorkerPool:
+    """多进程推理工作池"""
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        torch_threads: Optional[int] = None,
+        slots: Optional[int] = None,
+        slot_bytes: Optional[int] = None,
+        device: str = "cpu"
+    ):
+        config = settings.WORKER_POOL
+        self.worker_count = workers or config.workers or max(1, (os.cpu_count() or 2) // 2)
+        self.torch_threads = torch_threads or config.torch_threads
+        self.slots = slots or config.slots or self.worker_count * 4
+        self.slot_bytes = slot_bytes or config.max_frame_width * config.max_frame_height * 3
+        self.device = device
+        self.timeout = config.request_timeout
+
+        self._ctx = mp.get_context("spawn")  # CUDA 和 torch 线程池在 fork 后不可用
+        self.ring: Optional[FrameRing] = None
+        self.workers: List[_Worker] = []
+        self._responses: Any = None
+        self._pending: Dict[int, Tuple[asyncio.Future, _Worker, int]] = {}
+        self._free_slots: Optional[asyncio.Queue] = None
+        self._names: Dict[str, Dict[int, str]] = {}
+        self._ids = itertools.count()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._reader: Optional[threading.Thread] = None
+        self._running = False
+
+    def start(self):
+        """启动工作进程（需在事件循环中调用）"""
+        if self._running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self.ring = FrameRing(self.slots, self.slot_bytes)
+        self._free_slots = asyncio.Queue()
+        for slot in range(self.slots):
+            self._free_slots.put_nowait(slot)
+        self._responses = self._ctx.Queue()
+        self.workers = [_Worker(index) for index in range(self.worker_count)]
+        for worker in self.workers:
+            self._spawn(worker)
+        self._running = True
+        self._reader = threading.Thread(target=self._read_responses, name="InferencePoolReader", daemon=True)
+        self._reader.start()
+        logger.info(
+            f"推理工作池已启动: {self.worker_count} 个进程, 每进程 {self.torch_threads} 个Torch线程, "
+            f"{self.slots} 个共享内存槽位 x {self.slot_bytes // 1024}KB"
+        )
+
+    def _spawn(self, worker: _Worker):
+        worker.requests = self._ctx.Queue()
+        worker.ready = False
+        worker.process = self._ctx.Process(
+            target=inference_worker.worker_main,
+            args=(
+                worker.index, self.ring.name, self.slots, self.slot_bytes,
+                worker.requests, self._responses, self.torch_threads, self.device
+            ),
+            name=f"InferenceWorker-{worker.index}",
+            daemon=True
+        )
+        with _worker_main_module():
+            worker.process.start()
+
+    def _read_responses(self):
+        """读取工作进程的回传结果，并每秒检查一次进程存活"""
+        last_check = time.monotonic()
+        while self._running:
+            try:
+                message = self._responses.get(timeout=1.0)
+                self._loop.call_soon_threadsafe(self._handle_message, message)
+            except queue.Empty:
+                pass
+            except (EOFError, OSError):
+                break
+            if time.monotonic() - last_check >= 1.0:
+                last_check = time.monotonic()
+                self._check_workers()
+
+    def _check_workers(self):
+        for worker in self.workers:
+            if self._running and worker.process is not None and not worker.process.is_alive():
+                self._loop.call_soon_threadsafe(self._restart_worker, worker)
+
+    def _restart_worker(self, worker: _Worker):
+        """工作进程异常退出：失败其未完成请求，回收槽位并重启"""
+        if not self._running or worker.process is None or worker.process.is_alive():
+            return
+        logger.error(f"推理工作进程 {worker.index} 异常退出(exitcode={worker.process.exitcode})，重新启动")
+        for request_id, (_, owner, _) in list(self._pending.items()):
+            if owner is worker:
+                self._complete(request_id, None, None, "推理工作进程异常退出")
+        worker.restarts += 1
+        self._spawn(worker)
+
+    def _handle_message(self, message: Tuple):
+        if message[0] == "ready":
+            _, index, pid = message
+            self.workers[index].pid = pid
+            self.workers[index].ready = True
+            return
+        self._complete(*message)
+
+    def _complete(self, request_id: int, data: Optional[np.ndarray], names: Optional[Dict[int, str]], error: Optional[str]):
+        entry = self._pending.pop(request_id, None)
+        if entry is None:
+            return
+        future, worker, slot = entry
+        worker.outstanding -= 1
+        # 工作进程已读完该槽位，回收
+        self._free_slots.put_nowait(slot)
+        if error is None:
+            worker.processed += 1
+        else:
+            worker.failed += 1
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(RuntimeError(error))
+        else:
+            future.set_result((data, names))
+
+    async def infer(
+        self,
+        model_code: str,
+        model_path: str,
+        frame: np.ndarray,
+        params: Dict[str, Any]
+    ) -> Tuple[np.ndarray, Dict[int, str]]:
+        """在工作进程中推理一帧
+
+        Args:
+            model_code: 模型代码
+            model_path: 本地权重路径，工作进程首次使用该模型时加载
+            frame: BGR帧（可为非连续视图）
+            params: 推理参数 conf/iou/classes/imgsz
+
+        Returns:
+            Tuple[np.ndarray, Dict[int, str]]: 帧像素坐标的检测数组 (N, 6) 和类别名称
+        """
+        if not self._running:
+            raise RuntimeError("推理工作池未启动")
+        slot = await self._free_slots.get()
+        try:
+            shape = self.ring.write(slot, frame)
+        except Exception:
+            self._free_slots.put_nowait(slot)
+            raise
+
+        # 分派给未完成请求最少的进程
+        worker = min(self.workers, key=lambda w: w.outstanding)
+        request_id = next(self._ids)
+        future = self._loop.create_future()
+        self._pending[request_id] = (future, worker, slot)
+        worker.outstanding += 1
+        worker.requests.put((request_id, model_code, model_path, slot, shape, params))
+
+        # 超时后槽位仍由工作进程持有，直到结果回传才回收
+        data, names = await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        if names is not None:
+            self._names[model_code] = names
+        return data, self._names.get(model_code, {})
+
+    async def stop(self):
+        """停止工作进程并释放共享内存"""
+        if not self._running:
+            return
+        self._running = False
+        for worker in self.workers:
+            try:
+                worker.requests.put(None)
+            except Exception:
+                pass
+        loop = asyncio.get_running_loop()
+        for worker in self.workers:
+            await loop.run_in_executor(None, worker.process.join, 5)
+            if worker.process.is_alive():
+                worker.process.terminate()
+        for request_id in list(self._pending):
+            self._complete(request_id, None, None, "推理工作池已停止")
+        if self._reader is not None:
+            self._reader.join(timeout=2)
+        self.ring.close()
+        logger.info("推理工作池已停止")
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "running": self._running,
+            "workers": [
+                {
+                    "index": w.index,
+                    "pid": w.pid,
+                    "ready": w.ready,
+                    "alive": w.process.is_alive() if w.process is not None else False,
+                    "outstanding": w.outstanding,
+                    "processed": w.processed,
+                    "failed": w.failed,
+                    "restarts": w.restarts
+                }
+                for w in self.workers
+            ],
+            "torch_threads": self.torch_threads,
+            "slots": self.slots,
+            "free_slots": self._free_slots.qsize() if self._free_slots is not None else 0,
+            "slot_kb": self.slot_bytes // 1024
+        }
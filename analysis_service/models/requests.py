@@ -1,6 +1,62 @@
-from typing import List, Optional, Tuple, Dict, Any
+from typing import List, Literal, Optional, Tuple, Dict, Any
 from pydantic import BaseModel, Field
 
+class SamplingConfig(BaseModel):
+    """视频帧采样配置"""
+    policy: Optional[Literal["fixed", "target_fps", "scene_change", "densify"]] = Field(
+        None,
+        description="采样策略: fixed-固定间隔, target_fps-目标分析帧率, "
+                    "scene_change-场景变化驱动, densify-检测到目标后加密采样；默认使用服务级 VIDEO_SAMPLING.policy",
+        example="target_fps"
+    )
+    frame_interval: Optional[int] = Field(None, description="fixed策略: 每N帧分析一次", ge=1, example=3)
+    target_fps: Optional[float] = Field(None, description="target_fps策略: 目标分析帧率", gt=0, example=5)
+    probe_fps: Optional[float] = Field(None, description="scene_change策略: 探测帧率", gt=0, example=5)
+    scene_threshold: Optional[float] = Field(
+        None,
+        description="scene_change策略: 灰度直方图距离阈值，越小越敏感",
+        gt=0,
+        lt=1,
+        example=0.3
+    )
+    min_interval: Optional[float] = Field(None, description="scene_change策略: 最短分析间隔(秒)", ge=0, example=0.2)
+    max_interval: Optional[float] = Field(None, description="scene_change策略: 最长分析间隔(秒)", gt=0, example=5)
+    sparse_fps: Optional[float] = Field(None, description="densify策略: 无目标时的分析帧率", gt=0, example=1)
+    dense_fps: Optional[float] = Field(None, description="densify策略: 有目标时的分析帧率", gt=0, example=10)
+    hold_seconds: Optional[float] = Field(None, description="densify策略: 目标消失后保持密集采样的时长(秒)", ge=0, example=2)
+
+class TilingConfig(BaseModel):
+    """切片推理配置"""
+    enabled: bool = Field(True, description="是否启用切片推理")
+    tile_size: Optional[int] = Field(None, description="切片边长(像素)", ge=128, le=2048, example=640)
+    overlap: Optional[float] = Field(None, description="相邻切片重叠比例", ge=0, le=0.5, example=0.2)
+    full_image_pass: Optional[bool] = Field(None, description="是否追加整图缩放推理以检出大目标")
+    merge_metric: Optional[Literal["ios", "iou"]] = Field(None, description="跨切片合并度量: ios-交集/较小框面积, iou", example="ios")
+    merge_threshold: Optional[float] = Field(None, description="跨切片合并阈值", gt=0, le=1, example=0.6)
+
+class CascadeConfig(BaseModel):
+    """级联推理配置"""
+    model_code: str = Field(..., description="二级模型代码，在主模型检测框的裁剪图上推理", example="model-helmet")
+    parent_classes: Optional[List[int]] = Field(None, description="参与级联的主模型类别，默认全部", example=[0])
+    classes: Optional[List[int]] = Field(None, description="二级模型类别过滤")
+    confidence: Optional[float] = Field(None, description="二级模型置信度阈值，默认与主模型相同", gt=0, lt=1)
+    imgsz: Optional[int] = Field(None, description="二级模型推理尺寸", ge=32, le=1280, example=320)
+    padding: Optional[float] = Field(None, description="裁剪时检测框外扩比例", ge=0, le=1, example=0.1)
+    min_size: Optional[int] = Field(None, description="检测框短边小于该值(像素)时不做级联", ge=1, example=16)
+    max_crops: Optional[int] = Field(None, description="每帧最多级联的检测框数（按置信度取前N个）", ge=1, example=16)
+
+class EventConfig(BaseModel):
+    """报警事件去重配置"""
+    callback_mode: Optional[str] = Field(
+        None,
+        description="回调模式: all-按推送/报警间隔回调, change-仅在新目标、目标离开、数量变化时回调，画面不变时只发心跳",
+        example="change"
+    )
+    match_iou: Optional[float] = Field(None, description="无跟踪ID时同类别目标的位置匹配IoU阈值", gt=0, le=1, example=0.3)
+    leave_timeout: Optional[float] = Field(None, description="目标连续消失超过该时长(秒)判定离开", ge=0, example=5)
+    realarm: Optional[bool] = Field(None, description="目标持续存在超过报警间隔后是否再次报警")
+    heartbeat_interval: Optional[float] = Field(None, description="change模式下画面无变化时的心跳间隔(秒)", gt=0, example=60)
+
 class DetectionConfig(BaseModel):
     """检测配置"""
     confidence: Optional[float] = Field(
@@ -48,6 +104,62 @@ class DetectionConfig(BaseModel):
         False,
         description="是否进行嵌套检测（检查目标A是否在目标B内）"
     )
+    motion_gate: Optional[Dict[str, Any]] = Field(
+        None,
+        description="运动门控配置（仅流分析有效），覆盖服务级MOTION_GATE配置。"
+                    "画面无运动时跳过推理并复用上一次检测结果",
+        example={"enabled": True, "motion_ratio": 0.002, "max_skip_duration": 30}
+    )
+    sampling: Optional[SamplingConfig] = Field(
+        None,
+        description="视频帧采样配置（仅视频分析有效），未提供时使用服务级VIDEO_SAMPLING配置"
+    )
+    events: Optional[EventConfig] = Field(
+        None,
+        description="报警事件去重配置（仅流分析有效），未提供时使用服务级EVENTS配置"
+    )
+    priority: Optional[int] = Field(
+        None,
+        description="流分析优先级（QoS），数值越大越重要；节点过载时优先级低的流先放宽分析间隔、降低推理尺寸",
+        example=0
+    )
+    tiling: Optional[TilingConfig] = Field(
+        None,
+        description="切片推理配置（仅图片分析有效），高分辨率图片切片后按原生分辨率推理，"
+                    "启用后imgsz不再生效"
+    )
+    max_frame_age: Optional[float] = Field(
+        None,
+        description="最大帧龄（秒，仅流分析有效），从采集到回调超过该时长的普通结果不再推送，报警照常发送；"
+                    "未提供时使用服务级FRESHNESS配置",
+        example=2.0
+    )
+    decoder: Optional[str] = Field(
+        None,
+        description="解码后端（流分析和视频分析）: auto-按服务级FFMPEG配置, ffmpeg-在解码器内按分析帧率降帧、"
+                    "按推理尺寸降分辨率（不可用时回退OpenCV）, opencv",
+        example="ffmpeg"
+    )
+    snapshot_mode: Optional[str] = Field(
+        None,
+        description="快照模式（仅流分析有效）: auto-SNAPSHOT.enabled、使用ffmpeg解码且分析间隔不低于SNAPSHOT.min_interval时启用, on, off；"
+                    "启用后到分析时刻才连接并解码一帧，不再持续解码",
+        example="auto"
+    )
+    warm_keep: Optional[str] = Field(
+        None,
+        description="快照模式的连接保温策略: auto-按重连开销与空转开销决定, always-保持会话, never-每次分析后断开",
+        example="auto"
+    )
+    cascade: Optional[CascadeConfig] = Field(
+        None,
+        description="级联推理配置（仅流分析有效），二级模型的检测结果挂在对应主模型目标的children下"
+    )
+    model_classes: Optional[Dict[str, List[int]]] = Field(
+        None,
+        description="附加模型的类别过滤（仅流分析多模型有效），按模型代码指定；classes只作用于主模型",
+        example={"model-helmet": [0, 1]}
+    )
 
 class TrackingConfig(BaseModel):
     """目标跟踪配置"""
@@ -189,6 +301,11 @@ class StreamTask(BaseModel):
         description="模型代码",
         example="model-gcc"
     )
+    model_codes: Optional[List[str]] = Field(
+        None,
+        description="附加模型代码列表，与model_code在同一帧上推理，结果合并后统一回调",
+        example=["model-helmet"]
+    )
     task_name: Optional[str] = Field(
         None,
         description="任务名称",
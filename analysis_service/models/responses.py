@@ -94,6 +94,8 @@ class ImageAnalysisData(BaseModel):
     start_time: Optional[float] = Field(None, description="开始时间")
     end_time: Optional[float] = Field(None, description="结束时间")
     analysis_duration: Optional[float] = Field(None, description="分析耗时（秒）")
+    results: List[Dict] = Field(default_factory=list, description="按输入顺序排列的每张图片结果")
+    timing: Optional[Dict[str, Any]] = Field(None, description="各阶段耗时（毫秒）")
 
 class VideoAnalysisData(BaseModel):
     """视频分析数据"""
@@ -2,5 +2,6 @@
 分析服务路由包
 """
 from routers.analyze import router as analyze_router
+from routers.admin import router as admin_router
 
-__all__ = ['analyze_router'] 
\ No newline at end of file
+__all__ = ['analyze_router', 'admin_router'] 
\ No newline at end of file
@@ -0,0 +1,133 @@
+"""
+运维路由模块
+提供运行中节点的采样剖析与内存剖析接口，需通过 X-Admin-Token 认证
+"""
+import hmac
+import uuid
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, Request
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field
+from core.config import settings
+from core.models import StandardResponse
+from core.exceptions import (
+    AuthenticationException,
+    ForbiddenException,
+    InvalidInputException,
+    ProcessingException
+)
+from core.profiler import sampling_profiler, memory_profiler, ProfilerBusyError
+from shared.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+async def verify_admin_token(
+    x_admin_token: Optional[str] = Header(None, description="运维令牌")
+) -> bool:
+    """验证运维令牌，未配置令牌时运维接口整体禁用"""
+    token = settings.ADMIN.token
+    if not token:
+        raise ForbiddenException("运维接口未启用，请配置 ADMIN.token")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, token):
+        raise AuthenticationException("无效的运维令牌")
+    return True
+
+router = APIRouter(
+    tags=["运维"],
+    dependencies=[Depends(verify_admin_token)]
+)
+
+class CpuProfileRequest(BaseModel):
+    """采样剖析请求"""
+    duration: float = Field(10.0, gt=0, description="剖析时长（秒），不超过 ADMIN.max_profile_seconds")
+    interval: Optional[float] = Field(None, gt=0, description="采样间隔（秒），默认 ADMIN.sample_interval")
+    format: str = Field("collapsed", description="输出格式: collapsed-折叠栈文本（火焰图输入）, json-统计信息与折叠栈")
+
+class MemoryProfileRequest(BaseModel):
+    """内存剖析请求"""
+    action: str = Field(
+        "top",
+        description="操作: start-开始追踪, stop-停止追踪, status-追踪状态, baseline-记录基线, "
+                    "top-当前分配top-N, diff-相对基线增长top-N"
+    )
+    limit: int = Field(20, ge=1, le=500, description="返回条数")
+    key_type: str = Field("lineno", description="分组方式: lineno, filename, traceback")
+    frames: Optional[int] = Field(None, ge=1, le=100, description="start时每次分配记录的栈深度")
+
+@router.post(
+    "/profile/cpu",
+    summary="采样剖析",
+    description="对进程内所有线程进行限时采样剖析，返回可用于火焰图的折叠栈"
+)
+async def profile_cpu(request: Request, body: CpuProfileRequest):
+    """采样剖析"""
+    if body.format not in ("collapsed", "json"):
+        raise InvalidInputException(f"不支持的输出格式: {body.format}")
+
+    interval = body.interval or settings.ADMIN.sample_interval
+    logger.info(f"开始采样剖析: 时长 {body.duration}s, 间隔 {interval}s")
+    try:
+        # 在独立线程中采样，事件循环照常运行并被一同采样
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(None, sampling_profiler.profile, body.duration, interval)
+    except ProfilerBusyError as e:
+        raise ProcessingException(str(e))
+
+    collapsed = sampling_profiler.to_collapsed(result["stacks"])
+    if body.format == "collapsed":
+        return PlainTextResponse(collapsed)
+
+    return StandardResponse(
+        requestId=str(uuid.uuid4()),
+        path=str(request.url.path),
+        success=True,
+        message="采样剖析完成",
+        code=200,
+        data={
+            "samples": result["samples"],
+            "duration": result["duration"],
+            "interval": result["interval"],
+            "unique_stacks": len(result["stacks"]),
+            "collapsed": collapsed
+        }
+    )
+
+@router.post(
+    "/profile/memory",
+    response_model=StandardResponse,
+    summary="内存剖析",
+    description="基于 tracemalloc 的内存分配快照，支持基线对比排查内存增长"
+)
+async def profile_memory(request: Request, body: MemoryProfileRequest) -> StandardResponse:
+    """内存剖析"""
+    if body.key_type not in ("lineno", "filename", "traceback"):
+        raise InvalidInputException(f"不支持的分组方式: {body.key_type}")
+
+    loop = asyncio.get_running_loop()
+    try:
+        if body.action == "start":
+            data = memory_profiler.start(body.frames)
+        elif body.action == "stop":
+            data = memory_profiler.stop()
+        elif body.action == "status":
+            data = memory_profiler.status()
+        elif body.action == "baseline":
+            data = await loop.run_in_executor(None, memory_profiler.baseline)
+        elif body.action == "top":
+            data = {"stats": await loop.run_in_executor(None, memory_profiler.top, body.limit, body.key_type)}
+        elif body.action == "diff":
+            data = {"stats": await loop.run_in_executor(None, memory_profiler.diff, body.limit, body.key_type)}
+        else:
+            raise InvalidInputException(f"不支持的操作: {body.action}")
+    except RuntimeError as e:
+        raise InvalidInputException(str(e))
+
+    return StandardResponse(
+        requestId=str(uuid.uuid4()),
+        path=str(request.url.path),
+        success=True,
+        message="内存剖析完成",
+        code=200,
+        data=data
+    )
@@ -7,13 +7,14 @@ import json
 import uuid
 import tempfile
 from pathlib import Path
-from typing import List, Optional, Union
+from typing import List, Optional, Union, Tuple
 from fastapi import APIRouter, HTTPException, Depends, File, UploadFile, Form, BackgroundTasks, Request
 from pydantic import BaseModel, Field, validator
 from core.detector import YOLODetector
 from core.redis_manager import RedisManager
 from core.task_queue import TaskQueue, TaskStatus
-from core.resource import ResourceMonitor
+from core.resource import ResourceMonitor, resource_sampler
+from core.multi_model import resolve_model_codes
 from core.models import (
     StandardResponse,
     AnalysisType,
@@ -29,6 +30,7 @@ from core.exceptions import (
     ProcessingException,
     ResourceNotFoundException
 )
+from models.requests import DetectionConfig
 from models.responses import (
     ImageAnalysisResponse,
     VideoAnalysisResponse,
@@ -88,10 +90,21 @@ class BaseAnalysisRequest(BaseModel):
     callback_urls: Optional[str] = Field(None, description="用户回调地址，多个用逗号分隔。仅当enable_callback=true时生效。")
     enable_callback: bool = Field(False, description="是否启用用户回调。注意：系统级回调始终启用，不受此参数控制。")
     save_result: bool = Field(False, description="是否保存结果")
-    config: Optional[dict] = Field(None, description="分析配置")
+    config: Optional[dict] = Field(None, description="分析配置，字段定义见 DetectionConfig")
     
     model_config = {"protected_namespaces": ()}
 
+    @validator('config')
+    def validate_config(cls, v):
+        """按 DetectionConfig 校验分析配置，不合法时在请求阶段返回4xx
+
+        校验后的已知字段（类型转换、嵌套配置）覆盖原值，DetectionConfig 之外的字段原样保留
+        """
+        if v is None:
+            return v
+        validated = DetectionConfig(**v)
+        return {**v, **validated.dict(exclude_unset=True)}
+
 class ImageAnalysisRequest(BaseAnalysisRequest):
     """图片分析请求"""
     image_urls: List[str] = Field(..., description="图片URL列表，支持以下格式：\n- HTTP/HTTPS URL\n- Base64编码的图片数据（以 'data:image/' 开头）\n- Blob URL（以 'blob:' 开头）")
@@ -126,9 +139,15 @@ class VideoAnalysisRequest(BaseAnalysisRequest):
 class StreamAnalysisRequest(BaseAnalysisRequest):
     """流分析请求"""
     stream_url: str = Field(..., description="流URL")
+    model_codes: Optional[List[str]] = Field(None, description="附加模型代码列表，与model_code在同一帧上推理，检测结果按model_code标记后合并，统一绘制和回调")
     analysis_type: AnalysisType = Field(AnalysisType.DETECTION, description="分析类型")
     task_id: Optional[str] = Field(None, description="任务ID，如果不提供将自动生成")
     callback_url: Optional[str] = Field(None, description="系统回调URL，优先作为系统级回调地址。系统回调始终执行，如果失败会导致任务停止。")
+    analyze_interval: Optional[float] = Field(None, description="分析间隔(秒)，默认使用服务配置ANALYSIS.analyze_interval", gt=0)
+    push_interval: Optional[float] = Field(None, description="结果推送间隔(秒)，默认使用服务配置ANALYSIS.push_interval", ge=0)
+    alarm_interval: Optional[float] = Field(None, description="同一任务两次报警的最小间隔(秒)，默认使用服务配置ANALYSIS.alarm_interval", ge=0)
+    random_interval: Optional[Tuple[float, float]] = Field(None, description="每次分析追加的随机延迟区间(秒)，用于错开大量摄像头的分析时刻")
+    push_image: Optional[bool] = Field(None, description="普通推送回调是否携带结果图片，默认携带；为false时仅报警回调携带图片，减少绘制、编码和回调流量")
 
 class TaskStatusRequest(BaseModel):
     """任务状态查询请求"""
@@ -226,13 +245,18 @@ async def analyze_image(
                 "task_id": task_id,
                 "task_name": result.get("task_name"),
                 "status": AnalysisStatus.COMPLETED,
-                "image_url": body.image_urls[0],
+                "image_url": result.get("image_url", body.image_urls[0]),
                 "saved_path": result.get("saved_path"),
                 "objects": result.get("detections", []),
                 "result_image": result.get("result_image") if body.is_base64 else None,
                 "start_time": result.get("start_time"),
                 "end_time": result.get("end_time"),
-                "analysis_duration": result.get("analysis_duration")
+                "analysis_duration": result.get("analysis_duration"),
+                "results": [
+                    {**r, "result_image": r.get("result_image") if body.is_base64 else None}
+                    for r in result.get("results", [])
+                ],
+                "timing": result.get("timing")
             }
         )
         
@@ -409,12 +433,13 @@ async def stop_task(
     "/resource",
     response_model=StandardResponse,
     summary="获取资源状态",
-    description="获取系统资源使用状况"
+    description="获取系统资源使用状况及最近的采样历史"
 )
 async def get_resource_status(request: Request) -> StandardResponse:
     """获取资源状态"""
     try:
-        status = resource_monitor.get_status()
+        status = resource_monitor.get_resource_usage()
+        status["history"] = resource_sampler.get_history()
         return StandardResponse(
             requestId=str(uuid.uuid4()),
             path=str(request.url.path),
@@ -570,7 +595,17 @@ async def analyze_stream(
             logger.info(f"最终回调URL列表: {combined_callback_urls}")
         
         # 记录关键请求参数
-        logger.info(f"流分析关键参数: model_code={body.model_code}, stream_url={body.stream_url}, analysis_type={body.analysis_type}")
+        logger.info(f"流分析关键参数: model_code={body.model_code}, model_codes={body.model_codes}, stream_url={body.stream_url}, analysis_type={body.analysis_type}")
+        
+        # 调度间隔随任务配置保存，任务恢复时沿用
+        stream_config = dict(body.config or {})
+        for key in ("analyze_interval", "push_interval", "alarm_interval", "random_interval", "push_image"):
+            value = getattr(body, key)
+            if value is not None:
+                stream_config[key] = list(value) if key == "random_interval" else value
+        
+        # 模型数量超限属于请求错误，在启动任务前校验
+        resolve_model_codes(body.model_code, body.model_codes)
         
         # 启动流分析任务
         logger.info(f"开始启动任务 {task_id} 的流分析...")
@@ -581,16 +616,19 @@ async def analyze_stream(
                 stream_url=body.stream_url,
                 callback_urls=combined_callback_urls,
                 system_callback_url=system_callback,  # 新增：传递系统回调URL
-                config=body.config,
+                config=stream_config,
                 task_name=body.task_name,
                 enable_callback=body.enable_callback,  # 用户回调是否启用
                 save_result=body.save_result,
-                analysis_type=body.analysis_type
+                analysis_type=body.analysis_type,
+                model_codes=body.model_codes
             )
             
             logger.info(f"任务 {task_id} 创建成功，开始异步处理流分析")
             logger.info(f"任务信息: {result}")
             
+        except InvalidInputException:
+            raise
         except Exception as e:
             logger.error(f"启动任务 {task_id} 失败: {str(e)}", exc_info=True)
             raise ProcessingException(f"启动流分析任务失败: {str(e)}")
@@ -3,7 +3,7 @@
 处理模型管理相关的请求
 """
 from fastapi import APIRouter, File, UploadFile, Form, HTTPException, Depends, Request, Body, Query
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response
 from typing import List, Dict, Any
 from sqlalchemy.orm import Session
 from shared.utils.logger import setup_logger
@@ -13,6 +13,8 @@ from manager.model_manager import ModelManager
 from services.model import ModelService
 from services.database import get_db
 import os
+import asyncio
+import hashlib
 from core.config import settings
 
 # 设置文件大小限制 (100MB)
@@ -26,6 +28,24 @@ router = APIRouter(
 model_manager = ModelManager()
 model_service = ModelService()
 
+# 模型文件哈希缓存: {路径: (修改时间, 文件大小, sha256)}
+_file_hash_cache: Dict[str, tuple] = {}
+
+def get_file_sha256(path: str) -> str:
+    """计算文件SHA256，文件未变化时复用缓存结果"""
+    stat = os.stat(path)
+    cached = _file_hash_cache.get(path)
+    if cached and cached[0] == stat.st_mtime and cached[1] == stat.st_size:
+        return cached[2]
+    
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    sha256 = digest.hexdigest()
+    _file_hash_cache[path] = (stat.st_mtime, stat.st_size, sha256)
+    return sha256
+
 def validate_file(file: UploadFile) -> None:
     """验证上传文件"""
     # 检查文件大小
@@ -272,11 +292,19 @@ async def download_model(
             if error:
                 raise HTTPException(status_code=404, detail=error)
         
-        # 返回模型文件
+        # 返回模型文件，附带内容哈希供下载方校验完整性；内容哈希同时作为ETag，
+        # 下载方携带 If-None-Match 重新验证本地缓存时，模型未更新则返回304不传输文件
+        # 缓存未命中时需要读取整个文件计算哈希，放到线程池执行
+        sha256 = await asyncio.to_thread(get_file_sha256, model_file)
+        headers = {"X-Content-SHA256": sha256, "ETag": f'"{sha256}"'}
+        if_none_match = request.headers.get("if-none-match", "")
+        if f'"{sha256}"' in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+            return Response(status_code=304, headers=headers)
         return FileResponse(
             model_file,
             filename=f"{code}.pt",
-            media_type="application/octet-stream"
+            media_type="application/octet-stream",
+            headers=headers
         )
         
     except HTTPException:
@@ -0,0 +1,232 @@
+"""
+多路摄像头模拟器
+以 HTTP MJPEG（multipart/x-mixed-replace）提供 N 路合成画面或循环播放的视频文件，
+cv2.VideoCapture 可直接读取，用于在单机上以生产规模压测分析服务、流监控和节点调度
+
+用法:
+    python tools/stream_simulator.py --cameras 100 --width 1280 --height 720 --fps 15
+    python tools/stream_simulator.py --cameras 50 --source demo.mp4 --jitter 20 --disconnect-every 120
+
+地址:
+    http://<host>:<port>/stream/<编号>.mjpg   MJPEG流（编号从0开始）
+    http://<host>:<port>/snapshot/<编号>.jpg  单帧快照
+    http://<host>:<port>/                     全部流地址
+    http://<host>:<port>/stats                连接数与发送统计
+"""
+import time
+import random
+import asyncio
+import argparse
+from typing import Dict, List, Optional
+import cv2
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+
+BOUNDARY = "frame"
+
+class FramePool:
+    """预编码的JPEG帧池，所有摄像头共享，每路按不同相位循环读取，避免逐帧编码开销"""
+
+    def __init__(self, frames: List[bytes]):
+        if not frames:
+            raise ValueError("帧池为空")
+        self.frames = frames
+
+    @classmethod
+    def synthetic(cls, width: int, height: int, count: int, objects: int, quality: int, seed: int = 0) -> "FramePool":
+        """生成运动矩形合成画面"""
+        rng = np.random.default_rng(seed)
+        background = rng.integers(40, 90, size=(height, width, 3), dtype=np.uint8)
+        side = max(8, min(width, height) // 8)
+        boxes = [
+            {
+                "pos": rng.uniform([0, 0], [width - side, height - side]),
+                "vel": rng.uniform(-1, 1, size=2) * max(width, height) / 100,
+                "color": tuple(int(c) for c in rng.integers(120, 255, size=3))
+            }
+            for _ in range(objects)
+        ]
+        frames = []
+        for index in range(count):
+            frame = background.copy()
+            for box in boxes:
+                box["pos"] += box["vel"]
+                for axis, limit in enumerate((width - side, height - side)):
+                    if not 0 <= box["pos"][axis] <= limit:
+                        box["vel"][axis] = -box["vel"][axis]
+                        box["pos"][axis] = min(max(box["pos"][axis], 0), limit)
+                x, y = int(box["pos"][0]), int(box["pos"][1])
+                cv2.rectangle(frame, (x, y), (x + side, y + side), box["color"], -1)
+            cv2.putText(frame, f"#{index}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+            frames.append(cls._encode(frame, quality))
+        return cls(frames)
+
+    @classmethod
+    def from_file(cls, path: str, width: int, height: int, count: int, quality: int) -> "FramePool":
+        """读取视频文件的前 count 帧并缩放到指定分辨率"""
+        cap = cv2.VideoCapture(path)
+        if not cap.isOpened():
+            raise RuntimeError(f"无法打开视频文件: {path}")
+        frames = []
+        try:
+            while len(frames) < count:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                if frame.shape[1] != width or frame.shape[0] != height:
+                    frame = cv2.resize(frame, (width, height))
+                frames.append(cls._encode(frame, quality))
+        finally:
+            cap.release()
+        return cls(frames)
+
+    @staticmethod
+    def _encode(frame: np.ndarray, quality: int) -> bytes:
+        ok, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        if not ok:
+            raise RuntimeError("JPEG编码失败")
+        return buffer.tobytes()
+
+    def frame(self, camera: int, index: int) -> bytes:
+        # 不同摄像头错开相位，画面互不相同
+        return self.frames[(index + camera * 7) % len(self.frames)]
+
+class Simulator:
+    """模拟器状态与统计"""
+
+    def __init__(self, pool: FramePool, cameras: int, fps: float, jitter_ms: float,
+                 disconnect_every: float, offline: List[int], seed: int = 0):
+        self.pool = pool
+        self.cameras = cameras
+        self.fps = fps
+        self.jitter = jitter_ms / 1000.0
+        self.disconnect_every = disconnect_every
+        self.offline = set(offline)
+        self.rng = random.Random(seed)
+        self.connections: Dict[int, int] = {}
+        self.frames_sent = 0
+        self.bytes_sent = 0
+        self.disconnects = 0
+        self.started_at = time.time()
+
+    def check_camera(self, camera: int):
+        if camera < 0 or camera >= self.cameras:
+            raise HTTPException(status_code=404, detail=f"摄像头 {camera} 不存在")
+        if camera in self.offline:
+            raise HTTPException(status_code=503, detail=f"摄像头 {camera} 离线")
+
+    def current_index(self) -> int:
+        """按挂钟时间计算当前帧序号，同一摄像头的多个连接看到相同画面"""
+        return int((time.time() - self.started_at) * self.fps)
+
+    async def stream(self, camera: int):
+        """单个连接的MJPEG帧生成器"""
+        self.connections[camera] = self.connections.get(camera, 0) + 1
+        interval = 1.0 / self.fps
+        # 断流注入：按指数分布随机决定本连接的存活时长
+        lifetime = self.rng.expovariate(1.0 / self.disconnect_every) if self.disconnect_every > 0 else None
+        start = time.monotonic()
+        next_due = start
+        try:
+            while True:
+                if lifetime is not None and time.monotonic() - start >= lifetime:
+                    self.disconnects += 1
+                    return
+                data = self.pool.frame(camera, self.current_index())
+                self.frames_sent += 1
+                self.bytes_sent += len(data)
+                yield (
+                    f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(data)}\r\n\r\n".encode()
+                    + data + b"\r\n"
+                )
+                next_due += interval
+                delay = next_due - time.monotonic()
+                if self.jitter:
+                    delay += self.rng.uniform(-self.jitter, self.jitter)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                elif -delay > interval * 10:
+                    # 客户端读取过慢时不补发积压帧
+                    next_due = time.monotonic()
+        finally:
+            self.connections[camera] -= 1
+
+    def stats(self) -> Dict:
+        uptime = time.time() - self.started_at
+        return {
+            "cameras": self.cameras,
+            "fps": self.fps,
+            "uptime": round(uptime, 1),
+            "active_connections": sum(self.connections.values()),
+            "connections": {str(k): v for k, v in self.connections.items() if v},
+            "frames_sent": self.frames_sent,
+            "bytes_sent": self.bytes_sent,
+            "send_fps": round(self.frames_sent / uptime, 1) if uptime > 0 else 0,
+            "disconnects": self.disconnects,
+            "offline": sorted(self.offline)
+        }
+
+def create_app(simulator: Simulator, base_url: Optional[str] = None) -> FastAPI:
+    app = FastAPI(title="Stream Simulator")
+
+    @app.get("/")
+    async def index(request: Request):
+        base = base_url or str(request.base_url).rstrip("/")
+        return {"streams": [f"{base}/stream/{i}.mjpg" for i in range(simulator.cameras)]}
+
+    @app.get("/stream/{camera}.mjpg")
+    async def stream(camera: int):
+        simulator.check_camera(camera)
+        return StreamingResponse(
+            simulator.stream(camera),
+            media_type=f"multipart/x-mixed-replace; boundary={BOUNDARY}",
+            headers={"Cache-Control": "no-cache"}
+        )
+
+    @app.get("/snapshot/{camera}.jpg")
+    async def snapshot(camera: int):
+        simulator.check_camera(camera)
+        return Response(simulator.pool.frame(camera, simulator.current_index()), media_type="image/jpeg")
+
+    @app.get("/stats")
+    async def stats():
+        return simulator.stats()
+
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="多路摄像头MJPEG模拟器")
+    parser.add_argument("--cameras", type=int, default=10, help="摄像头路数")
+    parser.add_argument("--width", type=int, default=1280, help="画面宽度")
+    parser.add_argument("--height", type=int, default=720, help="画面高度")
+    parser.add_argument("--fps", type=float, default=15, help="每路帧率")
+    parser.add_argument("--source", default=None, help="循环播放的视频文件，默认生成合成画面")
+    parser.add_argument("--loop-frames", type=int, default=250, help="帧池帧数（循环长度）")
+    parser.add_argument("--objects", type=int, default=6, help="合成画面的运动目标数")
+    parser.add_argument("--quality", type=int, default=80, help="JPEG质量")
+    parser.add_argument("--jitter", type=float, default=0, help="帧间隔随机抖动（毫秒）")
+    parser.add_argument("--disconnect-every", type=float, default=0, help="每个连接平均存活秒数，超时后主动断开，0为不断开")
+    parser.add_argument("--offline", default="", help="始终离线的摄像头编号，逗号分隔")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--host", default="0.0.0.0", help="监听地址")
+    parser.add_argument("--port", type=int, default=8090, help="监听端口")
+    parser.add_argument("--base-url", default=None, help="列表中流地址的前缀，默认使用请求地址")
+    args = parser.parse_args()
+
+    print(f"\n生成帧池: {args.loop_frames} 帧, {args.width}x{args.height} ...")
+    if args.source:
+        pool = FramePool.from_file(args.source, args.width, args.height, args.loop_frames, args.quality)
+    else:
+        pool = FramePool.synthetic(args.width, args.height, args.loop_frames, args.objects, args.quality, args.seed)
+
+    offline = [int(x) for x in args.offline.split(",") if x.strip()]
+    simulator = Simulator(pool, args.cameras, args.fps, args.jitter, args.disconnect_every, offline, args.seed)
+
+    print(f"模拟器启动: {args.cameras} 路, {args.fps} fps")
+    print(f"流地址: http://localhost:{args.port}/stream/0.mjpg ... /stream/{args.cameras - 1}.mjpg\n")
+    uvicorn.run(create_app(simulator, args.base_url), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()